@@ -0,0 +1,199 @@
+# Headless batch CV processing
+#
+# Runs the CV pipeline (PDF text -> GPT parsing -> standardization -> ESCO
+# matching) over a directory or glob of PDFs without Streamlit. Text
+# extraction runs in a process pool, the LLM stages run on a bounded thread
+# pool, and one JSON record per CV is appended to the output file as soon as
+# it is done. Re-running with the same output file skips CVs already in it,
+# so an interrupted run resumes where it stopped. With --retry-errors failed
+# CVs are processed again and the newest record for a file wins. --fused
+# does parsing, validation, standardization and ESCO matching in one call.
+#
+# Usage:
+#   python batch_cv.py "drop/*.pdf" more_cvs/ -o results.jsonl --llm-workers 8
+
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from cv_gpt_4_parser import analyze_cv_fused, extract_text_from_pdf, match_skills_to_esco_specific, parse_cv_with_gpt, standardize_skill_mapping
+from rate_limiter import BATCH, set_default_priority
+from tracing import export_metrics
+
+
+def find_pdfs(inputs: list[str]) -> list[str]:
+    paths = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*.pdf")
+        paths.extend(p for p in glob.glob(pattern, recursive=True) if p.lower().endswith(".pdf"))
+    return sorted({os.path.abspath(p) for p in paths})
+
+
+def load_checkpoint(output_path: str, retry_errors: bool = False) -> set[str]:
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partially written last line of an interrupted run
+            if retry_errors and record.get("status") != "ok":
+                continue
+            done.add(record["file"])
+    return done
+
+
+def _extract(path: str) -> tuple[str, str]:
+    with open(path, "rb") as f:
+        data = f.read()
+    return hashlib.sha256(data).hexdigest(), extract_text_from_pdf(io.BytesIO(data))
+
+
+def analyze_cv_text(text: str, api_key: str, fused: bool = False) -> dict:
+    fused_result = analyze_cv_fused(text, api_key) if fused else None
+    if fused_result is not None:
+        return {"status": "ok", "parsed": json.loads(fused_result["parsed_result"]),
+                "standardized_skills": list(fused_result["skills"]), "esco_skills": fused_result["skills"]}
+
+    parsed_text = parse_cv_with_gpt(text, api_key)
+    try:
+        parsed = json.loads(parsed_text)
+    except Exception:
+        return {"status": "error", "error": parsed_text[:500]}
+
+    skills = parsed.get("programming_languages_and_technical_skills", [])
+    standardized = list(dict.fromkeys(standardize_skill_mapping(skills, api_key).values())) if skills else []
+    esco = match_skills_to_esco_specific(standardized, api_key) if standardized else {}
+    if "error" in esco:
+        return {"status": "error", "parsed": parsed, "standardized_skills": standardized, "error": esco["error"]}
+    return {"status": "ok", "parsed": parsed, "standardized_skills": standardized, "esco_skills": esco}
+
+
+class _Progress:
+    def __init__(self, total: int, every_seconds: float = 5.0, enabled: bool = True):
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.start = time.monotonic()
+        self.every_seconds = every_seconds
+        self.last_report = 0.0
+        self.enabled = enabled
+
+    def update(self, record: dict):
+        self.done += 1
+        if record["status"] != "ok":
+            self.errors += 1
+        now = time.monotonic()
+        if self.enabled and (now - self.last_report >= self.every_seconds or self.done == self.total):
+            self.last_report = now
+            self.report()
+
+    def summary(self) -> dict:
+        elapsed = time.monotonic() - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        return {
+            "processed": self.done,
+            "errors": self.errors,
+            "total": self.total,
+            "elapsed_s": round(elapsed, 1),
+            "cvs_per_minute": round(rate * 60, 1),
+            "eta_s": round((self.total - self.done) / rate, 1) if rate else None,
+        }
+
+    def report(self):
+        s = self.summary()
+        print(
+            f"[{s['processed']}/{s['total']}] {s['errors']} errors, "
+            f"{s['cvs_per_minute']} CVs/min, elapsed {s['elapsed_s']}s, ETA {s['eta_s']}s",
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def process_cv_batch(inputs: list[str], output_path: str, api_key: str, pdf_workers: int = os.cpu_count() or 1,
+                     llm_workers: int = 4, retry_errors: bool = False, progress: bool = True,
+                     fused: bool = False) -> dict:
+    paths = find_pdfs(inputs)
+    done = load_checkpoint(output_path, retry_errors)
+    todo = [p for p in paths if p not in done]
+    tracker = _Progress(len(todo), enabled=progress)
+
+    # Keep a bounded number of CVs in flight so extracted text doesn't pile up
+    # in memory while the LLM stage is the bottleneck.
+    max_in_flight = pdf_workers + 2 * llm_workers
+    queue = iter(todo)
+
+    with ProcessPoolExecutor(max_workers=pdf_workers) as pdf_pool, \
+            ThreadPoolExecutor(max_workers=llm_workers) as llm_pool, \
+            open(output_path, "a", encoding="utf-8") as out:
+        in_flight = {}
+        while True:
+            while len(in_flight) < max_in_flight:
+                path = next(queue, None)
+                if path is None:
+                    break
+                in_flight[pdf_pool.submit(_extract, path)] = ("extract", path, None)
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, path, digest = in_flight.pop(future)
+                if stage == "extract":
+                    try:
+                        digest, text = future.result()
+                    except Exception as e:
+                        record = {"status": "error", "error": f"PDF extraction failed: {e}"}
+                    else:
+                        in_flight[llm_pool.submit(analyze_cv_text, text, api_key, fused)] = ("llm", path, digest)
+                        continue
+                else:
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        record = {"status": "error", "error": str(e)}
+
+                record = {"file": path, "sha256": digest, **record}
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                tracker.update(record)
+
+    summary = tracker.summary()
+    summary["skipped"] = len(paths) - len(todo)
+    return summary
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Analyze a batch of CV PDFs and write one JSON record per CV.")
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("-o", "--output", default="cv_results.jsonl", help="JSONL output (also the resume checkpoint)")
+    parser.add_argument("--pdf-workers", type=int, default=os.cpu_count() or 1, help="processes for PDF text extraction")
+    parser.add_argument("--llm-workers", type=int, default=4, help="CVs analyzed concurrently by the LLM stages")
+    parser.add_argument("--retry-errors", action="store_true", help="re-process CVs whose previous record is an error")
+    parser.add_argument("--fused", action="store_true", help="analyze each CV in one schema-constrained call, "
+                                                             "falling back to the step-by-step chain")
+    args = parser.parse_args(argv)
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        parser.error("OPENAI_API_KEY environment variable is not set")
+
+    set_default_priority(BATCH)  # Yield to interactive sessions sharing the process limits
+
+    summary = process_cv_batch(args.inputs, args.output, api_key, args.pdf_workers, args.llm_workers, args.retry_errors,
+                               fused=args.fused)
+    print(json.dumps(summary), file=sys.stderr)
+    export_metrics()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# Reproducible end-to-end benchmarks against local fake servers
+#
+# Starts the fake LLM and TheirStack servers from fake_servers.py, points the
+# pipelines at them (OPENAI_BASE_URL, THEIRSTACK_URL), disables the response
+# cache (SKILL_MATCHER_CACHE=0) and uses throwaway job, snapshot and trend stores.
+# It then drives the CV pipeline and/or the job-market pipeline headlessly at
+# the given concurrency and reports p50/p95 latency, throughput, token counts
+# and per-stage timings. With a fixed seed and latency settings, runs on
+# different commits are comparable; --output appends one JSON line per
+# pipeline, tagged with the current git commit.
+#
+# Usage:
+#   python benchmark.py --pipeline all --requests 20 --concurrency 4 --output bench.jsonl
+#   python benchmark.py --pipeline cv --cv "cvs/*.pdf" --llm-latency 0.8 --llm-jitter 0.2
+
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fake_servers import SKILL_VOCABULARY, FakeLLMServer, FakeTheirStackServer
+
+JOB_TITLES = ["software developer", "data engineer", "devops engineer", "data scientist", "frontend developer"]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def synthetic_cv(index: int, seed: int) -> str:
+    rng = random.Random(f"{seed}:cv:{index}")
+    skills = rng.sample(SKILL_VOCABULARY, 10)
+    return "\n".join([
+        f"Candidate {index}",
+        "Software Developer, Example AB, 2020-2024",
+        "Built and operated backend services for logistics customers.",
+        "MSc Computer Science, Chalmers University of Technology, 2020",
+        "Skills: " + ", ".join(skills),
+        "Languages: Swedish (native), English (fluent)",
+    ])
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(int(q * len(values)), len(values) - 1)], 4)
+
+
+def run_load(task, inputs: list, concurrency: int) -> dict:
+    latencies, errors = [], []
+
+    def timed(item):
+        start = time.perf_counter()
+        try:
+            ok = task(item)
+        except Exception as e:
+            ok = False
+            errors.append(repr(e))
+        latencies.append(time.perf_counter() - start)
+        return ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, inputs))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(inputs),
+        "concurrency": concurrency,
+        "failed": sum(1 for ok in outcomes if not ok),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(inputs) / elapsed, 3) if elapsed else None,
+        "p50_s": percentile(latencies, 0.5),
+        "p95_s": percentile(latencies, 0.95),
+        "mean_s": round(statistics.mean(latencies), 4) if latencies else None,
+        "errors": errors[:5],
+    }
+
+
+def bench_cv(args, api_key: str) -> dict:
+    from batch_cv import analyze_cv_text
+    from cv_gpt_4_parser import extract_text_from_pdf
+
+    pdfs = sorted(p for pattern in args.cv for p in glob.glob(pattern)) if args.cv else []
+    if pdfs:
+        inputs = [pdfs[i % len(pdfs)] for i in range(args.requests)]
+
+        def task(path):
+            with open(path, "rb") as f:
+                text = extract_text_from_pdf(f)
+            return analyze_cv_text(text, api_key, args.fused)["status"] == "ok"
+    else:
+        inputs = [synthetic_cv(i, args.seed) for i in range(args.requests)]
+
+        def task(text):
+            return analyze_cv_text(text, api_key, args.fused)["status"] == "ok"
+
+    return run_load(task, inputs, args.concurrency)
+
+
+def bench_jobs(args, api_key: str) -> dict:
+    from job_ads_gpt import analyze_job_market
+
+    # A distinct title per request, so every request fetches and extracts its own ads
+    inputs = [f"{JOB_TITLES[i % len(JOB_TITLES)]} {i}" for i in range(args.requests)]
+
+    def task(title):
+        analysis = analyze_job_market(title, api_key, "bench-theirstack-key")
+        return analysis is not None and bool(analysis["core"] or analysis["optional"])
+
+    return run_load(task, inputs, args.concurrency)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark the CV and job-market pipelines against local fake servers.")
+    parser.add_argument("--pipeline", choices=["cv", "jobs", "all"], default="all")
+    parser.add_argument("--requests", type=int, default=20, help="requests per pipeline")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--cv", nargs="*", help="PDF files or glob patterns (default: synthetic CV text)")
+    parser.add_argument("--fused", action="store_true", help="use the single-call CV analysis")
+    parser.add_argument("--ads-per-title", type=int, default=100)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="seconds per LLM request")
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--llm-token-latency", type=float, default=0.0, help="seconds per completion token")
+    parser.add_argument("--llm-throttle-rate", type=float, default=0.0, help="share of LLM requests answered with 429")
+    parser.add_argument("--jobs-latency", type=float, default=0.2, help="seconds per TheirStack request")
+    parser.add_argument("--jobs-jitter", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--with-cache", action="store_true", help="keep the response cache enabled (fresh per run)")
+    parser.add_argument("--output", help="append one JSON result line per pipeline to this file")
+    args = parser.parse_args(argv)
+
+    llm = FakeLLMServer(args.llm_latency, args.llm_jitter, args.llm_token_latency, seed=args.seed,
+                        throttle_rate=args.llm_throttle_rate).start()
+    theirstack = FakeTheirStackServer(args.jobs_latency, args.jobs_jitter, args.ads_per_title, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix="skill_matcher_bench_")
+
+    # Must be set before the pipeline modules are imported, they read it at import time
+    os.environ["OPENAI_BASE_URL"] = llm.url
+    os.environ["THEIRSTACK_URL"] = theirstack.search_url
+    os.environ["SKILL_MATCHER_CACHE"] = "1" if args.with_cache else "0"
+    os.environ["SKILL_MATCHER_CACHE_DIR"] = workdir
+    os.environ["SKILL_MATCHER_JOB_STORE"] = os.path.join(workdir, "job_ads.sqlite3")
+    os.environ["SKILL_MATCHER_SNAPSHOT_STORE"] = os.path.join(workdir, "market_snapshots.sqlite3")
+    os.environ["SKILL_TAXONOMY_LEARNED"] = os.path.join(workdir, "learned_skills.json")
+    os.environ["SKILL_MATCHER_TREND_STORE"] = os.path.join(workdir, "skill_trends")
+
+    from rate_limiter import limiter_metrics
+    from tracing import metrics_snapshot, reset_metrics
+
+    api_key = "bench-openai-key"
+    benches = {"cv": bench_cv, "jobs": bench_jobs}
+    pipelines = ["cv", "jobs"] if args.pipeline == "all" else [args.pipeline]
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "pipeline")}
+
+    try:
+        for name in pipelines:
+            reset_metrics()
+            llm_requests, jobs_requests = llm.requests, theirstack.requests
+            llm_throttled, jobs_throttled = llm.throttled, theirstack.throttled
+            result = benches[name](args, api_key)
+            stages = metrics_snapshot()["stages"]
+            result.update({
+                "pipeline": name,
+                "commit": git_commit(),
+                "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "llm_requests": llm.requests - llm_requests,
+                "llm_throttled": llm.throttled - llm_throttled,
+                "theirstack_requests": theirstack.requests - jobs_requests,
+                "theirstack_throttled": theirstack.throttled - jobs_throttled,
+                "prompt_tokens": sum(s["prompt_tokens"] for s in stages.values()),
+                "completion_tokens": sum(s["completion_tokens"] for s in stages.values()),
+                "stages": stages,
+                "rate_limiter": limiter_metrics(),
+                "config": config,
+            })
+            print(json.dumps(result, indent=2))
+            if args.output:
+                with open(args.output, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(result) + "\n")
+    finally:
+        llm.stop()
+        theirstack.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
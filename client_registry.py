@@ -0,0 +1,199 @@
+# Process-wide registry of pooled HTTP clients
+#
+# OpenAI clients are created once per (api_key, base_url) and share an httpx
+# connection pool with keep-alive, so only the first call to an endpoint pays
+# the TCP/TLS handshake. TheirStack requests go through one requests.Session
+# with a pooled adapter. Because the registry lives at module level it is
+# shared by every Streamlit session served by the same process.
+#
+# Every call records how long was spent opening connections versus waiting
+# for the server, see connection_timings() / timing_summary().
+#
+# Configuration (environment variables):
+#   OPENAI_BASE_URL                 endpoint for the GPT helpers
+#   SKILL_MATCHER_POOL_SIZE         max connections per pool (default 20)
+#   SKILL_MATCHER_CONNECT_TIMEOUT   seconds (default 10)
+#   SKILL_MATCHER_READ_TIMEOUT      seconds (default 120)
+
+import os
+import threading
+import time
+from collections import deque
+
+import httpx
+import requests
+import urllib3
+from openai import OpenAI
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import call_with_backoff
+
+DEFAULT_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://anast.ita.chalmers.se:4000")  # Custom endpoint for Chalmers deployment
+POOL_SIZE = int(os.getenv("SKILL_MATCHER_POOL_SIZE", 20))
+CONNECT_TIMEOUT = float(os.getenv("SKILL_MATCHER_CONNECT_TIMEOUT", 10))
+READ_TIMEOUT = float(os.getenv("SKILL_MATCHER_READ_TIMEOUT", 120))
+
+_lock = threading.Lock()
+_openai_clients: dict[tuple[str, str], OpenAI] = {}
+_http_session = None
+
+_timings = deque(maxlen=1000)
+
+
+def _record_timing(target: str, connect_s: float, server_s: float, total_s: float):
+    _timings.append({
+        "target": target,
+        "connect_s": round(connect_s, 4),
+        "server_s": round(server_s, 4),
+        "total_s": round(total_s, 4),
+        "reused_connection": connect_s == 0,
+        "at": time.time(),
+    })
+
+
+def connection_timings() -> list[dict]:
+    return list(_timings)
+
+
+def timing_summary() -> dict:
+    records = list(_timings)
+    new = [r for r in records if not r["reused_connection"]]
+    reused = [r for r in records if r["reused_connection"]]
+
+    def avg(rows, field):
+        return round(sum(r[field] for r in rows) / len(rows), 4) if rows else None
+
+    return {
+        "calls": len(records),
+        "new_connections": len(new),
+        "reused_connections": len(reused),
+        "avg_connect_s_new": avg(new, "connect_s"),
+        "avg_server_s": avg(records, "server_s"),
+        "avg_total_s_new": avg(new, "total_s"),
+        "avg_total_s_reused": avg(reused, "total_s"),
+    }
+
+
+# --- httpx (OpenAI) timing via httpcore trace events ---
+class _HttpxCallTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.connect_s = 0.0
+        self.server_start = None
+        self.server_end = None
+        self._pending = {}
+
+    def __call__(self, event_name: str, info: dict):
+        now = time.perf_counter()
+        if event_name.endswith(".started"):
+            self._pending[event_name[:-len(".started")]] = now
+        elif event_name.endswith(".complete"):
+            name = event_name[:-len(".complete")]
+            started = self._pending.pop(name, now)
+            if name in ("connection.connect_tcp", "connection.start_tls"):
+                self.connect_s += now - started
+            elif name.endswith("send_request_headers"):
+                self.server_start = started
+            elif name.endswith("receive_response_headers"):
+                self.server_end = now
+
+
+def _on_httpx_request(request: httpx.Request):
+    timer = _HttpxCallTimer()
+    request.extensions["trace"] = timer
+
+
+def _on_httpx_response(response: httpx.Response):
+    timer = response.request.extensions.get("trace")
+    if not isinstance(timer, _HttpxCallTimer):
+        return
+    end = time.perf_counter()
+    server_s = (timer.server_end or end) - (timer.server_start or timer.start)
+    _record_timing(response.request.url.host, timer.connect_s, server_s, end - timer.start)
+
+
+def _build_httpx_client() -> httpx.Client:
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE, keepalive_expiry=60),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        event_hooks={"request": [_on_httpx_request], "response": [_on_httpx_response]},
+    )
+
+
+def get_openai_client(api_key: str, base_url: str = DEFAULT_BASE_URL) -> OpenAI:
+    key = (api_key or "", base_url)
+    with _lock:
+        client = _openai_clients.get(key)
+        if client is None:
+            # Retries are done by rate_limiter.call_with_backoff, which also adapts concurrency
+            client = OpenAI(api_key=api_key, base_url=base_url, http_client=_build_httpx_client(), max_retries=0)
+            _openai_clients[key] = client
+        return client
+
+
+# --- requests (TheirStack) timing via instrumented urllib3 connections ---
+_connect_time = threading.local()
+
+
+def _timed_connect(connect):
+    def wrapper(self):
+        start = time.perf_counter()
+        try:
+            return connect(self)
+        finally:
+            _connect_time.seconds = getattr(_connect_time, "seconds", 0.0) + time.perf_counter() - start
+    return wrapper
+
+
+class _TimedHTTPConnection(urllib3.connection.HTTPConnection):
+    connect = _timed_connect(urllib3.connection.HTTPConnection.connect)
+
+
+class _TimedHTTPSConnection(urllib3.connection.HTTPSConnection):
+    connect = _timed_connect(urllib3.connection.HTTPSConnection.connect)
+
+
+class _TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def get_http_session() -> requests.Session:
+    global _http_session
+    with _lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = _PooledAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def _timed_post(url: str, **kwargs) -> requests.Response:
+    _connect_time.seconds = 0.0
+    start = time.perf_counter()
+    resp = get_http_session().post(url, **kwargs)
+    total = time.perf_counter() - start
+    connect_s = _connect_time.seconds
+    _record_timing(urllib3.util.parse_url(url).host, connect_s, max(resp.elapsed.total_seconds() - connect_s, 0.0), total)
+    return resp
+
+
+# POST through the endpoint's shared rate limiter; throttled and failed
+# requests are retried with backoff (see rate_limiter.py)
+def http_post(url: str, endpoint: str = "theirstack", **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
+    return call_with_backoff(endpoint, lambda: _timed_post(url, **kwargs))
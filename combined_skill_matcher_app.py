@@ -1,56 +1,141 @@
 import streamlit as st
 # ---------- Page config ----------
 st.set_page_config(page_title="AI Skill Matcher", layout="wide")
-st.info("🔒 **Privacy Notice**: We do not store or log any uploaded CVs or user input. All data is processed in-memory and discarded after your session.")
+st.info("🔒 **Privacy Notice**: We do not store or log uploaded CVs or the text you type: they, and the AI's parsing of them, are kept in memory for your browser session only. Other AI responses (job-market analyses and lookups of individual skill names) are cached on the server, keyed by a one-way hash of the request, so repeated analyses are faster; the operator can turn this off with `SKILL_MATCHER_CACHE=0`.")
 
-from job_ads_gpt import run_job_analysis
-from cv_gpt_4_parser import run_cv_analysis
+from job_ads_gpt import render_skill_trends, run_job_analysis
+from cv_gpt_4_parser import cancel_cv_prefetch, run_cv_analysis
+from skill_similarity import match_skills, STRONG_THRESHOLD, PARTIAL_THRESHOLD
 import os
-from openai import OpenAI
+from client_registry import get_openai_client
+from market_snapshots import get_snapshot_service
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from client_registry import timing_summary
+from memo import input_hash, memo_stats, process_memo
+from model_routing import model_routes
+from tracing import export_metrics, metrics_snapshot, set_session, start_metrics_server
 
 # ---------- Environment ----------
 gpt_key = os.getenv("OPENAI_API_KEY")
 theirstack_key = os.getenv("THEIRSTACK_API_KEY")
 
-client = OpenAI(api_key=gpt_key, base_url="https://anast.ita.chalmers.se:4000")
+# Shared, pooled client: reruns and other sessions reuse the same connections
+client = get_openai_client(gpt_key)
+
+# Background refresh of precomputed snapshots for the titles in MARKET_SNAPSHOT_TITLES
+# (opt-in, none by default), started once per process
+@st.cache_resource
+def start_market_snapshots():
+    service = get_snapshot_service()
+    if gpt_key and theirstack_key and service.titles:
+        service.start()
+    return service
+
+start_market_snapshots()
+
+# Per-session timing, token and cache metrics; /metrics is served when SKILL_MATCHER_METRICS_PORT is set
+@st.cache_resource
+def start_metrics():
+    return start_metrics_server()
+
+start_metrics()
+ctx = get_script_run_ctx()
+set_session(ctx.session_id if ctx else "")
+
+stream_llm = st.sidebar.toggle("⚡ Show AI results as they stream in", value=False)
+fused_cv = st.sidebar.toggle("🚀 Analyze CVs in a single AI call", value=False,
+                             help="Parses the CV and normalizes its skills in one request; falls back to the step-by-step analysis if that fails.")
+prefetch_cv = st.sidebar.toggle("🔮 Start analyzing CVs as soon as they are uploaded", value=False,
+                                help="Parses the CV in the background right after upload, so results are ready when you click Analyze.")
+show_performance = st.sidebar.toggle("⏱️ Show performance details", value=False)
 
 # ---------- Tabs ----------
-CV_tab, job_ads_tab, comparison_tab = st.tabs(["📄 Skill Matching with AI", "📊 Job Market Analysis", "🔍 Final Skill Comparison Results"])
+CV_tab, job_ads_tab, comparison_tab, trends_tab = st.tabs(["📄 Skill Matching with AI", "📊 Job Market Analysis", "🔍 Final Skill Comparison Results", "📈 Skill Demand Trends"])
 
 # --- CV Tab ---
 with CV_tab:
     uploaded_file = st.file_uploader("Upload your CV (PDF only)", type=["pdf"])
     if uploaded_file:
-        run_cv_analysis(uploaded_file, gpt_key)
+        run_cv_analysis(uploaded_file, gpt_key, stream=stream_llm, fused=fused_cv, prefetch=prefetch_cv)
+    else:
+        cancel_cv_prefetch()
 
 
 # --- Job Ad Tab ---
 with job_ads_tab:
     job_title = st.text_input("💼 Enter a job title to analyze", placeholder="e.g. software developer")
     if st.button("🔍 Analyze Job Market for This Role"):
-        run_job_analysis(job_title, gpt_key, theirstack_key)
+        run_job_analysis(job_title, gpt_key, theirstack_key, stream=stream_llm)
 
 with comparison_tab: 
     st.header("🧮 Compare Your Skills With Market Demands")
 
-    user_skills = set(s.lower() for s in st.session_state.get("cv_skills", []))
+    user_skills = list(st.session_state.get("cv_skills", []))
     core_skills_raw = [s["skill"] for s in st.session_state.get("core_skills", [])]
 
+    with st.expander("⚙️ Matching sensitivity"):
+        strong_threshold = st.slider("Similarity counted as a match", 0.5, 1.0, STRONG_THRESHOLD, 0.05)
+        # A partial match can never need more similarity than a full one
+        partial_threshold = st.slider("Similarity counted as a partial match", 0.2, strong_threshold,
+                                      min(PARTIAL_THRESHOLD, strong_threshold), 0.05)
+
     if user_skills and core_skills_raw:
-        core_skills = set([s.lower() for s in core_skills_raw])
+        # Shared across sessions: reruns and other users with the same skills reuse the result
+        matches = process_memo("skill_matches").get_or_compute(
+            input_hash(user_skills, core_skills_raw, strong_threshold, partial_threshold),
+            lambda: match_skills(user_skills, core_skills_raw, strong_threshold, partial_threshold))
 
-        matched_skills = sorted(user_skills & core_skills)
-        missing_skills = sorted(core_skills - user_skills)
+        matched_skills = [m for m in matches if m["grade"] in ("exact", "strong")]
+        partial_skills = [m for m in matches if m["grade"] == "partial"]
+        missing_skills = [m for m in matches if m["grade"] == "missing"]
 
         if matched_skills:
             st.success("✅ You have the following core skills that match the required skills for: {}".format(job_title))
-            for skill in matched_skills:
-                st.markdown(f"- ✅ **{skill}**")
+            for m in matched_skills:
+                if m["grade"] == "exact":
+                    st.markdown(f"- ✅ **{m['skill']}**")
+                else:
+                    st.markdown(f"- ✅ **{m['skill']}** (matched by your skill _{m['match']}_, similarity {m['score']:.2f})")
+        if partial_skills:
+            st.info("🤔 These core skills are close to skills you listed, double-check that they cover the requirement:")
+            for m in partial_skills:
+                st.markdown(f"- ⚠️ **{m['skill']}** ~ _{m['match']}_ (similarity {m['score']:.2f})")
         if missing_skills:
             st.warning("🚨 You're missing some core skills commonly required for: {}".format(job_title))
-            for skill in missing_skills:
-                st.markdown(f"- ❌ **{skill}**")
+            for m in missing_skills:
+                st.markdown(f"- ❌ **{m['skill']}**")
         else:
             st.success("✅ Great! You already have all the core skills listed in the job ads.")
     else:
-        st.info("ℹ️ Please analyze both your CV and job ads before comparing.")
\ No newline at end of file
+        st.info("ℹ️ Please analyze both your CV and job ads before comparing.")
+
+# --- Trends Tab ---
+with trends_tab:
+    st.header("📈 How Skill Demand Changes Over Time")
+    render_skill_trends()
+
+# ---------- Performance ----------
+if show_performance:
+    with st.expander("⏱️ Performance"):
+        metrics = metrics_snapshot(ctx.session_id if ctx else None)
+        st.markdown("**This session**")
+        session_rows = [{"stage": stage, **stats} for stage, stats in metrics.get("session", {}).items()]
+        if session_rows:
+            st.dataframe(session_rows)
+        else:
+            st.caption("No traced calls in this session yet.")
+        st.markdown("**All sessions on this server**")
+        st.dataframe([{"stage": stage, **stats} for stage, stats in metrics["stages"].items()])
+        st.markdown("**Rate limiters (queue depth, wait time, adaptive concurrency)**")
+        st.json(metrics.get("rate_limiter", {}))
+        st.markdown("**Coalesced identical requests**")
+        st.json(metrics.get("single_flight", {}))
+        st.markdown("**Model routes and local validators (answered without GPT)**")
+        st.json({"routes": model_routes(), "validators": metrics.get("local_validators", {})})
+        st.markdown("**JSON repair (fenced, truncated or partial completions salvaged)**")
+        st.json(metrics.get("json_repair", {}))
+        st.json(timing_summary())
+        st.markdown("**Rerun memoization**")
+        st.json(memo_stats())
+
+export_metrics()
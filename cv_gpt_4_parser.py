@@ -1,8 +1,23 @@
-from openai import OpenAI
 from PyPDF2 import PdfReader
+from PyPDF2.errors import PdfReadError
 import streamlit as st
 import os
+import io
+import hashlib
 import json
+import multiprocessing
+import threading
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from client_registry import get_openai_client
+from json_repair import PARTIAL, decode_cv, decode_json, decode_skill_mapping, require_complete
+from json_stream import IncrementalJSONParser
+from llm_cache import cached_chat_completion, stream_chat_completion
+from local_validators import classify_skill
+from skill_taxonomy import get_skill_taxonomy, normalize_skill_key
+from tracing import trace_span
+from memo import input_hash, session_memo
 
 # Streamlit UI
 #st.set_page_config(layout="wide")
@@ -18,19 +33,76 @@ import json
 #uploaded_file = st.file_uploader("Upload your CV (PDF only)", type=["pdf"])
 
 # Extract text from PDF
-def extract_text_from_pdf(uploaded_file):
-    text = ""
-    reader = PdfReader(uploaded_file)
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text
+# The text is memoized per browser session by run_cv_analysis (session_memo),
+# keyed by a SHA-256 hash of the file content, so reruns and re-uploads of the
+# same CV don't re-parse it and no CV text outlives the session.
+# Size, page and time caps keep huge or malicious PDFs from stalling a worker.
+# Long documents are split into page ranges extracted by worker processes,
+# which are terminated when the time budget runs out. Short documents are
+# read page by page in the calling thread; there the budget is checked
+# between pages, so a single pathological page is bounded only by the size
+# cap, not by the budget.
+MAX_PDF_BYTES = int(float(os.getenv("SKILL_MATCHER_MAX_PDF_MB", 20)) * 1024 * 1024)
+MAX_PDF_PAGES = int(os.getenv("SKILL_MATCHER_MAX_PDF_PAGES", 50))
+PDF_TIME_BUDGET = float(os.getenv("SKILL_MATCHER_PDF_TIME_BUDGET", 20))  # Seconds per document
+PARALLEL_MIN_PAGES = int(os.getenv("SKILL_MATCHER_PDF_PARALLEL_PAGES", 16))  # Worker processes from this many pages
+PAGES_PER_WORKER = 8  # Page range handed to each worker process
+
+
+def _read_pdf_bytes(uploaded_file, max_bytes: int) -> bytes:
+    if hasattr(uploaded_file, "getvalue"):
+        data = uploaded_file.getvalue()
+    else:
+        if hasattr(uploaded_file, "seek"):
+            uploaded_file.seek(0)
+        data = uploaded_file.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"PDF is larger than the {max_bytes / (1024 * 1024):g} MB limit.")
+    return data
+
+
+def iter_pdf_pages(data: bytes, start: int = 0, stop: int = MAX_PDF_PAGES):
+    reader = PdfReader(io.BytesIO(data))
+    for i in range(start, min(stop, len(reader.pages))):
+        yield reader.pages[i].extract_text() or ""
+
+
+def _extract_page_range(data: bytes, start: int, stop: int) -> str:
+    return "".join(iter_pdf_pages(data, start, stop))
+
+
+# Raises multiprocessing.TimeoutError after `timeout` seconds; leaving the
+# pool terminates the workers, including one stuck on a page
+def _extract_pages_parallel(data: bytes, page_count: int, timeout: float) -> str:
+    ranges = [(data, start, min(start + PAGES_PER_WORKER, page_count))
+              for start in range(0, page_count, PAGES_PER_WORKER)]
+    with multiprocessing.Pool(min(len(ranges), os.cpu_count() or 1)) as pool:
+        return "".join(pool.starmap_async(_extract_page_range, ranges).get(max(timeout, 0)))
+
+
+# Raises ValueError when the PDF is over a limit and PdfReadError when it is malformed
+def extract_text_from_pdf(uploaded_file, max_pages: int = MAX_PDF_PAGES, max_bytes: int = MAX_PDF_BYTES,
+                          time_budget: float = PDF_TIME_BUDGET, parallel_min_pages: int = PARALLEL_MIN_PAGES):
+    with trace_span("extract_text_from_pdf"):
+        data = _read_pdf_bytes(uploaded_file, max_bytes)
+        deadline = time.monotonic() + time_budget
+        page_count = min(len(PdfReader(io.BytesIO(data)).pages), max_pages)
+        if page_count >= parallel_min_pages:
+            try:
+                return _extract_pages_parallel(data, page_count, deadline - time.monotonic())
+            except multiprocessing.TimeoutError:
+                raise ValueError(f"Reading the PDF took longer than the {time_budget:g} s limit.") from None
+
+        parts = []
+        for page in iter_pdf_pages(data, 0, page_count):
+            parts.append(page)
+            if time.monotonic() > deadline:
+                raise ValueError(f"Reading the PDF took longer than the {time_budget:g} s limit.")
+        return "".join(parts)
 
 # Call OpenAI API to extract structured CV data
-def parse_cv_with_gpt(cv_text, api_key):
-    client = OpenAI(
-        api_key=api_key,
-        base_url="https://anast.ita.chalmers.se:4000"  # Custom endpoint for Chalmers deployment
-    )
+def parse_cv_with_gpt(cv_text, api_key, stream: bool = False, on_event=None):
+    client = get_openai_client(api_key)
     prompt = f"""
     You are an AI that extracts structured information from resumes (CVs). The input will be raw, unstructured text parsed from a PDF or DOCX CV.
 
@@ -71,26 +143,71 @@ def parse_cv_with_gpt(cv_text, api_key):
     """
 
 
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant that extracts structured data from CVs."},
+        {"role": "user", "content": prompt}
+    ]
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.5-preview",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that extracts structured data from CVs."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message.content
+        if not stream:
+            content = cached_chat_completion(
+                client,
+                "parse_cv_with_gpt",
+                messages=messages,
+                validate=require_complete,
+            )
+            return _repair_cv(content, client, messages)
+
+        # Streaming: report sections and skills to on_event as soon as they are complete
+        parser = IncrementalJSONParser(max_depth=2)
+        parts = []
+        for delta in stream_chat_completion(client, "parse_cv_with_gpt", messages=messages, validate=require_complete):
+            parts.append(delta)
+            if on_event is not None and not parser.done:
+                try:
+                    for path, value in parser.feed(delta):
+                        on_event(path, value)
+                except ValueError:
+                    parser.done = True  # Malformed JSON: keep collecting the raw text
+        return _repair_cv("".join(parts), client, messages)
     except Exception as e:
         return f"Error calling OpenAI API: {e}"
 
+
+# A truncated parse keeps the sections it got; the missing ones (and the last,
+# possibly cut short) are requested in one follow-up call. Returns clean JSON,
+# or the raw text when nothing could be recovered.
+def _repair_cv(content: str, client, messages: list[dict]) -> str:
+    try:
+        data, missing = decode_cv(content)
+    except ValueError:
+        return content
+    if missing:
+        followup = messages + [{"role": "user", "content": (
+            f"Return only a JSON object with the keys {json.dumps(missing)}, filled in as described above. "
+            "Return only valid JSON — no markdown code blocks, no triple backticks, and no text outside the JSON."
+        )}]
+        try:
+            sections = require_complete(cached_chat_completion(
+                client, "parse_cv_with_gpt", messages=followup, validate=require_complete))
+            if isinstance(sections, dict):
+                data.update({key: value for key, value in sections.items() if key in missing})
+        except Exception:
+            pass  # Show what was recovered rather than nothing
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
 # Render a friendly UI view of extracted info
 def render_structured_output(json_text):
     try:
-        data = json.loads(json_text)
+        data, status = session_memo("parsed_json", maxsize=4).get_or_compute(json_text, lambda: decode_json(json_text))
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
     except Exception as e:
         st.error("⚠️ Could not parse AI response as JSON. Showing raw response:")
         st.code(json_text, language="json")
         return
+    if status == PARTIAL:
+        st.warning("⚠️ The AI response was cut short; showing the parts that could be recovered.")
 
     col1, = st.columns([1])
 
@@ -102,11 +219,41 @@ def render_structured_output(json_text):
         return skills
 
 
-def standardize_skills(skills: list[str], api_key: str) -> list[str]:
-    client = OpenAI(
-        api_key=api_key,
-        base_url="https://anast.ita.chalmers.se:4000"
-    )
+# Live view for streamed parsing: shows completed sections and skills while
+# the completion is still arriving. Returns the on_event callback and the
+# placeholder to clear once the full output is rendered.
+def render_structured_output_live():
+    placeholder = st.empty()
+    sections, skills = [], []
+
+    def on_event(path, value):
+        if len(path) == 2 and path[0] == "programming_languages_and_technical_skills" and isinstance(value, str):
+            skills.append(value)
+        elif len(path) == 1 and path[0] not in sections:
+            sections.append(path[0])
+        else:
+            return
+        with placeholder.container():
+            st.subheader("🧠 Skills")
+            if skills:
+                st.code(", ".join(skills))
+            if sections:
+                st.caption("✅ Parsed: " + ", ".join(s.replace("_", " ") for s in sections))
+
+    return on_event, placeholder
+
+
+# Skills found in the local taxonomy are canonicalized without a GPT call;
+# only the misses are sent to the endpoint. Skills a truncated answer did not
+# reach are sent once more.
+def standardize_skill_mapping(skills: list[str], api_key: str, repair: bool = True) -> dict[str, str]:
+    taxonomy = get_skill_taxonomy()
+    known, unknown = taxonomy.split_known(skills)
+    mapping = {skill: label.lower() for skill, label in known.items()}
+    if not unknown:
+        return mapping
+
+    client = get_openai_client(api_key)
 
     prompt = f"""
     Normalize and expand the following list of technical skills. For each skill:
@@ -116,27 +263,53 @@ def standardize_skills(skills: list[str], api_key: str) -> list[str]:
     - Do not separate multi-word skills into individual words (e.g., "CI/CD" should remain as "CI/CD" or "Continuous Integration / Continuous Deployment")
 
     Skills:
-    {skills}
+    {json.dumps(unknown, ensure_ascii=False)}
 
-    Return the result as a JSON list of clean skill names, no duplicates.
+    Return the result as a JSON dictionary mapping each input skill to its clean skill name.
     Return only valid JSON — no markdown code blocks, no triple backticks, and no text outside the JSON.
     """
 
+    content = cached_chat_completion(
+        client,
+        "standardize_skills",
+        messages=[{"role": "user", "content": prompt}],
+        validate=require_complete,
+    )
+    normalized, missing = decode_skill_mapping(content, unknown, "standardize_skills")
+    if missing and repair:
+        mapping.update(standardize_skill_mapping(missing, api_key, repair=False))
+        unknown = [skill for skill in unknown if skill not in mapping]
+
+    # A GPT name that lands on a label we already know confirms the raw skill
+    # as an alias of that label.
+    confirmed = {}
+    for skill in unknown:
+        name = normalized.get(skill)
+        if not isinstance(name, str) or not name.strip():
+            mapping[skill] = skill.strip().lower()
+            continue
+        label = taxonomy.lookup(name, fuzzy=False)
+        if label is not None:
+            confirmed[skill] = label
+        mapping[skill] = (label or name.strip()).lower()
+    taxonomy.add_mappings(confirmed)
+    return {skill: mapping[skill] for skill in skills}
+
+
+def standardize_skills(skills: list[str], api_key: str) -> list[str]:
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.5-preview",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return json.loads(response.choices[0].message.content)
+        return list(dict.fromkeys(standardize_skill_mapping(skills, api_key).values()))
     except Exception as e:
         return [f"Error: {e}"]
 
 
-def match_skills_to_esco_specific(skills: list[str], api_key: str) -> dict:
-    client = OpenAI(
-        api_key=api_key,
-        base_url="https://anast.ita.chalmers.se:4000"
-    )
+def match_skills_to_esco_specific(skills: list[str], api_key: str, repair: bool = True) -> dict:
+    taxonomy = get_skill_taxonomy()
+    known, unknown = taxonomy.split_known(skills)
+    if not unknown:
+        return known
+
+    client = get_openai_client(api_key)
 
     prompt = f"""
     You are a skill normalization assistant aligned with the ESCO and O*NET databases.
@@ -152,20 +325,139 @@ def match_skills_to_esco_specific(skills: list[str], api_key: str) -> dict:
     - If no match exists, return the **skill label** as it appears in the input.
 
     Input skills:
-    {json.dumps(skills)}
+    {json.dumps(unknown)}
 
     Return only a JSON dictionary mapping each input skill to its best standardized equivalent.
     Return only valid JSON — no markdown code blocks, no triple backticks, and no text outside the JSON.
     """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.5-preview",
-            messages=[{"role": "user", "content": prompt}]
+        content = cached_chat_completion(
+            client,
+            "match_skills_to_esco_specific",
+            messages=[{"role": "user", "content": prompt}],
+            validate=require_complete,
         )
-        return json.loads(response.choices[0].message.content)
+        matches, missing = decode_skill_mapping(content, unknown, "match_skills_to_esco_specific")
     except Exception as e:
         return {"error": str(e)}
+    if missing and repair:
+        rest = match_skills_to_esco_specific(missing, api_key, repair=False)
+        if "error" not in rest:
+            matches.update(rest)
+
+    # As in standardize_skill_mapping, only answers that land on a label we
+    # already know are learned; "no match" echoes and new names are not shared
+    learned = {}
+    for skill in set(unknown):
+        label = taxonomy.lookup(matches[skill], fuzzy=False) if skill in matches else None
+        if label is not None:
+            learned[skill] = label
+    taxonomy.add_mappings(learned)
+    return {skill: known.get(skill) or learned.get(skill) or matches.get(skill, skill) for skill in skills}
+
+# --- Fused CV analysis ---
+# One schema-constrained call returns the parsed CV sections together with a
+# validity flag, canonical name and ESCO/O*NET label for every skill, instead
+# of the parse -> validate -> standardize -> ESCO chain of round trips.
+# Returns None when the endpoint rejects the schema or the output does not
+# validate, so callers can fall back to the multi-step chain.
+def _object(properties: dict) -> dict:
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+
+def _array(items: dict) -> dict:
+    return {"type": "array", "items": items}
+
+
+_STRING = {"type": "string"}
+
+FUSED_CV_SCHEMA = _object({
+    "cv": _object({
+        "work_experience": _array(_object({
+            "job_title": _STRING, "organization": _STRING, "period": _STRING, "responsibilities": _array(_STRING),
+        })),
+        "education": _array(_object({"degree": _STRING, "university": _STRING, "graduation_year": _STRING})),
+        "programming_languages_and_technical_skills": _array(_STRING),
+        "projects": _array(_object({"name": _STRING, "technologies_used": _array(_STRING), "outcomes": _STRING})),
+        "certifications_and_languages": _object({
+            "certifications": _array(_object({"name": _STRING, "institution": _STRING, "year": _STRING})),
+            "languages_spoken": _array(_object({"language": _STRING, "proficiency": _STRING})),
+        }),
+    }),
+    "skills": _array(_object({
+        "name": _STRING, "is_valid_skill": {"type": "boolean"}, "canonical_name": _STRING, "esco_label": _STRING,
+    })),
+})
+
+
+def validate_fused_cv(content: str) -> dict:
+    data = json.loads(content)
+    cv = data.get("cv") if isinstance(data, dict) else None
+    if not isinstance(cv, dict):
+        raise ValueError("missing 'cv' object")
+    for section in FUSED_CV_SCHEMA["properties"]["cv"]["required"]:
+        if section not in cv:
+            raise ValueError(f"missing CV section '{section}'")
+    skills = data.get("skills")
+    if not isinstance(skills, list):
+        raise ValueError("missing 'skills' list")
+    for skill in skills:
+        if not isinstance(skill, dict) or not all(isinstance(skill.get(k), str) and skill[k].strip()
+                                                  for k in ("name", "canonical_name", "esco_label")):
+            raise ValueError(f"malformed skill entry: {skill!r}")
+    return data
+
+
+def analyze_cv_fused(cv_text: str, api_key: str) -> dict | None:
+    client = get_openai_client(api_key)
+    prompt = f"""
+    You are an AI that extracts structured information from resumes (CVs) and normalizes the skills in them.
+    The input is raw, unstructured text parsed from a PDF CV.
+
+    Fill "cv" with the work experience, education, technical skills, projects, certifications and spoken
+    languages found in the CV. Use an empty string or an empty list when something is not mentioned.
+
+    Fill "skills" with one entry per item in "programming_languages_and_technical_skills":
+    - "name": the skill exactly as listed
+    - "is_valid_skill": false if it is not a real skill, technology, tool or programming concept
+    - "canonical_name": the canonical, full-length, lowercase name (expand abbreviations, e.g. JS → javascript;
+      keep multi-word skills such as CI/CD together)
+    - "esco_label": the most specific matching skill label as it appears in ESCO or O*NET, without verbs or
+      modifiers (e.g. "Java", not "use Java"); the canonical name if there is no match
+
+    CV TEXT:
+    {cv_text}
+    """
+    try:
+        content = cached_chat_completion(
+            client,
+            "analyze_cv_fused",
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant that extracts structured data from CVs."},
+                {"role": "user", "content": prompt},
+            ],
+            validate=validate_fused_cv,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "cv_analysis", "strict": True, "schema": FUSED_CV_SCHEMA},
+            },
+        )
+        data = validate_fused_cv(content)
+    except Exception:
+        return None
+
+    # The local taxonomy wins over the model, so names match the multi-step chain
+    taxonomy = get_skill_taxonomy()
+    esco = {}
+    for skill in data["skills"]:
+        if not skill.get("is_valid_skill", True):
+            continue
+        label = taxonomy.lookup(skill["name"]) or taxonomy.lookup(skill["canonical_name"])
+        canonical = (label or skill["canonical_name"]).lower()
+        esco.setdefault(canonical, label or skill["esco_label"])
+    return {"parsed_result": json.dumps(data["cv"], ensure_ascii=False, indent=2), "skills": esco}
+
 
 # Render combined skill output
 def render_skills_view(skills):
@@ -178,7 +470,7 @@ def render_skills_view(skills):
 
 # This function uses the OpenAI API to suggest skills based on a user-provided description
 def suggest_skills_from_description(description: str, api_key: str) -> list[str]:
-    client = OpenAI(api_key=api_key, base_url="https://anast.ita.chalmers.se:4000")
+    client = get_openai_client(api_key)
 
     prompt = f"""
     The user will describe what they do in a natural, human way (e.g. 'I work on cloud infrastructure, mostly with AWS and CI/CD').
@@ -200,17 +492,25 @@ def suggest_skills_from_description(description: str, api_key: str) -> list[str]
     """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.5-preview",
-            messages=[{"role": "user", "content": prompt}]
+        content = cached_chat_completion(
+            client,
+            "suggest_skills_from_description",
+            messages=[{"role": "user", "content": prompt}],
+            validate=json.loads,
         )
-        return json.loads(response.choices[0].message.content)
+        return json.loads(content)
     except Exception as e:
         return [f"Error: {e}"]
 
-# Validate skills using GPT-4 to ensure they are real and relevant
+# Validate skills to ensure they are real and relevant. Known skills and
+# obvious junk are decided locally; only the ambiguous rest is sent to GPT.
 def validate_skills_with_gpt(skills: list[str], api_key: str) -> list[str]:
-    client = OpenAI(api_key=api_key, base_url="https://anast.ita.chalmers.se:4000")
+    verdicts = {skill: classify_skill(skill) for skill in skills}
+    ambiguous = [skill for skill, verdict in verdicts.items() if verdict is None]
+    if not ambiguous:
+        return [skill for skill in skills if verdicts[skill]]
+
+    client = get_openai_client(api_key)
 
     prompt = f"""
     Given the following list of items, return only those that are valid skills, technologies, tools, or programming concepts.
@@ -220,32 +520,156 @@ def validate_skills_with_gpt(skills: list[str], api_key: str) -> list[str]:
     - Accept valid but niche names like 'CATIA', 'SAS', 'Blender'.
 
     Input:
-    {json.dumps(skills)}
+    {json.dumps(ambiguous)}
 
     Return only valid JSON — no markdown code blocks, no triple backticks, and no text outside the JSON.
     """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.5-preview",
-            messages=[{"role": "user", "content": prompt}]
+        content = cached_chat_completion(
+            client,
+            "validate_skills_with_gpt",
+            messages=[{"role": "user", "content": prompt}],
+            validate=json.loads,
         )
-        return json.loads(response.choices[0].message.content)
+        confirmed = {normalize_skill_key(s) for s in json.loads(content) if isinstance(s, str)}
     except Exception as e:
         return [f"Error validating skills: {e}"]
+    return [skill for skill in skills if verdicts[skill] or normalize_skill_key(skill) in confirmed]
 
 # Main logic
-def run_cv_analysis(uploaded_file, api_key):
+def _without_errors(skills) -> bool:
+    return not any(isinstance(s, str) and s.startswith("Error") for s in skills)
+
+
+# Standardization and ESCO matching of a skill list, memoized per session so
+# pressing the button again with unchanged skills makes no calls
+def _standardize_and_match(skills: list[str], api_key: str) -> tuple[list[str], dict]:
+    def compute():
+        standardized = standardize_skills(skills, api_key)
+        return standardized, match_skills_to_esco_specific(standardized, api_key)
+
+    return session_memo("standardized_skills").get_or_compute(
+        input_hash(skills), compute,
+        cache_if=lambda result: _without_errors(result[0]) and "error" not in result[1])
+
+
+# --- Speculative parsing ---
+# With prefetch enabled, parsing and skill normalization start in a background
+# worker as soon as a CV is uploaded. The per-session future is awaited when
+# the user clicks the analyze button, and the results are put into the same
+# session memos the normal path uses. A new upload cancels the previous one;
+# a call already in flight finishes, but the stages after it are skipped.
+PREFETCH_WORKERS = int(os.getenv("SKILL_MATCHER_PREFETCH_WORKERS", 4))
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="cv-prefetch")
+
+
+def _prefetch_cv(raw_text: str, api_key: str, fused: bool, cancelled: threading.Event) -> dict | None:
+    fused_result = analyze_cv_fused(raw_text, api_key) if fused else None
+    if fused_result is not None:
+        return {"parsed_result": fused_result["parsed_result"], "fused_skills": fused_result["skills"], "normalized": None}
+    if cancelled.is_set():
+        return None
+
+    result = parse_cv_with_gpt(raw_text, api_key)
+    prefetched = {"parsed_result": result, "fused_skills": None, "normalized": None}
+    try:
+        skills = json.loads(result).get("programming_languages_and_technical_skills", [])
+    except Exception:
+        return prefetched
+    if skills and not cancelled.is_set():
+        standardized = standardize_skills(skills, api_key)
+        if not cancelled.is_set():
+            prefetched["normalized"] = (skills, standardized, match_skills_to_esco_specific(standardized, api_key))
+    return prefetched
+
+
+def start_cv_prefetch(file_key: str, raw_text: str, api_key: str, fused: bool = False):
+    key = (file_key, fused)
+    current = st.session_state.get("cv_prefetch")
+    if current is not None and current["key"] == key:
+        return
+    cancel_cv_prefetch()
+    cancelled = threading.Event()
+    # Run in a copy of the session's context so the work is traced under its session
+    future = _prefetch_pool.submit(contextvars.copy_context().run, _prefetch_cv, raw_text, api_key, fused, cancelled)
+    st.session_state["cv_prefetch"] = {"key": key, "future": future, "cancelled": cancelled}
+
+
+def cancel_cv_prefetch():
+    current = st.session_state.pop("cv_prefetch", None)
+    if current is not None:
+        current["cancelled"].set()
+        current["future"].cancel()
+
+
+def await_cv_prefetch(file_key: str, fused: bool = False) -> dict | None:
+    current = st.session_state.get("cv_prefetch")
+    if current is None or current["key"] != (file_key, fused):
+        return None
+    try:
+        return current["future"].result()
+    except Exception:
+        return None
+
+
+def run_cv_analysis(uploaded_file, api_key, stream: bool = False, fused: bool = False, prefetch: bool = False):
     if uploaded_file and api_key:
         with st.spinner("🔍 Extracting text from CV..."):
-            raw_text = extract_text_from_pdf(uploaded_file)
+            try:
+                # Reruns and re-uploads of the same file reuse the text; keyed by content, not file name
+                file_key = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+                raw_text = session_memo("cv_text", maxsize=4).get_or_compute(
+                    file_key, lambda: extract_text_from_pdf(uploaded_file))
+            except ValueError as e:
+                st.error(f"⚠️ {e}")
+                return
+            except PdfReadError as e:
+                st.error(f"⚠️ Could not read the PDF: {e}")
+                return
+
+        parse_memo = session_memo("cv_parse", maxsize=4)
+        parse_key = input_hash(raw_text, fused)
+        if prefetch and parse_key not in parse_memo:
+            start_cv_prefetch(file_key, raw_text, api_key, fused)
 
         st.subheader("📝 Extracted Raw Text")
         st.text_area("Preview", raw_text, height=300)
 
         if st.button("Analyze CV with GPT-4"):
             with st.spinner("🤖 Contacting OpenAI API for structured parsing..."):
-                result = parse_cv_with_gpt(raw_text, api_key)
+                st.session_state.pop("fused_cv_skills", None)
+                prefetched = await_cv_prefetch(file_key, fused) if prefetch else None
+                if prefetched is not None and not prefetched["parsed_result"].startswith("Error calling OpenAI API"):
+                    parse_memo.put(parse_key, (prefetched["parsed_result"], prefetched["fused_skills"]))
+                    if prefetched["normalized"] is not None:
+                        skills, standardized, matches = prefetched["normalized"]
+                        if _without_errors(standardized) and "error" not in matches:
+                            session_memo("standardized_skills").put(input_hash(skills), (standardized, matches))
+
+                cached = parse_memo.get(parse_key)
+                fused_result = None
+                if cached is not None:
+                    result, fused_skills = cached
+                    if fused_skills is not None:
+                        st.session_state["fused_cv_skills"] = fused_skills
+                else:
+                    fused_result = analyze_cv_fused(raw_text, api_key) if fused else None
+                    if fused and fused_result is None:
+                        st.info("ℹ️ Single-call analysis was not available, using the step-by-step analysis instead.")
+
+                    if fused_result is not None:
+                        result = fused_result["parsed_result"]
+                        st.session_state["fused_cv_skills"] = fused_result["skills"]
+                    elif stream:
+                        on_event, live_view = render_structured_output_live()
+                        result = parse_cv_with_gpt(raw_text, api_key, stream=True, on_event=on_event)
+                        live_view.empty()
+                    else:
+                        result = parse_cv_with_gpt(raw_text, api_key)
+                    if not result.startswith("Error calling OpenAI API"):
+                        parse_memo.put(parse_key, (result, fused_result["skills"] if fused_result else None))
                 st.session_state["parsed_result"] = result
 
     if "parsed_result" in st.session_state:
@@ -264,7 +688,9 @@ def run_cv_analysis(uploaded_file, api_key):
 
         if st.button("📝 Suggest Skills from My Description"):
             with st.spinner("🤖 Thinking..."):
-                suggested_skills = suggest_skills_from_description(user_description, api_key)
+                suggested_skills = session_memo("suggested_skills").get_or_compute(
+                    user_description, lambda: suggest_skills_from_description(user_description, api_key),
+                    cache_if=_without_errors)
                 st.session_state["suggested_skills"] = suggested_skills
 
                 if suggested_skills:
@@ -276,12 +702,18 @@ def run_cv_analysis(uploaded_file, api_key):
         
         if st.button("✅ Normalize and Combine All Skills"):
             with st.spinner("🤖 Normalizing and Combining skills with OpenAI API..."):
+                fused_skills = st.session_state.get("fused_cv_skills")
                 if manual_skills:
                     additional_skills = [s.strip() for s in manual_skills.split(",") if s.strip()]
                 else:
                     additional_skills = []
                 
-                valid_skills = validate_skills_with_gpt(additional_skills, api_key)
+                if additional_skills or fused_skills is None:
+                    valid_skills = session_memo("validated_skills").get_or_compute(
+                        input_hash(additional_skills), lambda: validate_skills_with_gpt(additional_skills, api_key),
+                        cache_if=_without_errors)
+                else:
+                    valid_skills = []
                 invalid_skills = list(set(additional_skills) - set(valid_skills))
                 
                 if invalid_skills:
@@ -292,15 +724,30 @@ def run_cv_analysis(uploaded_file, api_key):
                 else:
                     st.warning("No valid skills were added, but we will still proceed using the CV-only skills.")
                     
-                if "extracted_skills" in st.session_state:
+                if fused_skills is not None:
+                    # CV skills were already validated, standardized and matched in the fused call
+                    skill_matches = dict(fused_skills)
+                    if valid_skills:
+                        added = _standardize_and_match(valid_skills, api_key)[1]
+                        if "error" not in added:
+                            skill_matches.update(added)
+                    standardized_skills = list(skill_matches)
+                    st.subheader("🔍 Standardized Skills")
+                    st.code(standardized_skills, language="json")
+                    st.subheader("📚 ESCO/O*NET Skill Matches")
+                    st.code(skill_matches, language="json")
+
+                    st.session_state["cv_skills"] = skill_matches
+                    render_skills_view(skill_matches)
+
+                elif "extracted_skills" in st.session_state:
                     extracted_skills = st.session_state.get("extracted_skills", [])
                     combined_skills = extracted_skills + valid_skills
 
-                    standardized_skills = standardize_skills(combined_skills, api_key)
+                    standardized_skills, skill_matches = _standardize_and_match(combined_skills, api_key)
                     st.subheader("🔍 Standardized Skills")
                     st.code(standardized_skills, language="json")
 
-                    skill_matches = match_skills_to_esco_specific(standardized_skills, api_key)
                     st.subheader("📚 ESCO/O*NET Skill Matches")
                     st.code(skill_matches, language="json")
 
@@ -0,0 +1,281 @@
+# Local stand-ins for the OpenAI-compatible endpoint and TheirStack
+#
+# Used by benchmark.py to run the pipelines without live endpoints or paid
+# credits. The LLM server answers /chat/completions (plain and streamed) with
+# templated JSON that matches what each GPT helper asks for, recognised from
+# the prompt text. The TheirStack server answers /v1/jobs/search with
+# generated Swedish-market job ads. Both are deterministic for a given seed
+# and add configurable latency and jitter.
+#
+#   llm = FakeLLMServer(latency=0.4, jitter=0.1).start()
+#   os.environ["OPENAI_BASE_URL"] = llm.url
+
+import abc
+import ast
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prompt_compaction import estimate_tokens
+
+SKILL_VOCABULARY = [
+    "Python", "Java", "JavaScript", "TypeScript", "C#", "Go", "SQL", "PostgreSQL", "MongoDB", "React",
+    "Angular", "Node.js", "Docker", "Kubernetes", "AWS", "Azure", "GCP", "Terraform", "Git", "CI/CD",
+    "Linux", "REST", "GraphQL", "Kafka", "Spark", "Pandas", "Machine Learning", "Agile", "Scrum",
+    "Communication", "Problem Solving", "Teamwork",
+]
+SKILL_ALIASES = {"JS": "JavaScript", "K8s": "Kubernetes", "Postgres": "PostgreSQL", "Py": "Python"}
+
+
+def _skills_in(text: str) -> list[str]:
+    found = []
+    for skill in SKILL_VOCABULARY + list(SKILL_ALIASES):
+        if re.search(r"(?<![\w#+.])" + re.escape(skill) + r"(?![\w#+])", text, re.IGNORECASE):
+            found.append(skill)
+    return found
+
+
+def _json_after(prompt: str, marker: str):
+    start = prompt.find(marker)
+    if start < 0:
+        return None
+    text = prompt[start + len(marker):].lstrip()
+    try:
+        return json.JSONDecoder().raw_decode(text)[0]
+    except ValueError:
+        try:
+            return ast.literal_eval(text.split("\n", 1)[0].strip())  # Python list repr in the prompt
+        except (ValueError, SyntaxError):
+            return None
+
+
+def _fake_cv(cv_text: str) -> dict:
+    return {
+        "work_experience": [{"job_title": "Software Developer", "organization": "Example AB",
+                             "period": "2020-2024", "responsibilities": ["Built services"]}],
+        "education": [{"degree": "MSc Computer Science", "university": "Chalmers", "graduation_year": "2020"}],
+        "programming_languages_and_technical_skills": _skills_in(cv_text),
+        "projects": [],
+        "certifications_and_languages": {"certifications": [], "languages_spoken": [
+            {"language": "Swedish", "proficiency": "Native"}]},
+    }
+
+
+def fake_completion(prompt: str) -> str:
+    if "normalizes the skills in them" in prompt:
+        cv = _fake_cv(prompt.split("CV TEXT:", 1)[-1])
+        skills = [{"name": s, "is_valid_skill": True, "canonical_name": SKILL_ALIASES.get(s, s).lower(),
+                   "esco_label": SKILL_ALIASES.get(s, s)} for s in cv["programming_languages_and_technical_skills"]]
+        return json.dumps({"cv": cv, "skills": skills})
+    if "extracts structured information from resumes" in prompt:
+        return json.dumps(_fake_cv(prompt.split("CV TEXT:", 1)[-1]))
+    if "analyzing job advertisements" in prompt:
+        descriptions = _json_after(prompt, "Descriptions:") or []
+        return json.dumps([_skills_in(d) for d in descriptions])
+    if "Normalize and expand" in prompt:
+        skills = _json_after(prompt, "Skills:") or []
+        return json.dumps({s: SKILL_ALIASES.get(s, s).lower() for s in skills})
+    if "ESCO and O*NET databases" in prompt:
+        skills = _json_after(prompt, "Input skills:") or []
+        return json.dumps({s: SKILL_ALIASES.get(s, s) for s in skills})
+    if "into core and optional" in prompt:
+        skills = _json_after(prompt, "Skills:") or []
+        half = (len(skills) + 1) // 2
+        return json.dumps({"core": skills[:half], "optional": skills[half:]})
+    if "real and meaningful job title" in prompt:
+        return "yes"
+    if "USER DESCRIPTION:" in prompt:
+        return json.dumps(_skills_in(prompt.split("USER DESCRIPTION:", 1)[-1]))
+    if "valid skills, technologies, tools" in prompt:
+        return json.dumps(_json_after(prompt, "Input:") or [])
+    return "{}"
+
+
+class _FakeServer(abc.ABC):
+    # throttle_rate: share of requests answered with 429 (Retry-After: 0.1).
+    # `requests` counts every request received, `throttled` the 429s among them.
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0, port: int = 0,
+                 throttle_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.throttled = 0
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def throttle(self, handler) -> bool:
+        with self._lock:
+            if self._rng.random() >= self.throttle_rate:
+                return False
+            self.throttled += 1
+        data = b'{"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}}'
+        handler.send_response(429)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Retry-After", "0.1")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+        return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @abc.abstractmethod
+    def handle(self, handler, body: dict):
+        ...
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real endpoints
+
+            def do_POST(self):
+                with server._lock:
+                    server.requests += 1
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self.send_error(400)
+                    return
+                server.handle(self, body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _send_json(handler, status: int, payload: dict):
+    data = json.dumps(payload).encode("utf-8")
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Content-Length", str(len(data)))
+    handler.end_headers()
+    handler.wfile.write(data)
+
+
+class FakeLLMServer(_FakeServer):
+    # token_latency: seconds per completion token, on top of the request latency
+    def __init__(self, latency: float = 0.3, jitter: float = 0.05, token_latency: float = 0.0,
+                 seed: int = 0, port: int = 0, throttle_rate: float = 0.0):
+        super().__init__(latency, jitter, seed, port, throttle_rate)
+        self.token_latency = token_latency
+
+    def handle(self, handler, body: dict):
+        if not handler.path.rstrip("/").endswith("/chat/completions"):
+            handler.send_error(404)
+            return
+        if self.throttle(handler):
+            return
+        messages = body.get("messages", [])
+        prompt = "\n".join(m.get("content") or "" for m in messages if isinstance(m.get("content"), str))
+        content = fake_completion(prompt)
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(content)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        model = body.get("model", "fake")
+        completion_id = "chatcmpl-" + hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+
+        time.sleep(self.delay())
+        if not body.get("stream"):
+            time.sleep(self.token_latency * usage["completion_tokens"])
+            _send_json(handler, 200, {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)]
+        for piece in pieces:
+            time.sleep(self.token_latency * estimate_tokens(piece))
+            chunk = {**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+        final = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        handler.wfile.write(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            handler.wfile.write(f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n".encode("utf-8"))
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.wfile.flush()
+        handler.close_connection = True
+
+
+def fake_job_ad(keyword: str, index: int) -> dict:
+    rng = random.Random(f"{keyword}:{index}")
+    skills = rng.sample(SKILL_VOCABULARY, 6)
+    company = f"Company {rng.randint(1, 40)} AB"
+    description = "\n".join([
+        f"<h2>{keyword.title()}</h2>",
+        f"<p>We are looking for a {keyword} to join our team in Gothenburg.</p>",
+        "<h3>Requirements:</h3>",
+        "<ul>" + "".join(f"<li>Experience with {s}</li>" for s in skills[:4]) + "</ul>",
+        "<h3>Nice to have:</h3>",
+        "<ul>" + "".join(f"<li>{s}</li>" for s in skills[4:]) + "</ul>",
+        "<h3>We offer:</h3>",
+        "<p>Flexible hours, wellness allowance and a friendly team that values learning and sharing knowledge.</p>",
+    ])
+    return {
+        "id": int(hashlib.sha1(f"{keyword}:{index}".encode("utf-8")).hexdigest()[:12], 16),
+        "job_title": keyword.title(),
+        "company": company,
+        "date_posted": (date.today() - timedelta(days=index % 14)).isoformat(),
+        "description": description,
+    }
+
+
+class FakeTheirStackServer(_FakeServer):
+    def __init__(self, latency: float = 0.2, jitter: float = 0.05, ads_per_title: int = 100,
+                 seed: int = 0, port: int = 0, throttle_rate: float = 0.0):
+        super().__init__(latency, jitter, seed, port, throttle_rate)
+        self.ads_per_title = ads_per_title
+
+    def handle(self, handler, body: dict):
+        if handler.path.rstrip("/") != "/v1/jobs/search":
+            handler.send_error(404)
+            return
+        if self.throttle(handler):
+            return
+        keyword = (body.get("job_title_or") or [""])[0]
+        page, limit = int(body.get("page", 0)), int(body.get("limit", 25))
+        ads = [fake_job_ad(keyword, i) for i in range(self.ads_per_title)]
+        ads.sort(key=lambda ad: ad["date_posted"], reverse=True)
+        if body.get("posted_at_gte"):
+            ads = [ad for ad in ads if ad["date_posted"] >= body["posted_at_gte"]]
+
+        time.sleep(self.delay())
+        _send_json(handler, 200, {"data": ads[page * limit:(page + 1) * limit]})
+
+    @property
+    def search_url(self) -> str:
+        return self.url + "/v1/jobs/search"
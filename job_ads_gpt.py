@@ -1,14 +1,31 @@
 # Skill Core-ness Analyzer: Identifying must-have skills for a profession (via TheirStack)
 
 
-import requests
 import json
 import streamlit as st
 from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import contextvars
 import os
-from openai import OpenAI
-from requests.exceptions import HTTPError
-from cv_gpt_4_parser import standardize_skills
+import queue
+import sys
+import time
+from datetime import date, timedelta
+from requests.exceptions import ConnectionError, HTTPError, Timeout
+from cv_gpt_4_parser import standardize_skill_mapping
+from client_registry import get_openai_client, http_post
+from job_store import get_job_store, normalize_keyword
+from json_stream import IncrementalJSONParser
+from llm_cache import cached_chat_completion, stream_chat_completion
+from json_repair import decode_classification, decode_skill_lists, require_complete
+from local_validators import classify_job_title
+from market_snapshots import get_snapshot_service
+from prompt_compaction import compact_job_ads, estimate_tokens
+from skill_aggregation import SkillAggregator
+from skill_trends import MONTH, WEEK, get_trend_store
+from tracing import record_retries, traced
+from memo import session_memo
+from single_flight import SingleFlight
 
 # --- User input and config ---
 #st.set_page_config(layout="wide")
@@ -18,12 +35,21 @@ from cv_gpt_4_parser import standardize_skills
 #theirstack_key = os.getenv("THEIRSTACK_API_KEY")
 
 #job_title = st.text_input("💼 Enter a job title to analyze", placeholder="e.g. software developer")
-limit = 10  # Number of job ads to fetch
+limit = int(os.getenv("JOB_ADS_LIMIT", 100))  # Number of job ads to analyze
+page_size = 25  # Job ads per TheirStack request
+max_age_days = 15  # Only analyze ads posted in this window
+theirstack_url = os.getenv("THEIRSTACK_URL", "https://api.theirstack.com/v1/jobs/search")
 threshold = 2  # Minimum frequency for skills to be considered relevant
+chunk_token_budget = 6000  # Approximate prompt tokens of job ads per extraction call
+extraction_workers = 4  # Concurrent extraction calls
+extraction_retries = 2  # Extra attempts for chunks that fail
 
 # --- Step 1: Fetch Job Ads from TheirStack ---
-def fetch_theirstack_jobs(keyword: str, limit: int = 10, theirstack_key: str = "") -> list[str]:
-    url = "https://api.theirstack.com/v1/jobs/search"
+# Ads are fetched page by page into the local job store. Only ads newer than
+# the latest stored one are requested, then the analysis reads from the store.
+def iter_theirstack_jobs(keyword: str, theirstack_key: str, posted_after: str | None = None,
+                         page_size: int = page_size, max_jobs: int = limit):
+    url = theirstack_url
     headers = {
         "Accept": "application/json",
         "Content-Type": "application/json",
@@ -31,11 +57,10 @@ def fetch_theirstack_jobs(keyword: str, limit: int = 10, theirstack_key: str = "
     }
     payload = {
         "page": 0,
-        "limit": limit,
+        "limit": page_size,
         "job_title_or": [
             keyword,
         ],
-        "posted_at_max_age_days": 15,
         "blur_company_data": False,
         "order_by": [
             {
@@ -46,44 +71,113 @@ def fetch_theirstack_jobs(keyword: str, limit: int = 10, theirstack_key: str = "
         "job_country_code_or": ["SE"],
         "include_total_results": False,
     }
+    if posted_after:
+        payload["posted_at_gte"] = posted_after
+    else:
+        payload["posted_at_max_age_days"] = max_age_days
 
-    try:
-        resp = requests.post(url, json=payload, headers=headers)
+    # The page size stays fixed so page offsets line up; the last page is cut here
+    fetched = 0
+    while fetched < max_jobs:
+        resp = http_post(url, json=payload, headers=headers)
         resp.raise_for_status()
-        full_json = resp.json()
-        
-        jobs = full_json.get("data", [])
-        descriptions = []
-
-        for job in jobs:
-            description = job.get("description")
-            if isinstance(description, str) and description.strip():
-                descriptions.append(description.strip())
-        
-        return descriptions
+        jobs = resp.json().get("data", [])
+        yield from jobs[:max_jobs - fetched]
+        fetched += len(jobs)
+        if len(jobs) < page_size:
+            break
+        payload["page"] += 1
+
+
+def refresh_job_store(keyword: str, theirstack_key: str, max_jobs: int = limit) -> int:
+    store = get_job_store()
+    added = 0
+    batch = []
+    for job in iter_theirstack_jobs(keyword, theirstack_key, store.latest_date_posted(keyword), max_jobs=max_jobs):
+        batch.append(job)
+        if len(batch) >= page_size:
+            added += store.add_jobs(keyword, batch)
+            batch = []
+    return added + store.add_jobs(keyword, batch)
+
+
+@traced()
+def fetch_theirstack_jobs(keyword: str, limit: int = limit, theirstack_key: str = "") -> list[str]:
+    store = get_job_store()
+    try:
+        refresh_job_store(keyword, theirstack_key, max_jobs=limit)
     except HTTPError as http_err:
-        if resp.status_code == 402:
+        if http_err.response is not None and http_err.response.status_code == 402:
             st.error("🚫 The TheirStack API credits have been exhausted or the free plan has expired.")
         else:
             st.error(f"❌ HTTP error occurred: {http_err}")
-        return None
+        if not store.count(keyword):
+            return None
+        st.warning("Showing results based on previously fetched job ads.")
+    except (ConnectionError, Timeout) as network_err:
+        st.error(f"❌ Could not reach TheirStack: {network_err}")
+        if not store.count(keyword):
+            return None
+        st.warning("Showing results based on previously fetched job ads.")
+
+    return store.descriptions(keyword, limit, max_age_days=max_age_days)
 
 
 
 # --- Step 2: Extract skills using OpenAI ---
-def extract_skills(texts: list[str],  gpt_key: str) -> list[list[str]]:
-    client = OpenAI(
-        api_key=gpt_key,
-        base_url="https://anast.ita.chalmers.se:4000"  # Custom endpoint for Chalmers deployment
-    )
+# Ads are split into token-budgeted chunks that are extracted concurrently.
+# Results are merged back in ad order and only failed chunks are retried.
+def chunk_by_token_budget(texts: list[str], token_budget: int) -> list[list[int]]:
+    chunks, current, used = [], [], 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if current and used + cost > token_budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# Cache validator: only complete answers with one list per ad are cached
+def _parse_chunk_result(content: str, expected: int) -> list[list[str]]:
+    extracted = require_complete(content)
+    if not isinstance(extracted, list) or len(extracted) != expected:
+        raise ValueError(f"expected {expected} skill lists, got {len(extracted) if isinstance(extracted, list) else type(extracted).__name__}")
+    if not all(isinstance(skills, list) for skills in extracted):
+        raise ValueError("expected a list of skill lists")
+    return extracted
+
+
+# A truncated or partly invalid answer keeps the lists it got right; only the
+# ads that are missing are sent again, once.
+def _repair_skill_lists(content: str, texts: list[str], gpt_key: str, on_list=None,
+                        repair: bool = True) -> list[list[str]]:
+    lists, missing = decode_skill_lists(content, len(texts))
+    if missing:
+        if not repair:
+            raise ValueError(f"{len(missing)} of {len(texts)} skill lists missing")
+        redone = _extract_skills_chunk([texts[i] for i in missing], gpt_key, repair=False)
+        for i, skills in zip(missing, redone):
+            lists[i] = skills
+            if on_list is not None:
+                on_list(i, skills)
+    return lists
+
+
+def _extract_skills_chunk(texts: list[str], gpt_key: str, on_list=None, repair: bool = True) -> list[list[str]]:
+    client = get_openai_client(gpt_key)
     prompt = f"""
     You are an AI assistant specialized in analyzing job advertisements.
 
     Your task is to extract relevant **skills, tools, technologies, and job-related competencies** mentioned in the following job descriptions. Focus on specific, actionable skill names (e.g., "Python", "Git", "CI/CD", "Project Management"), not broad categories (e.g., "Software Development").
 
     Return the result as a **JSON list of lists**, where each inner list contains the skills found in one job description.
+    There are {len(texts)} descriptions, so return exactly {len(texts)} inner lists, in the same order.
 
-    Descriptions: {texts} ...
+    Descriptions: {json.dumps(texts, ensure_ascii=False)}
 
     Return format example:
     [
@@ -94,24 +188,91 @@ def extract_skills(texts: list[str],  gpt_key: str) -> list[list[str]]:
 
     Return only valid JSON — no markdown, no triple backticks, no explanation.
     """
-    response = client.chat.completions.create(
-        model="gpt-4.5-preview",
-        messages=[{"role": "user", "content": prompt}],
-    )
-    try:
-        extracted = json.loads(response.choices[0].message.content)
-        return extracted
-    except Exception as e:
-        st.error(f"❌ Failed to parse skills: {e}")
-        return []
+    messages = [{"role": "user", "content": prompt}]
+    validate = lambda c: _parse_chunk_result(c, len(texts))
+
+    if on_list is None:
+        content = cached_chat_completion(
+            client,
+            "extract_skills",
+            messages=messages,
+            validate=validate,
+        )
+        return _repair_skill_lists(content, texts, gpt_key, repair=repair)
+
+    # Streaming: hand over each ad's skill list as soon as it is complete
+    parser = IncrementalJSONParser(max_depth=1)
+    parts = []
+    for delta in stream_chat_completion(client, "extract_skills", messages=messages, validate=validate):
+        parts.append(delta)
+        if not parser.done:
+            try:
+                for path, value in parser.feed(delta):
+                    if len(path) == 1 and path[0] < len(texts) and isinstance(value, list):
+                        on_list(path[0], value)
+            except ValueError:
+                parser.done = True
+    return _repair_skill_lists("".join(parts), texts, gpt_key, on_list, repair)
+
+
+# on_event(ad_index, skills) is called on the caller's thread as ads finish
+# (per streamed ad when stream=True, per chunk otherwise). It can be called
+# again for the same ad if its chunk is retried.
+def extract_skills(texts: list[str],  gpt_key: str, max_workers: int = extraction_workers,
+                   token_budget: int = chunk_token_budget, retries: int = extraction_retries,
+                   stream: bool = False, on_event=None) -> list[list[str]]:
+    chunks = chunk_by_token_budget(texts, token_budget)
+    results: list[list[str] | None] = [None] * len(texts)
+    pending = list(range(len(chunks)))
+    errors = {}
+    events = queue.SimpleQueue()
+
+    def run_chunk(c):
+        indices = chunks[c]
+        on_list = (lambda i, skills: events.put((indices[i], skills))) if stream and on_event else None
+        return _extract_skills_chunk([texts[i] for i in indices], gpt_key, on_list)
+
+    def drain_events():
+        while on_event is not None and not events.empty():
+            on_event(*events.get())
+
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt:
+            record_retries("extract_skills", len(pending))
+        failed = []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as pool:
+            # Workers run in a copy of the caller's context so spans land in its session
+            futures = {pool.submit(contextvars.copy_context().run, run_chunk, c): c for c in pending}
+            not_done = set(futures)
+            while not_done:
+                done, not_done = wait(not_done, timeout=0.1, return_when=FIRST_COMPLETED)
+                drain_events()
+                for future in done:
+                    c = futures[future]
+                    try:
+                        for i, skills in zip(chunks[c], future.result()):
+                            results[i] = skills
+                            if on_event is not None and not stream:
+                                on_event(i, skills)
+                    except Exception as e:
+                        errors[c] = e
+                        failed.append(c)
+            drain_events()
+        pending = sorted(failed)
+
+    if pending:
+        lost = sum(len(chunks[c]) for c in pending)
+        st.error(f"❌ Failed to parse skills for {lost} of {len(texts)} job ads: {errors[pending[0]]}")
+
+    return [skills if skills is not None else [] for skills in results]
 
 
 # --- Step 3: GPT Core Classification ---
-def classify_skills(skills: list[str], gpt_key: str) -> dict[str, list[str]]:
-    client = OpenAI(
-        api_key=gpt_key,
-        base_url="https://anast.ita.chalmers.se:4000"  # Custom endpoint for Chalmers deployment
-    )
+# Skills left unclassified by a truncated answer are classified in one more call
+def classify_skills(skills: list[str], gpt_key: str, repair: bool = True) -> dict[str, list[str]]:
+    client = get_openai_client(gpt_key)
     prompt = f"""
     Classify the following skills into core and optional for a modern {skills} in Sweden.
     - Core = Needed in almost all roles.
@@ -125,19 +286,30 @@ def classify_skills(skills: list[str], gpt_key: str) -> dict[str, list[str]]:
     Return JSON: {{"core": [...], "optional": [...]}}
     Return only valid JSON — no markdown code blocks, no triple backticks, and no text outside the JSON.
     """
-    response = client.chat.completions.create(
-        model="gpt-4.5-preview",
+    content = cached_chat_completion(
+        client,
+        "classify_skills",
         messages=[{"role": "user", "content": prompt}],
-        temperature=0.2
+        temperature=0.2,
+        validate=require_complete,
     )
     try:
-        return json.loads(response.choices[0].message.content)
+        result, missing = decode_classification(content, skills)
     except Exception as e:
         st.error(f"Failed to classify skills: {e}")
         return {"core": [], "optional": []}
+    if missing and repair:
+        rest = classify_skills(missing, gpt_key, repair=False)
+        result["core"] += rest["core"]
+        result["optional"] += rest["optional"]
+    return result
     
+# Clear-cut titles are answered by the local lexicon; only ambiguous ones reach GPT
 def validate_job_title_with_gpt(title: str, api_key: str) -> bool:
-    client = OpenAI(api_key=api_key, base_url="https://anast.ita.chalmers.se:4000")
+    verdict = classify_job_title(title)
+    if verdict is not None:
+        return verdict
+    client = get_openai_client(api_key)
     prompt = f"""
     Decide if the following string is a real and meaningful job title in a professional context. Examples of valid titles include "software engineer", "data analyst", or "project manager".
 
@@ -145,73 +317,188 @@ def validate_job_title_with_gpt(title: str, api_key: str) -> bool:
     Respond with "yes" if valid, otherwise "no".
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.5-preview",
+        content = cached_chat_completion(
+            client,
+            "validate_job_title_with_gpt",
             messages=[{"role": "user", "content": prompt}]
         )
-        return "yes" in response.choices[0].message.content.strip().lower()
+        return "yes" in content.strip().lower()
     except Exception:
         return False
 
-# --- Step 5: Logic ---
-def run_job_analysis(job_title: str, gpt_key: str, theirstack_key: str):
-    #if st.button("🔍 Analyze Job Market for This Role"):
-    if validate_job_title_with_gpt(job_title, gpt_key):
-        if job_title.strip():
-            with st.spinner("🔍 Fetching job ads and analyzing..."):
-                try:
-                    job_ads = fetch_theirstack_jobs(job_title, limit, theirstack_key)
-
-                    if job_ads is not None:
+# --- Step 4: Market analysis ---
+# Concurrent analyses of the same (normalized) title share one computation;
+# only the leader's session sees live extraction progress.
+_analysis_flights = SingleFlight("job_market_analysis")
 
-                        skill_lists = extract_skills(job_ads, gpt_key)
 
-                        flat_skills = [s for sub in skill_lists for s in sub] 
-
-                        counts = Counter(flat_skills)
-
-                        total = sum(counts.values())
-
-                        skill_info = [
-                            {"skill": s, "count": c, "pct": round(c / total * 100, 1)}
-                            for s, c in counts.items() if c >= threshold
-                        ]
-                        skill_info.sort(key=lambda x: x["count"], reverse=True)      
-
-                        skill_names = [s["skill"] for s in skill_info]
-
-                        skill_names = standardize_skills(skill_names, gpt_key)
-
-                        classification = classify_skills(skill_names, gpt_key)
-
-                        def attach_pct(skills_in_category):
-                            return [
-                                {"skill": s, "pct": next((i["pct"] for i in skill_info if i["skill"] == s), 0)}
-                                for s in skills_in_category
-                            ]
+@traced()
+def analyze_job_market(job_title: str, gpt_key: str, theirstack_key: str,
+                       stream: bool = False, on_ad_skills=None) -> dict | None:
+    return _analysis_flights.do(
+        normalize_keyword(job_title),
+        lambda: _analyze_job_market(job_title, gpt_key, theirstack_key, stream, on_ad_skills),
+    )
 
-                        core_skills = attach_pct(classification["core"])
-                        opt_skills = attach_pct(classification["optional"])
 
-                        st.markdown("""
-                        ### ℹ️ How to Interpret the Results
+def _analyze_job_market(job_title: str, gpt_key: str, theirstack_key: str,
+                        stream: bool = False, on_ad_skills=None) -> dict | None:
+    job_ads = fetch_theirstack_jobs(job_title, limit, theirstack_key)
+    if job_ads is None:
+        return None
 
-                        The lists below show **core** and **optional** skills for the role of **_{}_.**  
-                        These were extracted from **recent job postings in Sweden** using AI and matched across multiple employers.
+    # Strip markup, boilerplate, duplicate ads and translations before the LLM sees them
+    job_ads, compaction = compact_job_ads(job_ads)
 
-                        - **Percentage (%)** next to each skill shows how often that skill appeared relative to other skills across the job ads analyzed.
-                        - **Core Skills** are common across most job postings — they're **must-haves** for this profession.
-                        - **Optional Skills** appear less frequently and are often **role- or company-specific**.
-                        """.format(job_title.capitalize()))
+    on_event = (lambda i, skills: on_ad_skills(i, skills, len(job_ads))) if on_ad_skills else None
+    skill_lists = extract_skills(job_ads, gpt_key, stream=stream, on_event=on_event)
 
-                        st.subheader("📈 Core and Must-Have Skills in this Role")
-                        for skill in core_skills:
-                            st.markdown(f"- **{skill['skill']}** ({skill['pct']}%)")
-                            st.session_state["core_skills"] = core_skills
+    # Map every raw skill name to its canonical name first, then count under
+    # the canonical names so spelling variants add up before the threshold
+    raw_skills = list(dict.fromkeys(s for sub in skill_lists for s in sub if isinstance(s, str) and s.strip()))
+    try:
+        canonical = standardize_skill_mapping(raw_skills, gpt_key)
+    except Exception as e:
+        st.warning(f"⚠️ Skill names could not be standardized: {e}")
+        canonical = {}
+
+    aggregator = SkillAggregator(canonical)
+    aggregator.add_ads(job_title, skill_lists)
+    skill_info = aggregator.stats([job_title], min_count=threshold)
+
+    classification = classify_skills([s["skill"] for s in skill_info], gpt_key)
+
+    analysis = {
+        "job_title": job_title,
+        "core": aggregator.attach_stats(classification["core"], skill_info),
+        "optional": aggregator.attach_stats(classification["optional"], skill_info),
+        "ad_count": len(job_ads),
+        "compaction": compaction,
+        "generated_at": time.time(),
+    }
+    # Every analysis feeds the skill demand time series behind the trend view
+    if analysis["core"] or analysis["optional"]:
+        try:
+            get_trend_store().append(analysis)
+        except Exception as e:
+            print(f"Skill trend append failed for '{job_title}': {e}", file=sys.stderr)
+    return analysis
+
+
+def render_job_analysis(job_title: str, analysis: dict):
+    core_skills = analysis["core"]
+    opt_skills = analysis["optional"]
+
+    st.markdown("""
+    ### ℹ️ How to Interpret the Results
+
+    The lists below show **core** and **optional** skills for the role of **_{}_.**  
+    These were extracted from **recent job postings in Sweden** using AI and matched across multiple employers.
+
+    - **% of mentions** next to each skill shows how often that skill appeared relative to other skills across the job ads analyzed.
+    - **% of ads** shows the share of job ads that ask for the skill at all.
+    - **Core Skills** are common across most job postings — they're **must-haves** for this profession.
+    - **Optional Skills** appear less frequently and are often **role- or company-specific**.
+    """.format(job_title.capitalize()))
+
+    compaction = analysis.get("compaction")
+    if compaction and compaction["tokens_before"]:
+        saved_pct = compaction["tokens_saved"] / compaction["tokens_before"] * 100
+        st.caption(
+            f"🧹 Prompt compaction saved {compaction['tokens_saved']:,} tokens ({saved_pct:.0f}%) "
+            f"and removed {compaction['duplicates_removed']} duplicate ads."
+        )
 
-                        st.subheader("🧩 Very Good and Nice-to-Have Skills in this Role but that vary company to company")
-                        for skill in opt_skills:
-                            st.markdown(f"- {skill['skill']} ({skill['pct']}%)")
+    st.subheader("📈 Core and Must-Have Skills in this Role")
+    for skill in core_skills:
+        st.markdown(f"- **{skill['skill']}** ({skill['pct']}% of mentions, {skill.get('ad_pct', 0)}% of ads)")
+        st.session_state["core_skills"] = core_skills
+
+    st.subheader("🧩 Very Good and Nice-to-Have Skills in this Role but that vary company to company")
+    for skill in opt_skills:
+        st.markdown(f"- {skill['skill']} ({skill['pct']}% of mentions, {skill.get('ad_pct', 0)}% of ads)")
+
+
+# Live progress while ads are being extracted: running counts of the top skills
+def render_extraction_progress():
+    placeholder = st.empty()
+    per_ad = {}
+
+    def on_ad_skills(ad_index, skills, total_ads):
+        per_ad[ad_index] = skills
+        counts = Counter(s for ad_skills in per_ad.values() for s in ad_skills)
+        with placeholder.container():
+            st.caption(f"🧩 Skills extracted from {len(per_ad)} of {total_ads} job ads so far")
+            st.markdown(", ".join(f"{skill} ({count})" for skill, count in counts.most_common(15)))
+
+    return on_ad_skills, placeholder
+
+
+# Trend view: reads the weekly/monthly rollups of earlier analyses, no API calls
+def render_skill_trends():
+    store = get_trend_store()
+    if not store.titles:
+        st.info("ℹ️ No analyses recorded yet. Trends appear here once job titles have been analyzed.")
+        return
+
+    title = st.selectbox("💼 Job title", sorted(store.titles, key=str.lower))
+    granularity = st.radio("Period", [WEEK, MONTH], index=1, horizontal=True, format_func=str.capitalize)
+    today = date.today()
+    selected = st.date_input("Date range", (today - timedelta(days=182), today))
+    if len(selected) != 2:
+        return  # The end of the range is still being picked
+    start, end = selected
+
+    skills = st.multiselect("Skills", sorted(store.skills, key=str.lower),
+                            default=store.top_skills(title, granularity, start, end))
+    rows = store.trend(title, skills, granularity, start, end)
+    if not rows:
+        st.caption("No recorded analyses for this title and range.")
+        return
+
+    periods = sorted({row["period"] for row in rows})
+    series = {skill: [None] * len(periods) for skill in dict.fromkeys(row["skill"] for row in rows)}
+    for row in rows:
+        series[row["skill"]][periods.index(row["period"])] = row["ad_pct"]
+    st.caption("% of analyzed job ads that ask for each skill")
+    st.line_chart({"period": periods, **series}, x="period")
+    st.dataframe(rows)
+# --- Step 5: Logic ---
+def run_job_analysis(job_title: str, gpt_key: str, theirstack_key: str, stream: bool = False):
+    #if st.button("🔍 Analyze Job Market for This Role"):
+    # Popular titles are served from precomputed snapshots without any API call
+    snapshot = get_snapshot_service().get(job_title)
+    if snapshot is not None:
+        age_hours = (time.time() - snapshot["generated_at"]) / 3600
+        st.caption(f"⚡ Precomputed market snapshot from {snapshot['ad_count']} job ads, updated {age_hours:.1f} hours ago.")
+        render_job_analysis(job_title, snapshot)
+        return
+
+    # The same title asked again in this session is answered without any work
+    title_key = normalize_keyword(job_title)
+    analyses = session_memo("job_analysis", maxsize=8)
+    analysis = analyses.get(title_key)
+    if analysis is not None:
+        render_job_analysis(job_title, analysis)
+        return
+
+    is_valid_title = session_memo("valid_job_titles", maxsize=64).get_or_compute(
+        title_key, lambda: validate_job_title_with_gpt(job_title, gpt_key), cache_if=bool)
+    if is_valid_title:
+        if job_title.strip():
+            with st.spinner("🔍 Fetching job ads and analyzing..."):
+                try:
+                    if stream:
+                        on_ad_skills, progress = render_extraction_progress()
+                        analysis = analyze_job_market(job_title, gpt_key, theirstack_key,
+                                                      stream=True, on_ad_skills=on_ad_skills)
+                        progress.empty()
+                    else:
+                        analysis = analyze_job_market(job_title, gpt_key, theirstack_key)
+
+                    if analysis is not None:
+                        analyses.put(title_key, analysis)
+                        render_job_analysis(job_title, analysis)
 
                 except Exception as e:
                     st.error(f"Something went wrong: {e}")
@@ -0,0 +1,137 @@
+# Local store of TheirStack job ads
+#
+# Ads are kept in SQLite, deduplicated by TheirStack job id (or a content
+# hash when the id is missing) and linked to the search keywords that found
+# them. fetch_theirstack_jobs only asks TheirStack for ads newer than the
+# latest stored date_posted for a keyword, so repeat analyses run over the
+# accumulated ads with a small delta fetch.
+#
+# Configuration (environment variables):
+#   SKILL_MATCHER_JOB_STORE   path of the SQLite file
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+from llm_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_JOB_STORE_PATH = os.path.join(DEFAULT_CACHE_DIR, "job_ads.sqlite3")
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+def job_key(job: dict) -> str:
+    if job.get("id") is not None:
+        return f"id:{job['id']}"
+    content = (job.get("description") or "").strip()
+    return "sha256:" + hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _text(value) -> str | None:
+    return value if isinstance(value, str) else None
+
+
+class JobAdStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                job_title TEXT,
+                company TEXT,
+                date_posted TEXT,
+                description TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_content ON jobs(content_hash);
+            CREATE TABLE IF NOT EXISTS job_keywords (
+                keyword TEXT NOT NULL,
+                job_key TEXT NOT NULL,
+                PRIMARY KEY (keyword, job_key)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def add_jobs(self, keyword: str, jobs: list[dict]) -> int:
+        keyword = normalize_keyword(keyword)
+        added = 0
+        now = time.time()
+        with self._lock:
+            for job in jobs:
+                description = job.get("description")
+                if not isinstance(description, str) or not description.strip():
+                    continue
+                description = description.strip()
+                content_hash = hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+                # The same ad reposted under a new id is linked to the stored copy
+                row = self._conn.execute("SELECT job_key FROM jobs WHERE content_hash = ?", (content_hash,)).fetchone()
+                key = row[0] if row else job_key(job)
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO jobs (job_key, content_hash, job_title, company, date_posted, description, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, content_hash, _text(job.get("job_title")), _text(job.get("company")),
+                     _text(job.get("date_posted")), description, now),
+                )
+                added += cursor.rowcount
+                self._conn.execute("INSERT OR IGNORE INTO job_keywords (keyword, job_key) VALUES (?, ?)", (keyword, key))
+            self._conn.commit()
+        return added
+
+    def latest_date_posted(self, keyword: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(j.date_posted) FROM jobs j JOIN job_keywords k ON k.job_key = j.job_key WHERE k.keyword = ?",
+                (normalize_keyword(keyword),),
+            ).fetchone()
+        return row[0]
+
+    def descriptions(self, keyword: str, limit: int, max_age_days: int | None = None) -> list[str]:
+        query = (
+            "SELECT description FROM ("
+            "  SELECT j.description, j.date_posted, j.fetched_at FROM jobs j"
+            "  JOIN job_keywords k ON k.job_key = j.job_key"
+            "  WHERE k.keyword = ?"
+        )
+        params = [normalize_keyword(keyword)]
+        if max_age_days is not None:
+            query += " AND j.date_posted >= ?"
+            params.append((date.today() - timedelta(days=max_age_days)).isoformat())
+        # Newest ads win the limit, but they are returned oldest first so that
+        # adding new ads only changes the tail of the list (and of the prompts)
+        query += " ORDER BY j.date_posted DESC, j.fetched_at DESC LIMIT ?) ORDER BY date_posted ASC, fetched_at ASC"
+        params.append(limit)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(query, params)]
+
+    def count(self, keyword: str | None = None) -> int:
+        with self._lock:
+            if keyword is None:
+                return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM job_keywords WHERE keyword = ?", (normalize_keyword(keyword),)
+            ).fetchone()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobAdStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobAdStore(os.getenv("SKILL_MATCHER_JOB_STORE", DEFAULT_JOB_STORE_PATH))
+        return _store
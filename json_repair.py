@@ -0,0 +1,227 @@
+# Tolerant decoding of JSON completions with per-stage partial results
+#
+# Completions are asked to be bare JSON, but sometimes come wrapped in code
+# fences, followed by prose, or cut off at the token limit. decode_json strips
+# fences, ignores text around the value and, for a truncated value, recovers
+# the largest prefix that closes into valid JSON. The stage decoders below
+# check the result against the shape their stage expects and return the valid
+# part together with what is missing, so the GPT helpers re-request only the
+# missing ads, skills or CV sections instead of failing the whole stage.
+#
+# Every stage decode is counted (clean, cleaned, partial, failed, items
+# salvaged and missing) and reported as the "json_repair" metrics source.
+#
+#   value, status = decode_json('```json\n["Python", "Dock')  # (["Python"], "partial")
+
+import json
+import re
+import threading
+from collections import defaultdict
+
+from tracing import register_metrics_source
+
+CLEAN, CLEANED, PARTIAL = "clean", "cleaned", "partial"
+MAX_PREFIX_ATTEMPTS = 32  # Cut points tried, from the end, before giving up on a prefix
+
+CV_SECTIONS = (
+    "work_experience", "education", "programming_languages_and_technical_skills", "projects",
+    "certifications_and_languages",
+)
+
+_FENCE = re.compile(r"```[\w-]*[ \t]*\n?(.*?)(?:```|$)", re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+_decoder = json.JSONDecoder()
+
+
+def strip_fences(text: str) -> str:
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def _prefix_cuts(text: str, start: int) -> tuple[list[tuple[int, str]], bool]:
+    # Offsets where the value so far is complete up to a closed element,
+    # with the closers of the containers still open there, and whether the
+    # text ends inside the value (truncated)
+    cuts, stack = [], []
+    in_string = escape = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                frame = stack[-1]
+                if frame["type"] == "[" or not frame["expect_key"]:
+                    cuts.append((i + 1, "".join(_CLOSERS[f["type"]] for f in reversed(stack))))
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append({"type": ch, "expect_key": ch == "{"})
+            if len(stack) == 1:
+                cuts.append((i + 1, _CLOSERS[ch]))
+        elif ch in "}]":
+            if not stack or _CLOSERS[stack[-1]["type"]] != ch:
+                return cuts, False
+            stack.pop()
+            if not stack:
+                return cuts, False
+            cuts.append((i + 1, "".join(_CLOSERS[f["type"]] for f in reversed(stack))))
+        elif ch == "," and stack:
+            cuts.append((i, "".join(_CLOSERS[f["type"]] for f in reversed(stack))))
+            stack[-1]["expect_key"] = stack[-1]["type"] == "{"
+        elif ch == ":" and stack:
+            stack[-1]["expect_key"] = False
+    return cuts, True
+
+
+def _largest_prefix(text: str, start: int, cuts: list[tuple[int, str]]):
+    for end, closers in reversed(cuts[-MAX_PREFIX_ATTEMPTS:]):
+        try:
+            return json.loads(text[start:end] + closers)
+        except ValueError:
+            continue
+    raise ValueError("no valid JSON prefix")
+
+
+# Returns (value, status): CLEAN when the text was bare JSON, CLEANED when
+# fences or surrounding prose had to be dropped, PARTIAL when only a prefix
+# of a truncated value could be recovered. Raises ValueError otherwise.
+def decode_json(text: str):
+    try:
+        return json.loads(text), CLEAN
+    except (TypeError, ValueError):
+        if not isinstance(text, str):
+            raise ValueError("completion is not text")
+
+    body = strip_fences(text)
+    starts = [m.start() for m in re.finditer(r"[\[{]", body)]
+    if not starts:
+        raise ValueError("no JSON value found")
+    # A bracket in leading prose ("[sic]") is skipped; a value that runs to
+    # the end of the text is truncated and its prefix is recovered
+    for start in starts[:8]:
+        try:
+            return _decoder.raw_decode(body, start)[0], CLEANED
+        except ValueError:
+            pass
+        cuts, truncated = _prefix_cuts(body, start)
+        if truncated:
+            return _largest_prefix(body, start, cuts), PARTIAL
+    raise ValueError("no JSON value found")
+
+
+# Cache validator: accepts fenced or wrapped JSON, rejects truncated output
+def require_complete(text: str):
+    value, status = decode_json(text)
+    if status == PARTIAL:
+        raise ValueError("truncated JSON")
+    return value
+
+
+class _RepairStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = defaultdict(lambda: dict.fromkeys(
+            ("calls", CLEAN, CLEANED, PARTIAL, "failed", "items_salvaged", "items_missing"), 0))
+
+    def record(self, stage: str, outcome: str, salvaged: int = 0, missing: int = 0):
+        with self._lock:
+            stats = self._stages[stage]
+            stats["calls"] += 1
+            stats[outcome] += 1
+            stats["items_salvaged"] += salvaged
+            stats["items_missing"] += missing
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = {stage: dict(stats) for stage, stats in self._stages.items()}
+        for stats in stages.values():
+            stats["repair_rate"] = round((stats[CLEANED] + stats[PARTIAL]) / stats["calls"], 3)
+            # Share of the items in partial outputs that did not have to be requested again
+            items = stats["items_salvaged"] + stats["items_missing"]
+            stats["salvage_rate"] = round(stats["items_salvaged"] / items, 3) if items else None
+        return stages
+
+
+_stats = _RepairStats()
+register_metrics_source("json_repair", _stats.snapshot)
+
+
+def repair_metrics() -> dict:
+    return _stats.snapshot()
+
+
+def _decode(stage: str, text: str, expected_type: type):
+    try:
+        value, status = decode_json(text)
+    except ValueError:
+        _stats.record(stage, "failed")
+        raise
+    if not isinstance(value, expected_type):
+        _stats.record(stage, "failed")
+        raise ValueError(f"expected a JSON {expected_type.__name__}, got {type(value).__name__}")
+    return value, status
+
+
+def _strings(value) -> list[str] | None:
+    return [s for s in value if isinstance(s, str)] if isinstance(value, list) else None
+
+
+def _record(stage: str, status: str, salvaged: int, missing: int):
+    _stats.record(stage, PARTIAL if missing else status, salvaged if missing else 0, missing)
+
+
+# Job-ad extraction: one skill list per ad. Returns the lists (None for ads
+# that are missing, invalid or possibly cut short) and the indices to request
+# again. A complete answer with the wrong number of lists cannot be aligned
+# with the ads and raises, as before.
+def decode_skill_lists(text: str, expected: int, stage: str = "extract_skills"):
+    value, status = _decode(stage, text, list)
+    if len(value) > expected or (len(value) < expected and status != PARTIAL):
+        _stats.record(stage, "failed")
+        raise ValueError(f"expected {expected} skill lists, got {len(value)}")
+    if status == PARTIAL:
+        value = value[:-1]  # The last list may have been cut short
+    lists = [_strings(item) for item in value] + [None] * (expected - len(value))
+    missing = [i for i, skills in enumerate(lists) if skills is None]
+    _record(stage, status, expected - len(missing), len(missing))
+    return lists, missing
+
+
+# Skill -> name mappings (standardization, ESCO matching). Skills absent from
+# a complete answer are left to the caller's fallback; skills absent from a
+# truncated one are returned as missing.
+def decode_skill_mapping(text: str, skills: list[str], stage: str):
+    value, status = _decode(stage, text, dict)
+    mapping = {skill: name for skill, name in value.items() if isinstance(name, str) and name.strip()}
+    missing = [skill for skill in dict.fromkeys(skills) if skill not in mapping] if status == PARTIAL else []
+    _record(stage, status, len(mapping), len(missing))
+    return mapping, missing
+
+
+def decode_classification(text: str, skills: list[str], stage: str = "classify_skills"):
+    value, status = _decode(stage, text, dict)
+    result = {field: _strings(value.get(field)) or [] for field in ("core", "optional")}
+    missing = []
+    if status == PARTIAL:
+        classified = {s.casefold() for s in result["core"] + result["optional"]}
+        missing = [skill for skill in dict.fromkeys(skills) if skill.casefold() not in classified]
+    _record(stage, status, len(result["core"]) + len(result["optional"]), len(missing))
+    return result, missing
+
+
+# Parsed CV: the sections present, and for a truncated answer the sections to
+# request again (absent ones and the last one, which may be cut short)
+def decode_cv(text: str, stage: str = "parse_cv_with_gpt"):
+    data, status = _decode(stage, text, dict)
+    present = [section for section in data if section in CV_SECTIONS]
+    missing = []
+    if status == PARTIAL:
+        missing = [section for section in CV_SECTIONS if section not in data] + present[-1:]
+        present = present[:-1]
+    _record(stage, status, len(present), len(missing))
+    return data, missing
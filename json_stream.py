@@ -0,0 +1,115 @@
+# Incremental JSON parser for streamed LLM completions
+#
+# Feed the completion text chunk by chunk; every value that becomes complete
+# at depth <= max_depth is returned as a (path, value) event as soon as its
+# closing character arrives. For a CV parse this yields each skill in
+# "programming_languages_and_technical_skills" and then the whole section;
+# for job-ad extraction it yields each ad's skill list.
+#
+#   parser = IncrementalJSONParser(max_depth=2)
+#   for delta in deltas:
+#       for path, value in parser.feed(delta):
+#           ...  # e.g. (("programming_languages_and_technical_skills", 3), "Docker")
+
+import json
+
+_CLOSERS = {"}": "{", "]": "["}
+
+
+class IncrementalJSONParser:
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.buffer = ""
+        self.pos = 0
+        self.done = False
+        self.result = None
+
+        # Each open container: type, start offset, element index / current key
+        # and, for objects, whether the next string is a key.
+        self._stack: list[dict] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._string_is_key = False
+        self._primitive_start = None
+        self._root_started = False
+
+    def _path(self) -> tuple:
+        path = []
+        for frame in self._stack:
+            path.append(frame["key"] if frame["type"] == "{" else frame["index"])
+        return tuple(path)
+
+    def _complete(self, start: int, end: int, events: list):
+        path = self._path()
+        if not self._stack:
+            self.done = True
+            self.result = json.loads(self.buffer[start:end])
+            if self.max_depth >= 0:
+                events.append(((), self.result))
+            return
+        if len(path) <= self.max_depth:
+            events.append((path, json.loads(self.buffer[start:end])))
+
+    def _end_primitive(self, end: int, events: list):
+        if self._primitive_start is not None:
+            start, self._primitive_start = self._primitive_start, None
+            self._complete(start, end, events)
+
+    def feed(self, chunk: str) -> list[tuple[tuple, object]]:
+        events = []
+        self.buffer += chunk
+        buffer = self.buffer
+
+        while self.pos < len(buffer) and not self.done:
+            i = self.pos
+            ch = buffer[i]
+            self.pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1]["key"] = json.loads(buffer[self._string_start:i + 1])
+                        self._stack[-1]["expect_key"] = False
+                    else:
+                        self._complete(self._string_start, i + 1, events)
+                continue
+
+            if not self._root_started:
+                # Skip anything (prose, code fences) before the JSON value starts
+                if ch not in "{[":
+                    continue
+                self._root_started = True
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                self._string_is_key = bool(self._stack) and self._stack[-1]["type"] == "{" and self._stack[-1]["expect_key"]
+            elif ch in "{[":
+                self._stack.append({"type": ch, "start": i, "index": 0, "key": None, "expect_key": ch == "{"})
+            elif ch in "}]":
+                self._end_primitive(i, events)
+                if not self._stack or self._stack[-1]["type"] != _CLOSERS[ch]:
+                    raise ValueError(f"Unexpected '{ch}' at offset {i}")
+                frame = self._stack.pop()
+                self._complete(frame["start"], i + 1, events)
+            elif ch == ",":
+                self._end_primitive(i, events)
+                frame = self._stack[-1]
+                if frame["type"] == "[":
+                    frame["index"] += 1
+                else:
+                    frame["expect_key"] = True
+            elif ch == ":":
+                pass
+            elif ch.isspace():
+                self._end_primitive(i, events)
+            elif self._primitive_start is None:
+                self._primitive_start = i
+
+        return events
@@ -0,0 +1,281 @@
+# Persistent response cache shared by every GPT helper
+#
+# Responses are stored on disk in SQLite, keyed by a SHA-256 hash of the
+# model, the messages and the sampling parameters of the request. Identical
+# prompts (same job title, same CV text) are answered from disk instead of the
+# endpoint. Entries expire after a TTL and the least recently used ones are
+# evicted once the entry or size cap is exceeded. Every call is traced under
+# its stage name (wall time, tokens, cache hit), see tracing.py, and goes
+# through the shared "llm" rate limiter with retries, see rate_limiter.py.
+# Identical requests in flight at the same time are coalesced into one call.
+# Unless a caller names a model, the stage's route decides it, see
+# model_routing.py.
+#
+# Configuration (environment variables):
+#   SKILL_MATCHER_CACHE            "0" disables the cache entirely
+#   SKILL_MATCHER_CACHE_DIR        directory holding the SQLite file
+#   SKILL_MATCHER_CACHE_TTL        entry lifetime in seconds (default 7 days)
+#   SKILL_MATCHER_CACHE_MAX_MB     size cap in megabytes (default 256)
+#   SKILL_MATCHER_CACHE_MAX_ENTRIES entry cap (default 20000)
+#   SKILL_MATCHER_CACHE_DISABLE    comma-separated stage names to never cache,
+#                                  e.g. "standardize_skills,validate_skills_with_gpt"
+#   SKILL_MATCHER_CACHE_PRIVATE    "1" also caches the stages in PRIVATE_STAGES on disk
+#
+# Stages whose prompt carries a whole CV or text the user typed
+# (PRIVATE_STAGES) are never written to the disk cache by default; their
+# results live only in the session memos of the callers.
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from model_routing import model_for
+from rate_limiter import call_with_backoff
+from single_flight import SingleFlight
+from tracing import trace_span
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "skill_matcher")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 20000
+
+PRIVATE_STAGES = ("parse_cv_with_gpt", "analyze_cv_fused", "suggest_skills_from_description")
+
+
+def make_cache_key(model: str, messages: list[dict], params: dict) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: str, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                stage TEXT,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: dict, stage: str = "") -> None:
+        encoded = json.dumps(value, ensure_ascii=False)
+        size = len(encoded.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, stage, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, stage, encoded, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        # Expired entries first, then least recently used until under both caps
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        count, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        doomed = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "path": self.path}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_flights = SingleFlight("llm_requests")
+
+
+def cache_enabled() -> bool:
+    return os.getenv("SKILL_MATCHER_CACHE", "1") != "0"
+
+
+def disabled_stages() -> set[str]:
+    raw = os.getenv("SKILL_MATCHER_CACHE_DISABLE", "")
+    stages = {s.strip() for s in raw.split(",") if s.strip()}
+    if os.getenv("SKILL_MATCHER_CACHE_PRIVATE", "0") != "1":
+        stages.update(PRIVATE_STAGES)
+    return stages
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            cache_dir = os.getenv("SKILL_MATCHER_CACHE_DIR", DEFAULT_CACHE_DIR)
+            _cache = ResponseCache(
+                os.path.join(cache_dir, "llm_responses.sqlite3"),
+                ttl_seconds=float(os.getenv("SKILL_MATCHER_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                max_bytes=int(float(os.getenv("SKILL_MATCHER_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 1024 / 1024)) * 1024 * 1024),
+                max_entries=int(os.getenv("SKILL_MATCHER_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            )
+        return _cache
+
+
+def _usage_dict(usage) -> dict:
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+    }
+
+
+def _is_valid(content: str, validate) -> bool:
+    if validate is None:
+        return True
+    try:
+        validate(content)
+        return True
+    except Exception:
+        return False
+
+
+# Single entry point for chat completions. Returns the message content as a
+# string, served from the cache when an identical request was seen before.
+# `validate` (e.g. json.loads) keeps malformed completions out of the cache.
+def cached_chat_completion(client, stage: str, messages: list[dict], model: str | None = None,
+                           use_cache: bool = True, validate=None, **params) -> str:
+    use_cache = use_cache and cache_enabled() and stage not in disabled_stages()
+    model = model or model_for(stage)
+
+    with trace_span(stage) as span:
+        key = make_cache_key(model, messages, params)
+        if use_cache:
+            hit = get_response_cache().get(key)
+            if hit is not None:
+                span["cache_hit"] = True
+                return hit["content"]
+
+        def complete():
+            response = call_with_backoff(
+                "llm",
+                lambda: client.chat.completions.create(model=model, messages=messages, **params),
+                on_retry=lambda: span.update(retries=span["retries"] + 1),
+            )
+            content = response.choices[0].message.content
+            usage = _usage_dict(getattr(response, "usage", None))
+            if use_cache and content and _is_valid(content, validate):
+                get_response_cache().set(key, {"content": content, "usage": usage}, stage=stage)
+            return content, usage
+
+        # Identical requests already in flight (other sessions) share one call
+        (content, usage), shared = _flights.do_shared(key, complete)
+        if shared:
+            span["coalesced"] = True
+        else:
+            span["prompt_tokens"] = usage.get("prompt_tokens") or 0
+            span["completion_tokens"] = usage.get("completion_tokens") or 0
+        return content
+
+
+# Streaming variant: yields text deltas as they arrive. A cache hit is yielded
+# as a single delta; a completed stream is cached like a normal completion.
+# Streams are not coalesced, each consumer gets its own deltas.
+def stream_chat_completion(client, stage: str, messages: list[dict], model: str | None = None,
+                           use_cache: bool = True, validate=None, **params):
+    use_cache = use_cache and cache_enabled() and stage not in disabled_stages()
+    model = model or model_for(stage)
+
+    with trace_span(stage) as span:
+        key = make_cache_key(model, messages, params) if use_cache else None
+        if use_cache:
+            hit = get_response_cache().get(key)
+            if hit is not None:
+                span["cache_hit"] = True
+                yield hit["content"]
+                return
+
+        parts, usage = [], None
+        stream = call_with_backoff(
+            "llm",
+            lambda: client.chat.completions.create(
+                model=model, messages=messages, stream=True, stream_options={"include_usage": True}, **params
+            ),
+            on_retry=lambda: span.update(retries=span["retries"] + 1),
+        )
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+
+        content = "".join(parts)
+        usage = _usage_dict(usage)
+        span["prompt_tokens"] = usage.get("prompt_tokens") or 0
+        span["completion_tokens"] = usage.get("completion_tokens") or 0
+        if use_cache and content and _is_valid(content, validate):
+            get_response_cache().set(key, {"content": content, "usage": usage}, stage=stage)
@@ -0,0 +1,235 @@
+# Local fast-path validators for job titles and skill names
+#
+# Most inputs to the yes/no validation stages are clear-cut: "software
+# developer" is a job title, "Kubernetes" is a skill, "sdfsdf" is neither.
+# These validators answer such cases without a GPT call and return None for
+# the ambiguous rest, which the callers escalate to GPT as before:
+#   - job titles are matched against a bundled lexicon, exactly, by trigram
+#     similarity (typos) or by a known head noun whose modifiers are known
+#     words ("senior cloud developer", "systemutvecklare")
+#   - skills are accepted when the local taxonomy knows them (see
+#     skill_taxonomy.py) or all their words are known vocabulary
+#   - gibberish (no letters, repeated syllables, keyboard runs) is rejected
+#     for both; vowel-less words, long consonant runs and low character
+#     entropy also occur in real input ("pwsh", Swedish compounds such as
+#     "försäljningsstrategi"), so they only send the input on to GPT
+#
+# Configuration (environment variables):
+#   SKILL_MATCHER_JOB_TITLES  job title lexicon ({"titles": [...], "head_nouns": [...]})
+#
+# Usage:
+#   verdict = classify_job_title("Senior Backend Developer")  # True, False or None
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+from skill_taxonomy import _trigrams, get_skill_taxonomy, normalize_skill_key
+from tracing import register_metrics_source
+
+BUNDLED_JOB_TITLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "job_titles.json")
+
+TITLE_FUZZY_THRESHOLD = 0.8  # Minimum trigram Dice similarity for a fuzzy title hit
+MIN_COMPOUND_HEAD = 5  # "systemutvecklare" counts as a title through its head "utvecklare"
+MIN_ENTROPY_LENGTH = 8  # Words shorter than this are too short for a useful entropy
+MIN_ENTROPY_BITS = 1.6
+MAX_CONSONANT_RUN = 5
+
+VOWELS = set("aeiouyåäöéü")
+# Modifiers accepted in front of a head noun besides lexicon and taxonomy words
+TITLE_MODIFIERS = {
+    "senior", "junior", "principal", "staff", "chief", "trainee", "intern", "erfaren", "biträdande",
+    "of", "and", "och", "för", "&",
+}
+KEYBOARD_ROWS = ("qwertyuiopå", "asdfghjklöä", "zxcvbnm", "1234567890")
+
+
+def _words(key: str) -> list[str]:
+    return [w for w in re.split(r"[\s/]+", key) if w]
+
+
+def _entropy(word: str) -> float:
+    counts = Counter(word)
+    return -sum(c / len(word) * math.log2(c / len(word)) for c in counts.values())
+
+
+# True: gibberish, None: suspicious but seen in real words, False: looks fine
+def _is_gibberish_word(word: str, original: str) -> bool | None:
+    letters = re.sub(r"[^a-zåäöéü]", "", word)
+    if len(letters) < 4:
+        return False
+    if re.fullmatch(r"(.{1,3})\1+", letters):
+        return True  # "baba", "sdfsdf", "lolo"
+    if any(letters in row or letters in row[::-1] for row in KEYBOARD_ROWS):
+        return True  # "asdf", "qwerty", "lkjh"
+    if not VOWELS & set(letters) and not original.isupper():
+        return None  # "pwsh"; acronyms (SQL, HTML5) are written in capitals
+    if re.search(rf"[^aeiouyåäöéü]{{{MAX_CONSONANT_RUN + 1},}}", letters):
+        return None  # "projektledningsstrategi"
+    if len(letters) >= MIN_ENTROPY_LENGTH and _entropy(letters) < MIN_ENTROPY_BITS:
+        return None
+    return False
+
+
+# True: gibberish, None: some word looks suspicious (ask GPT), False: no sign of gibberish
+def looks_like_gibberish(text: str) -> bool | None:
+    key = normalize_skill_key(text)
+    if not re.search(r"[^\W\d_]", key):
+        return True
+    originals = re.split(r"[\s/_\-]+", text.strip())
+    words = _words(key)
+    # Words and originals line up unless normalization dropped a word entirely
+    if len(originals) != len(words):
+        originals = words
+    verdicts = [_is_gibberish_word(w, o) for w, o in zip(words, originals)]
+    if True in verdicts:
+        return True
+    return None if None in verdicts else False
+
+
+class JobTitleLexicon:
+    def __init__(self, titles: list[str], head_nouns: list[str]):
+        self.titles = {normalize_skill_key(t) for t in titles if normalize_skill_key(t)}
+        self.head_nouns = {normalize_skill_key(h) for h in head_nouns}
+        self.words = {w for t in self.titles for w in _words(t)} | self.head_nouns
+        self._trigram_index: dict[str, set[str]] = defaultdict(set)
+        self._trigram_counts: dict[str, int] = {}
+        for title in self.titles:
+            grams = _trigrams(title)
+            self._trigram_counts[title] = len(grams)
+            for gram in grams:
+                self._trigram_index[gram].add(title)
+
+    @classmethod
+    def from_file(cls, path: str) -> "JobTitleLexicon":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("titles", []), data.get("head_nouns", []))
+
+    def fuzzy_match(self, key: str) -> str | None:
+        grams = _trigrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for title in self._trigram_index.get(gram, ()):
+                shared[title] += 1
+        best, best_score = None, TITLE_FUZZY_THRESHOLD
+        for title, count in shared.items():
+            score = 2 * count / (len(grams) + self._trigram_counts[title])
+            if score >= best_score:
+                best, best_score = title, score
+        return best
+
+    # Modifier of a head noun: "" for the noun itself, "system" for
+    # "systemutvecklare", None when the word has no head noun
+    def _compound_modifier(self, word: str) -> str | None:
+        if word in self.head_nouns:
+            return ""
+        for head in self.head_nouns:
+            if word.endswith(head) and len(word) > len(head) and len(head) >= MIN_COMPOUND_HEAD:
+                return word[:-len(head)]
+        return None
+
+    def _known_modifier(self, word: str, known: set[str]) -> bool:
+        # Swedish compounds join with an "s": "försäljnings|chef"
+        return any(w in self.words or w in known or w in TITLE_MODIFIERS for w in (word, word.removesuffix("s")))
+
+    # A head noun counts only when every other word ("senior", "cloud") is a
+    # known word; "banana developer" is left to GPT
+    def has_head_noun(self, key: str, known: set[str] = frozenset()) -> bool:
+        words = [w.strip(".-") for w in _words(key)]
+        for i, word in enumerate(words):
+            modifier = self._compound_modifier(word)
+            if modifier is None:
+                continue
+            modifiers = words[:i] + words[i + 1:] + ([modifier] if modifier else [])
+            if all(self._known_modifier(m, known) for m in modifiers if m):
+                return True
+        return False
+
+    def classify(self, title: str, known: set[str] = frozenset()) -> bool | None:
+        key = normalize_skill_key(title)
+        if not key:
+            return False
+        gibberish = looks_like_gibberish(title)
+        if gibberish:
+            return False
+        if key in self.titles:
+            return True
+        if gibberish is None:
+            return None
+        if self.has_head_noun(key, known) or self.fuzzy_match(key) is not None:
+            return True
+        return None
+
+
+_lexicon = None
+_lexicon_lock = threading.Lock()
+
+
+def get_job_title_lexicon() -> JobTitleLexicon:
+    global _lexicon
+    with _lexicon_lock:
+        if _lexicon is None:
+            _lexicon = JobTitleLexicon.from_file(os.getenv("SKILL_MATCHER_JOB_TITLES", BUNDLED_JOB_TITLES_PATH))
+        return _lexicon
+
+
+_outcomes = {name: {"accepted": 0, "rejected": 0, "escalated": 0} for name in ("job_title", "skill")}
+_outcomes_lock = threading.Lock()
+
+
+def _count(name: str, verdict: bool | None) -> bool | None:
+    outcome = "escalated" if verdict is None else "accepted" if verdict else "rejected"
+    with _outcomes_lock:
+        _outcomes[name][outcome] += 1
+    return verdict
+
+
+def validator_metrics() -> dict:
+    with _outcomes_lock:
+        return {name: dict(counts) for name, counts in _outcomes.items()}
+
+
+register_metrics_source("local_validators", validator_metrics)
+
+
+# True: a job title, False: not one, None: ask GPT
+def classify_job_title(title: str) -> bool | None:
+    return _count("job_title", get_job_title_lexicon().classify(title, _known_words()))
+
+
+_known_words_cache: tuple[int, set[str]] = (-1, set())
+
+
+# Words of every taxonomy name and job title, rebuilt when the taxonomy learns new names
+def _known_words() -> set[str]:
+    global _known_words_cache
+    taxonomy = get_skill_taxonomy()
+    size, words = _known_words_cache
+    if size != len(taxonomy._aliases):
+        keys = taxonomy.alias_keys()
+        words = {w for key in keys for w in _words(key) if len(w) >= 3}
+        words |= get_job_title_lexicon().words
+        _known_words_cache = (len(keys), words)
+    return words
+
+
+# True: a skill, False: junk, None: ask GPT
+def classify_skill(skill: str) -> bool | None:
+    if not isinstance(skill, str) or not skill.strip():
+        return _count("skill", False)
+    if get_skill_taxonomy().lookup(skill) is not None:
+        return _count("skill", True)
+    gibberish = looks_like_gibberish(skill)
+    if gibberish:
+        return _count("skill", False)
+    if gibberish is None:
+        return _count("skill", None)
+    words = _words(normalize_skill_key(skill))
+    known = _known_words()
+    if words and all(w in known for w in words):
+        return _count("skill", True)
+    return _count("skill", None)
@@ -0,0 +1,155 @@
+# Precomputed market snapshots for popular job titles
+#
+# The full market analysis (TheirStack fetch plus several GPT stages) takes
+# tens of seconds. For a configured list of popular titles the result is
+# computed ahead of time, stored in SQLite and refreshed by a background
+# thread, so those titles are answered from the store immediately. A snapshot
+# older than the refresh interval is still served (stale-while-revalidate)
+# while a refresh runs in the background.
+#
+# Configuration (environment variables):
+#   MARKET_SNAPSHOT_TITLES          comma-separated job titles to precompute; empty
+#                                   (the default) turns precomputing off, since every
+#                                   refresh spends TheirStack credits and tokens
+#   MARKET_SNAPSHOT_REFRESH_HOURS   refresh interval (default 6)
+#   SKILL_MATCHER_SNAPSHOT_STORE    path of the SQLite file
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from job_store import normalize_keyword
+from llm_cache import DEFAULT_CACHE_DIR
+from rate_limiter import BATCH, priority_scope
+
+DEFAULT_SNAPSHOT_PATH = os.path.join(DEFAULT_CACHE_DIR, "market_snapshots.sqlite3")
+DEFAULT_TITLES = ""  # e.g. "software developer,data engineer,devops engineer"
+
+
+class MarketSnapshotService:
+    def __init__(self, path: str, titles: list[str], analyze, refresh_interval: float = 6 * 3600):
+        self.path = path
+        self.titles = {normalize_keyword(t): t for t in titles if t.strip()}
+        self.analyze = analyze  # job title -> analysis dict, or None on failure
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refreshing: set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="market-snapshots")
+        self._stop = threading.Event()
+        self._scheduler = None
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS snapshots (
+                title_key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                generated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def _load(self, title_key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM snapshots WHERE title_key = ?", (title_key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save(self, title_key: str, analysis: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (title_key, data, generated_at) VALUES (?, ?, ?)",
+                (title_key, json.dumps(analysis, ensure_ascii=False), analysis["generated_at"]),
+            )
+            self._conn.commit()
+
+    def all_snapshots(self) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM snapshots ORDER BY title_key").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def is_stale(self, snapshot: dict) -> bool:
+        return time.time() - snapshot["generated_at"] > self.refresh_interval
+
+    def get(self, job_title: str) -> dict | None:
+        title_key = normalize_keyword(job_title)
+        if title_key not in self.titles:
+            return None
+        snapshot = self._load(title_key)
+        if snapshot is not None and self.is_stale(snapshot):
+            self.refresh_async(title_key)
+        return snapshot
+
+    def refresh(self, title_key: str) -> dict | None:
+        try:
+            # Background refreshes queue behind interactive requests at the rate limiter
+            with priority_scope(BATCH):
+                analysis = self.analyze(self.titles.get(title_key, title_key))
+            if analysis is not None and (analysis["core"] or analysis["optional"]):
+                self._save(title_key, analysis)
+            return analysis
+        except Exception as e:
+            print(f"Market snapshot refresh failed for '{title_key}': {e}", file=sys.stderr)
+            return None
+        finally:
+            with self._lock:
+                self._refreshing.discard(title_key)
+
+    def refresh_async(self, title_key: str):
+        with self._lock:
+            if title_key in self._refreshing:
+                return
+            self._refreshing.add(title_key)
+        self._executor.submit(self.refresh, title_key)
+
+    def refresh_stale(self):
+        for title_key in self.titles:
+            snapshot = self._load(title_key)
+            if snapshot is None or self.is_stale(snapshot):
+                self.refresh_async(title_key)
+
+    def start(self, check_every: float = 60.0):
+        if self._scheduler is not None or not self.titles:
+            return
+
+        def loop():
+            while not self._stop.is_set():
+                self.refresh_stale()
+                self._stop.wait(check_every)
+
+        self._scheduler = threading.Thread(target=loop, name="market-snapshot-scheduler", daemon=True)
+        self._scheduler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def _analyze_with_env_keys(job_title: str) -> dict | None:
+    from job_ads_gpt import analyze_job_market  # job_ads_gpt imports this module
+
+    return analyze_job_market(job_title, os.getenv("OPENAI_API_KEY"), os.getenv("THEIRSTACK_API_KEY"))
+
+
+def get_snapshot_service() -> MarketSnapshotService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            titles = os.getenv("MARKET_SNAPSHOT_TITLES", DEFAULT_TITLES).split(",")
+            _service = MarketSnapshotService(
+                os.getenv("SKILL_MATCHER_SNAPSHOT_STORE", DEFAULT_SNAPSHOT_PATH),
+                titles,
+                _analyze_with_env_keys,
+                refresh_interval=float(os.getenv("MARKET_SNAPSHOT_REFRESH_HOURS", 6)) * 3600,
+            )
+        return _service
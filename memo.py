@@ -0,0 +1,94 @@
+# Rerun-safe memoization for the Streamlit app
+#
+# Streamlit re-executes the app script on every widget interaction. Results
+# of expensive stages are kept in small LRU memos keyed by a hash of their
+# inputs, so a rerun whose inputs did not change does no repeated work:
+#   - session_memo(name): per browser session, stored in st.session_state
+#     (results that depend on what this user uploaded or typed)
+#   - process_memo(name): shared by every session served by the process
+#     (pure functions of their inputs, e.g. skill similarity)
+#
+#   memo = session_memo("suggested_skills")
+#   skills = memo.get_or_compute(input_hash(description), lambda: suggest(description))
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+SESSION_MEMO_KEY = "_memo"
+_MISSING = object()
+
+
+def input_hash(*args, **kwargs) -> str:
+    payload = json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUMemo:
+    def __init__(self, maxsize: int = 16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    # cache_if(value) -> bool keeps error results out of the memo
+    def get_or_compute(self, key, compute, cache_if=None):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = compute()
+        if cache_if is None or cache_if(value):
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+def session_memo(name: str, maxsize: int = 16) -> LRUMemo:
+    memos = st.session_state.setdefault(SESSION_MEMO_KEY, {})
+    if name not in memos:
+        memos[name] = LRUMemo(maxsize)
+    return memos[name]
+
+
+_process_memos: dict[str, LRUMemo] = {}
+_process_lock = threading.Lock()
+
+
+def process_memo(name: str, maxsize: int = 256) -> LRUMemo:
+    with _process_lock:
+        if name not in _process_memos:
+            _process_memos[name] = LRUMemo(maxsize)
+        return _process_memos[name]
+
+
+def memo_stats() -> dict:
+    memos = {f"process:{n}": m for n, m in _process_memos.items()}
+    memos.update({f"session:{n}": m for n, m in st.session_state.get(SESSION_MEMO_KEY, {}).items()})
+    return {name: {"entries": len(m._data), "hits": m.hits, "misses": m.misses} for name, m in memos.items()}
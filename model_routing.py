@@ -0,0 +1,45 @@
+# Per-stage model routing for the GPT helpers
+#
+# Each helper passes its stage name to llm_cache, which asks this module
+# which model serves that stage. Trivial yes/no and filtering stages can go to
+# a small, fast model; extraction, normalization and classification stay on
+# the default model. The fast model is opt-in: it defaults to the default
+# model, since not every endpoint serves a smaller one. Routes only change the
+# model name, so a stage switched to another model gets cache entries of its
+# own.
+#
+# Configuration (environment variables):
+#   SKILL_MATCHER_MODEL         default model for every stage without a route
+#   SKILL_MATCHER_FAST_MODEL    model of the built-in fast routes below, e.g. "gpt-4o-mini"
+#                               (default: the default model)
+#   SKILL_MATCHER_MODEL_ROUTES  comma-separated stage=model overrides, e.g.
+#                               "classify_skills=gpt-4o,validate_skills_with_gpt=gpt-4.5-preview"
+
+import os
+
+DEFAULT_MODEL = os.getenv("SKILL_MATCHER_MODEL", "gpt-4.5-preview")
+FAST_MODEL = os.getenv("SKILL_MATCHER_FAST_MODEL", DEFAULT_MODEL)
+
+# Stages whose answer is a yes/no or a subset of the input
+FAST_STAGES = ("validate_job_title_with_gpt", "validate_skills_with_gpt")
+
+
+def _parse_routes(value: str) -> dict[str, str]:
+    routes = {}
+    for item in value.split(","):
+        stage, _, model = item.partition("=")
+        if stage.strip() and model.strip():
+            routes[stage.strip()] = model.strip()
+    return routes
+
+
+_routes = {stage: FAST_MODEL for stage in FAST_STAGES}
+_routes.update(_parse_routes(os.getenv("SKILL_MATCHER_MODEL_ROUTES", "")))
+
+
+def model_for(stage: str) -> str:
+    return _routes.get(stage, DEFAULT_MODEL)
+
+
+def model_routes() -> dict[str, str]:
+    return {"default": DEFAULT_MODEL, **_routes}
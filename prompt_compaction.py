@@ -0,0 +1,214 @@
+# Token-budgeted compaction of job descriptions before skill extraction
+#
+# Job ads carry a lot of text that never contains a skill: HTML remnants,
+# company boilerplate repeated across ads, benefits / about-us / how-to-apply
+# sections, the same ad posted twice, and Swedish and English versions of the
+# same text in one ad. compact_job_ads() strips that before the LLM call and
+# caps each ad at a token budget, returning a report of the tokens saved.
+#
+# Boilerplate is found by fingerprinting normalized paragraphs across ads;
+# near-duplicate ads are found by MinHash over word shingles.
+
+import html
+import re
+import zlib
+
+import numpy as np
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # Optional: fall back to a character-based estimate
+    _encoding = None
+
+MAX_AD_TOKENS = 1200  # Per-ad cap after compaction
+BOILERPLATE_MIN_ADS = 3  # A paragraph in this many ads is treated as boilerplate
+DUPLICATE_SIMILARITY = 0.9  # Estimated Jaccard similarity for near-duplicate ads
+TRANSLATION_OVERLAP = 0.8  # Share of a language block's anchor tokens found in the other block
+MIN_TRANSLATION_ANCHORS = 3  # Fewer anchors than this cannot show that a block is a translation
+SHINGLE_SIZE = 3
+MINHASH_PERMUTATIONS = 64
+
+# Section headings whose content rarely names required skills
+SKIP_SECTION_HEADINGS = (
+    "we offer", "what we offer", "benefits", "perks", "about us", "about the company", "who we are",
+    "how to apply", "application", "equal opportunity", "diversity",
+    "vi erbjuder", "förmåner", "om oss", "om företaget", "ansökan", "så ansöker du", "övrig information",
+)
+
+_SV_WORDS = {"och", "att", "som", "för", "med", "är", "vi", "du", "på", "av", "det", "en", "har", "till", "inom", "din", "våra"}
+_EN_WORDS = {"and", "the", "to", "of", "with", "you", "we", "for", "is", "in", "our", "your", "a", "are", "will", "as"}
+
+# a and b stay below 2^32 so a * crc32 + b fits in uint64 before the modulo
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(20240501)
+_PERM_A = _rng.integers(1, 1 << 32, MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 32, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def estimate_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # Rough local estimate (~4 characters per token), good enough for budgeting
+    return len(text) // 4 + 1
+
+
+def strip_markup(text: str) -> str:
+    text = re.sub(r"(?i)<\s*(br|/p|/li|/h\d|/div)\s*/?>", "\n", text)
+    text = re.sub(r"(?i)<\s*li[^>]*>", "\n- ", text)
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = html.unescape(text)
+    text = re.sub(r"[*_#`]{2,}|^#+\s*", "", text, flags=re.M)  # Markdown emphasis and headings
+    text = re.sub(r"[ \t ]+", " ", text)
+    return re.sub(r"\n\s*\n+", "\n", text).strip()
+
+
+def _normalize(paragraph: str) -> str:
+    return " ".join(re.findall(r"\w+", paragraph.lower()))
+
+
+def _fingerprint(paragraph: str) -> int:
+    return zlib.crc32(_normalize(paragraph).encode("utf-8"))
+
+
+def _heading(paragraph: str) -> str | None:
+    line = paragraph.strip()
+    # Bullets and short sentences are content, not headings
+    if len(line) > 60 or len(line.split()) > 7 or line.startswith(("-", "•")) or line.endswith("."):
+        return None
+    return line.lower()
+
+
+def _language(paragraph: str) -> str | None:
+    words = re.findall(r"\w+", paragraph.lower())
+    sv = sum(w in _SV_WORDS for w in words)
+    en = sum(w in _EN_WORDS for w in words)
+    if sv == en:
+        return None
+    return "sv" if sv > en else "en"
+
+
+def _drop_skip_sections(paragraphs: list[str]) -> list[str]:
+    kept, skipping = [], False
+    for paragraph in paragraphs:
+        heading = _heading(paragraph)
+        if heading is not None:
+            name = heading.rstrip(":!?. ").strip()
+            if name in SKIP_SECTION_HEADINGS:
+                skipping = True
+                continue
+            # Any other heading ("What you bring", "Dina arbetsuppgifter")
+            # ends the skipped section
+            skipping = False
+        if not skipping:
+            kept.append(paragraph)
+    return kept
+
+
+def _anchor_tokens(paragraphs: list[str]) -> set[str]:
+    # Tokens that survive translation: names and tools written with capitals
+    # (not sentence-initial), digits or symbols ("Kubernetes", "CI/CD", "C#")
+    anchors = set()
+    for paragraph in paragraphs:
+        for sentence in re.split(r"[.!?:;\n]+", paragraph):
+            tokens = re.findall(r"[\w#+/.-]*\w[\w#+]*", sentence.lstrip("-• "))
+            for token in tokens[1:]:
+                if any(c.isupper() or c.isdigit() for c in token) or re.search(r"[#+/]", token):
+                    anchors.add(token.lower())
+    return anchors
+
+
+def _covered(block: set[str], other: set[str]) -> bool:
+    return len(block) >= MIN_TRANSLATION_ANCHORS and len(block & other) >= TRANSLATION_OVERLAP * len(block)
+
+
+def _drop_translation(paragraphs: list[str]) -> list[str]:
+    # Bilingual ads repeat the same content in Swedish and English; one
+    # language block is dropped only when its names, tools and numbers all
+    # reappear in the other block, i.e. when it really is a translation.
+    # (Word shingles do not survive translation, these anchor tokens do.)
+    languages = [_language(p) for p in paragraphs]
+    blocks = {lang: [p for p, language in zip(paragraphs, languages) if language == lang] for lang in ("sv", "en")}
+    if not blocks["sv"] or not blocks["en"]:
+        return paragraphs
+    anchors = {lang: _anchor_tokens(block) for lang, block in blocks.items()}
+    if _covered(anchors["sv"], anchors["en"]):
+        drop = "sv"
+    elif _covered(anchors["en"], anchors["sv"]):
+        drop = "en"
+    else:
+        return paragraphs
+    return [p for p, language in zip(paragraphs, languages) if language != drop]
+
+
+def _truncate(paragraphs: list[str], max_tokens: int) -> list[str]:
+    kept, used = [], 0
+    for paragraph in paragraphs:
+        cost = estimate_tokens(paragraph)
+        if used + cost > max_tokens:
+            if not kept:
+                kept.append(paragraph[:max_tokens * 4])
+            break
+        kept.append(paragraph)
+        used += cost
+    return kept
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    words = re.findall(r"\w+", text.lower())
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))}
+    hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64)
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+def compact_job_ads(descriptions: list[str], max_ad_tokens: int = MAX_AD_TOKENS,
+                    boilerplate_min_ads: int = BOILERPLATE_MIN_ADS,
+                    duplicate_similarity: float = DUPLICATE_SIMILARITY) -> tuple[list[str], dict]:
+    tokens_before = sum(estimate_tokens(d) for d in descriptions)
+    ads = [[p.strip() for p in strip_markup(d).split("\n") if p.strip()] for d in descriptions]
+
+    # Paragraphs repeated across several ads are company or platform boilerplate
+    ads_per_paragraph = {}
+    for paragraphs in ads:
+        for fingerprint in {_fingerprint(p) for p in paragraphs if len(p) > 40}:
+            ads_per_paragraph[fingerprint] = ads_per_paragraph.get(fingerprint, 0) + 1
+    boilerplate = {f for f, n in ads_per_paragraph.items() if n >= boilerplate_min_ads}
+
+    compacted = []
+    boilerplate_dropped = 0
+    for paragraphs in ads:
+        kept = []
+        for p in paragraphs:
+            if len(p) > 40 and _fingerprint(p) in boilerplate:
+                boilerplate_dropped += 1
+            else:
+                kept.append(p)
+        kept = _drop_translation(_drop_skip_sections(kept))
+        # Never compact an ad away entirely: fall back to its stripped text
+        if not kept:
+            kept = paragraphs
+        compacted.append("\n".join(_truncate(kept, max_ad_tokens)))
+
+    # Reposted or cross-posted ads: keep the first copy only
+    result, signatures = [], []
+    for text in compacted:
+        if not text:
+            continue
+        signature = minhash_signature(text)
+        if signatures and (np.vstack(signatures) == signature).mean(axis=1).max() >= duplicate_similarity:
+            continue
+        signatures.append(signature)
+        result.append(text)
+
+    tokens_after = sum(estimate_tokens(d) for d in result)
+    report = {
+        "ads_in": len(descriptions),
+        "ads_out": len(result),
+        "duplicates_removed": sum(1 for t in compacted if t) - len(result),
+        "boilerplate_paragraphs_removed": boilerplate_dropped,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+    }
+    return result, report
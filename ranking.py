@@ -0,0 +1,201 @@
+# Many-to-many ranking of candidates (CVs) against roles (job profiles)
+#
+# Canonical skills (through the local taxonomy, as in skill_similarity) are
+# interned as integer ids. Each role becomes a column of a weight matrix over
+# the skill ids: core and optional skills weighted by their share of mentions
+# (pct), core counting CORE_WEIGHT times as much, normalized so a column sums
+# to 1. Each candidate is a sparse row of skill ids (CSR index arrays), and
+# its coverage of every role is the sum of the weight rows it holds. That
+# sum is computed for chunks of candidates at once with a gather and
+# np.add.reduceat, so the cost grows with the number of candidate skills,
+# not with the vocabulary. The result is an N x M coverage matrix in [0, 1],
+# from which top-k candidates per role and top-k roles per candidate are
+# taken with argpartition. Everything runs offline.
+#
+# Usage:
+#   python ranking.py cv_results.jsonl --top 10 -o ranking.json
+#   (roles default to the precomputed market snapshots; --roles takes a JSON
+#    file of {title: analysis} or a JSONL file of analyses)
+
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from skill_similarity import canonical_skill_key
+
+CORE_WEIGHT = 2.0
+OPTIONAL_WEIGHT = 1.0
+MIN_PCT = 0.5  # Skills without a pct (older snapshots) still count a little
+CHUNK_NNZ = 1 << 15  # Candidate skills gathered per chunk
+
+
+class SkillVocabulary:
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.names: list[str] = []
+        self._raw: dict[str, str] = {}  # Raw name -> canonical key, taxonomy lookups are not free
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def key(self, skill: str) -> str:
+        key = self._raw.get(skill)
+        if key is None:
+            key = self._raw[skill] = canonical_skill_key(skill)
+        return key
+
+    def id_for(self, skill: str, add: bool = True) -> int | None:
+        key = self.key(skill)
+        skill_id = self.ids.get(key)
+        if skill_id is None and add and key:
+            skill_id = self.ids[key] = len(self.names)
+            self.names.append(key)
+        return skill_id
+
+    def encode(self, skills, add: bool = False) -> np.ndarray:
+        ids = {self.id_for(s, add) for s in skills if isinstance(s, str)}
+        ids.discard(None)
+        return np.fromiter(sorted(ids), dtype=np.int32, count=len(ids))
+
+
+def _role_skills(analysis: dict) -> list[tuple[str, float]]:
+    weighted = []
+    for field, weight in (("core", CORE_WEIGHT), ("optional", OPTIONAL_WEIGHT)):
+        for item in analysis.get(field, []):
+            skill, pct = (item.get("skill"), item.get("pct")) if isinstance(item, dict) else (item, None)
+            if isinstance(skill, str):
+                weighted.append((skill, weight * max(float(pct or 0), MIN_PCT)))
+    return weighted
+
+
+class RankingEngine:
+    def __init__(self, roles: dict[str, dict]):
+        self.vocabulary = SkillVocabulary()
+        self.roles = list(roles)
+        entries = [(j, self.vocabulary.id_for(skill), weight)
+                   for j, title in enumerate(self.roles) for skill, weight in _role_skills(roles[title])]
+
+        self.weights = np.zeros((len(self.vocabulary), len(self.roles)), dtype=np.float32)
+        for j, skill_id, weight in entries:
+            # A skill listed twice (core and optional) keeps its larger weight
+            self.weights[skill_id, j] = max(self.weights[skill_id, j], weight)
+        totals = self.weights.sum(axis=0)
+        self.weights /= np.maximum(totals, 1e-12)
+
+    def encode_candidates(self, candidates: dict[str, list[str]]) -> tuple[np.ndarray, np.ndarray]:
+        # Skills no role asks for are dropped: they cannot change any score
+        rows = [self.vocabulary.encode(skills) for skills in candidates.values()]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rows], out=indptr[1:])
+        indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+        return indptr, indices
+
+    def coverage(self, candidates: dict[str, list[str]]) -> np.ndarray:
+        indptr, indices = self.encode_candidates(candidates)
+        n = len(indptr) - 1
+        scores = np.zeros((n, len(self.roles)), dtype=np.float32)
+
+        start = 0
+        while start < n:
+            # Grow the chunk until it holds about CHUNK_NNZ candidate skills
+            stop = int(np.searchsorted(indptr, indptr[start] + CHUNK_NNZ, side="right")) - 1
+            stop = min(max(stop, start + 1), n)
+            lengths = np.diff(indptr[start:stop + 1])
+            nonempty = np.flatnonzero(lengths)
+            if len(nonempty):
+                gathered = self.weights[indices[indptr[start]:indptr[stop]]]
+                offsets = (indptr[start:stop] - indptr[start])[nonempty]
+                scores[start + nonempty] = np.add.reduceat(gathered, offsets, axis=0)
+            start = stop
+        return np.minimum(scores, 1.0, out=scores)
+
+    def explain(self, skills: list[str], role: str) -> dict:
+        j = self.roles.index(role)
+        held = set(self.vocabulary.encode(skills).tolist())
+        required = np.flatnonzero(self.weights[:, j])
+        order = required[np.argsort(-self.weights[required, j])]
+        return {
+            "matched": [self.vocabulary.names[i] for i in order if i in held],
+            "missing": [self.vocabulary.names[i] for i in order if i not in held],
+        }
+
+
+def _top_k(scores: np.ndarray, k: int, axis: int) -> np.ndarray:
+    k = min(k, scores.shape[axis])
+    if k == 0:
+        return np.zeros((0, scores.shape[1]) if axis == 0 else (scores.shape[0], 0), dtype=np.intp)
+    top = np.argpartition(-scores, k - 1, axis=axis).take(np.arange(k), axis=axis)
+    order = np.argsort(-np.take_along_axis(scores, top, axis=axis), axis=axis, kind="stable")
+    return np.take_along_axis(top, order, axis=axis)
+
+
+def rank(candidates: dict[str, list[str]], roles: dict[str, dict], k: int = 10) -> dict:
+    engine = RankingEngine(roles)
+    names = list(candidates)
+    scores = engine.coverage(candidates)
+
+    per_role = _top_k(scores, k, axis=0)
+    per_candidate = _top_k(scores, k, axis=1)
+    return {
+        "top_candidates_per_role": {
+            role: [{"candidate": names[i], "score": round(float(scores[i, j]), 4)} for i in per_role[:, j]]
+            for j, role in enumerate(engine.roles)
+        },
+        "top_roles_per_candidate": {
+            name: [{"role": engine.roles[j], "score": round(float(scores[i, j]), 4)} for j in per_candidate[i]]
+            for i, name in enumerate(names)
+        },
+    }
+
+
+def load_candidates(path: str) -> dict[str, list[str]]:
+    # batch_cv.py output: the newest successful record per file wins
+    candidates = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") == "ok":
+                candidates[record.get("file") or f"cv-{len(candidates)}"] = record.get("standardized_skills", [])
+    return candidates
+
+
+def load_roles(path: str | None) -> dict[str, dict]:
+    if path is None:
+        from market_snapshots import get_snapshot_service
+
+        return {a["job_title"]: a for a in get_snapshot_service().all_snapshots()}
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            analyses = [json.loads(line) for line in f if line.strip()]
+            return {a["job_title"]: a for a in analyses}
+        return json.load(f)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Rank CVs against job roles by weighted skill coverage.")
+    parser.add_argument("cvs", help="JSONL output of batch_cv.py")
+    parser.add_argument("--roles", help="JSON {title: analysis} or JSONL of analyses (default: market snapshots)")
+    parser.add_argument("--top", type=int, default=10, help="k for top-k candidates per role and roles per candidate")
+    parser.add_argument("-o", "--output", help="write the ranking here instead of stdout")
+    args = parser.parse_args(argv)
+
+    candidates = load_candidates(args.cvs)
+    roles = load_roles(args.roles)
+    if not candidates or not roles:
+        parser.error(f"need at least one CV and one role (got {len(candidates)} CVs, {len(roles)} roles)")
+
+    text = json.dumps(rank(candidates, roles, args.top), ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
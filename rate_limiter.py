@@ -0,0 +1,245 @@
+# Process-wide rate limiting and adaptive concurrency for outbound calls
+#
+# Every call to the LLM endpoint and to TheirStack goes through the limiter
+# of its endpoint, shared by all Streamlit sessions, the snapshot refresher
+# and batch jobs in the process:
+#   - a token bucket caps the request rate (with a burst allowance)
+#   - an AIMD concurrency limit grows by one per window of successful calls
+#     and is halved when the endpoint throttles (429/503)
+#   - waiters are served by priority, so interactive sessions go before
+#     batch work (batch_cv.py, snapshot refreshes)
+#   - 429, 5xx and connection errors are retried with exponential backoff
+#     and full jitter, honouring Retry-After; other errors (e.g. TheirStack's
+#     402 when credits are exhausted) are not retried
+#
+#   with priority_scope(BATCH):
+#       result = call_with_backoff("llm", lambda: client.chat.completions.create(...))
+#
+# Configuration (environment variables), per endpoint name (LLM, THEIRSTACK):
+#   SKILL_MATCHER_<NAME>_RATE         requests per second (token refill rate)
+#   SKILL_MATCHER_<NAME>_BURST        bucket size
+#   SKILL_MATCHER_<NAME>_CONCURRENCY  upper bound of the adaptive concurrency limit
+#   SKILL_MATCHER_MAX_RETRIES         retries per call (default 4)
+
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from tracing import register_metrics_source
+
+INTERACTIVE = 0
+BATCH = 1
+
+MAX_RETRIES = int(os.getenv("SKILL_MATCHER_MAX_RETRIES", 4))
+BACKOFF_BASE = 0.5  # Seconds before the first retry (upper bound of the jitter)
+BACKOFF_CAP = 30.0
+THROTTLE_STATUSES = {429, 503}
+
+DEFAULT_LIMITS = {
+    "llm": {"rate": 5.0, "burst": 10, "concurrency": 16},
+    "theirstack": {"rate": 2.0, "burst": 4, "concurrency": 4},
+}
+
+_priority = contextvars.ContextVar("request_priority", default=None)
+_default_priority = INTERACTIVE
+
+
+def set_default_priority(priority: int):
+    global _default_priority
+    _default_priority = priority
+
+
+def current_priority() -> int:
+    priority = _priority.get()
+    return _default_priority if priority is None else priority
+
+
+@contextmanager
+def priority_scope(priority: int):
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class EndpointLimiter:
+    def __init__(self, name: str, rate: float, burst: int, max_concurrency: int, min_concurrency: int = 1):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(min(max_concurrency, max(min_concurrency, burst)))
+
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+
+        self._waits = deque(maxlen=1000)
+        self.acquired = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self, priority: int = INTERACTIVE):
+        entry = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._waiters[0] == entry and self._in_flight < int(self.concurrency_limit) and self._tokens >= 1:
+                    break
+                timeout = None
+                if self._waiters[0] == entry and self._tokens < 1:
+                    timeout = (1 - self._tokens) / self.rate
+                self._cond.wait(timeout)
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self._in_flight += 1
+            self.acquired += 1
+            self._waits.append(time.monotonic() - start)
+            self._cond.notify_all()  # The next waiter may be able to go too
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                # Multiplicative decrease; the bucket is emptied so the endpoint gets a pause
+                self.throttled += 1
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+                self._tokens = min(self._tokens, 0.0)
+            else:
+                # Additive increase: about +1 per limit's worth of successful calls
+                self.concurrency_limit = min(self.max_concurrency,
+                                             self.concurrency_limit + 1 / self.concurrency_limit)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: int | None = None):
+        self.acquire(current_priority() if priority is None else priority)
+        outcome = {"throttled": False}
+        try:
+            yield outcome
+        finally:
+            self.release(outcome["throttled"])
+
+    def count(self, field: str):
+        with self._cond:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            waits = sorted(self._waits)
+            return {
+                "queue_depth": len(self._waiters),
+                "in_flight": self._in_flight,
+                "concurrency_limit": round(self.concurrency_limit, 2),
+                "tokens": round(self._tokens, 2),
+                "acquired": self.acquired,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "failures": self.failures,
+                "avg_wait_s": round(sum(waits) / len(waits), 4) if waits else 0.0,
+                "p95_wait_s": round(waits[min(int(0.95 * len(waits)), len(waits) - 1)], 4) if waits else 0.0,
+            }
+
+
+_limiters: dict[str, EndpointLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> EndpointLimiter:
+    with _limiters_lock:
+        if name not in _limiters:
+            defaults = DEFAULT_LIMITS.get(name, DEFAULT_LIMITS["llm"])
+            prefix = f"SKILL_MATCHER_{name.upper()}_"
+            _limiters[name] = EndpointLimiter(
+                name,
+                rate=float(os.getenv(prefix + "RATE", defaults["rate"])),
+                burst=int(os.getenv(prefix + "BURST", defaults["burst"])),
+                max_concurrency=int(os.getenv(prefix + "CONCURRENCY", defaults["concurrency"])),
+            )
+        return _limiters[name]
+
+
+def limiter_metrics() -> dict:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.metrics() for limiter in limiters}
+
+
+register_metrics_source("rate_limiter", limiter_metrics)
+
+
+def _status_of(error: Exception) -> int | None:
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    return status
+
+
+def _retry_after(response) -> float | None:
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return min(float(headers.get("retry-after")), BACKOFF_CAP)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _is_connection_error(error: Exception) -> bool:
+    # openai.APIConnectionError / APITimeoutError and requests' ConnectionError / Timeout
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "ConnectionError", "Timeout",
+                                    "ConnectTimeout", "ReadTimeout")
+
+
+# Runs fn() under the endpoint's limiter, retrying throttling, server and
+# connection errors. fn may raise (openai) or return a response with a
+# status_code (requests); a retryable response is retried like an error and
+# the last one is returned to the caller. on_retry() is called per retry.
+def call_with_backoff(name: str, fn, priority: int | None = None, max_retries: int = MAX_RETRIES, on_retry=None):
+    limiter = get_limiter(name)
+    for attempt in range(max_retries + 1):
+        delay = None
+        with limiter.slot(priority) as outcome:
+            try:
+                result = fn()
+            except Exception as e:
+                status = _status_of(e)
+                outcome["throttled"] = status in THROTTLE_STATUSES
+                retryable = status == 429 or (status is not None and status >= 500) or _is_connection_error(e)
+                if not retryable or attempt == max_retries:
+                    limiter.count("failures")
+                    raise
+                delay = _retry_after(getattr(e, "response", None))
+            else:
+                status = getattr(result, "status_code", None)
+                if not isinstance(status, int) or (status != 429 and status < 500) or attempt == max_retries:
+                    return result
+                outcome["throttled"] = status in THROTTLE_STATUSES
+                delay = _retry_after(result)
+                result.close()
+
+        limiter.count("retries")
+        if on_retry is not None:
+            on_retry()
+        time.sleep(delay if delay is not None else backoff_delay(attempt))
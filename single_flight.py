@@ -0,0 +1,79 @@
+# Single-flight coalescing of identical in-flight work
+#
+# When several sessions ask for the same thing at the same time (the same
+# job title, the same prompt), only the first caller (the leader) runs the
+# computation; the others wait for it and receive the same result, or the
+# same exception. Nothing is kept once the computation finishes; the
+# response cache and memos handle later repeats.
+#
+#   _flights = SingleFlight("job_market")
+#   analysis = _flights.do(normalize_keyword(title), lambda: analyze(title))
+
+import threading
+
+from tracing import register_metrics_source
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.leaders = 0
+        self.followers = 0
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        _groups.append(self)
+
+    # Returns (result, shared); shared is True when another caller computed it
+    def do_shared(self, key: str, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self.followers += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def do(self, key: str, fn):
+        return self.do_shared(key, fn)[0]
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "followers": self.followers}
+
+
+_groups: list[SingleFlight] = []
+
+
+def single_flight_metrics() -> dict:
+    return {group.name: group.metrics() for group in _groups}
+
+
+register_metrics_source("single_flight", single_flight_metrics)
@@ -0,0 +1,73 @@
+# Skill-frequency aggregation under canonical names
+#
+# Job-ad extraction yields raw skill names ("JS", "javascript", "Java Script").
+# SkillAggregator folds them onto canonical names through a raw -> canonical
+# index (built from standardize_skill_mapping) in a single pass and keeps,
+# per job title:
+#   count   - total mentions of the skill
+#   ads     - number of ads mentioning it (document frequency)
+#   pct     - share of all skill mentions, in percent
+#   ad_pct  - share of ads mentioning it, in percent
+# Several titles can be added to one aggregator and queried separately or
+# together.
+
+from collections import Counter
+
+from skill_taxonomy import normalize_skill_key
+
+
+class SkillAggregator:
+    def __init__(self, canonical: dict[str, str] | None = None):
+        self._index = {normalize_skill_key(raw): name for raw, name in (canonical or {}).items()}
+        self._mentions: dict[str, Counter] = {}
+        self._ads: dict[str, Counter] = {}
+        self._ad_totals: Counter = Counter()
+
+    def canonical(self, skill: str) -> str:
+        key = normalize_skill_key(skill)
+        return self._index.get(key, key)
+
+    def add_ads(self, title: str, skill_lists: list[list[str]]):
+        mentions = self._mentions.setdefault(title, Counter())
+        ads = self._ads.setdefault(title, Counter())
+        for skills in skill_lists:
+            names = [self.canonical(s) for s in skills if isinstance(s, str) and s.strip()]
+            mentions.update(names)
+            ads.update(set(names))
+        self._ad_totals[title] += len(skill_lists)
+
+    def stats(self, titles: list[str] | None = None, min_count: int = 1) -> list[dict]:
+        titles = list(self._mentions) if titles is None else titles
+        mentions, ads = Counter(), Counter()
+        for title in titles:
+            mentions.update(self._mentions.get(title, Counter()))
+            ads.update(self._ads.get(title, Counter()))
+        total_mentions = sum(mentions.values())
+        total_ads = sum(self._ad_totals[t] for t in titles)
+
+        result = [
+            {
+                "skill": skill,
+                "count": count,
+                "ads": ads[skill],
+                "pct": round(count / total_mentions * 100, 1),
+                "ad_pct": round(ads[skill] / total_ads * 100, 1) if total_ads else 0.0,
+            }
+            for skill, count in mentions.items() if count >= min_count
+        ]
+        result.sort(key=lambda x: (x["count"], x["ads"]), reverse=True)
+        return result
+
+    def attach_stats(self, skills: list[str], stats: list[dict]) -> list[dict]:
+        by_name = {s["skill"]: s for s in stats}
+        attached = []
+        for skill in skills:
+            info = by_name.get(self.canonical(skill), {})
+            attached.append({
+                "skill": skill,
+                "pct": info.get("pct", 0),
+                "ad_pct": info.get("ad_pct", 0),
+                "count": info.get("count", 0),
+                "ads": info.get("ads", 0),
+            })
+        return attached
@@ -0,0 +1,102 @@
+# Offline similarity matching between CV skills and market skills
+#
+# Skills are first canonicalized through the local taxonomy (so "ci/cd" and
+# "continuous integration" become the same label), then embedded as hashed
+# character n-gram TF-IDF vectors. A single NumPy matrix product gives the
+# cosine similarity of every CV skill against every required skill, which is
+# graded into exact / strong / partial / missing matches. No network needed.
+
+import zlib
+
+import numpy as np
+
+from skill_taxonomy import get_skill_taxonomy, normalize_skill_key
+
+NGRAM_SIZES = (2, 3, 4)
+N_FEATURES = 2 ** 11
+STRONG_THRESHOLD = 0.75
+PARTIAL_THRESHOLD = 0.5
+
+_gram_hashes: dict[str, int] = {}
+
+
+def _gram_index(gram: str) -> int:
+    index = _gram_hashes.get(gram)
+    if index is None:
+        index = zlib.crc32(gram.encode("utf-8")) % N_FEATURES
+        _gram_hashes[gram] = index
+    return index
+
+
+def _ngrams(text: str) -> list[str]:
+    padded = f" {text} "
+    return [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+
+
+def canonical_skill_key(skill: str) -> str:
+    label = get_skill_taxonomy().lookup(skill)
+    return normalize_skill_key(label or skill)
+
+
+def embed_skills(keys: list[str]) -> np.ndarray:
+    # Flat (row, feature) cell ids, counted in a single bincount pass
+    cells = [row * N_FEATURES + _gram_index(gram) for row, key in enumerate(keys) for gram in _ngrams(key)]
+    counts = np.bincount(np.asarray(cells, dtype=np.intp), minlength=len(keys) * N_FEATURES)
+    return np.log1p(counts.reshape(len(keys), N_FEATURES).astype(np.float32))
+
+
+def _l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def similarity_matrix(user_keys: list[str], required_keys: list[str]) -> np.ndarray:
+    if not user_keys or not required_keys:
+        return np.zeros((len(user_keys), len(required_keys)), dtype=np.float32)
+    user = embed_skills(user_keys)
+    required = embed_skills(required_keys)
+
+    # IDF over both sides, so n-grams shared by everything ("ing", "ment") count less
+    user_df = np.count_nonzero(user, axis=0)
+    required_df = np.count_nonzero(required, axis=0)
+    n_docs = len(user_keys) + len(required_keys)
+    idf = (np.log((1 + n_docs) / (1 + user_df + required_df)) + 1).astype(np.float32)
+
+    # Only features present on both sides contribute to the dot products
+    shared = np.flatnonzero((user_df > 0) & (required_df > 0))
+    user = _l2_normalize(user * idf)[:, shared]
+    required = _l2_normalize(required * idf)[:, shared]
+    return user @ required.T
+
+
+def match_skills(user_skills: list[str], required_skills: list[str],
+                 strong_threshold: float = STRONG_THRESHOLD,
+                 partial_threshold: float = PARTIAL_THRESHOLD) -> list[dict]:
+    partial_threshold = min(partial_threshold, strong_threshold)
+    user_skills = list(dict.fromkeys(user_skills))
+    user_keys = [canonical_skill_key(s) for s in user_skills]
+    required_keys = [canonical_skill_key(s) for s in required_skills]
+
+    scores = similarity_matrix(user_keys, required_keys)
+    exact = {key: skill for skill, key in zip(user_skills, user_keys)}
+
+    matches = []
+    for j, (skill, key) in enumerate(zip(required_skills, required_keys)):
+        if key in exact:
+            matches.append({"skill": skill, "match": exact[key], "score": 1.0, "grade": "exact"})
+            continue
+
+        best = int(np.argmax(scores[:, j])) if user_skills else -1
+        score = float(scores[best, j]) if best >= 0 else 0.0
+        if score >= strong_threshold:
+            grade = "strong"
+        elif score >= partial_threshold:
+            grade = "partial"
+        else:
+            grade = "missing"
+        matches.append({
+            "skill": skill,
+            "match": user_skills[best] if grade != "missing" else None,
+            "score": round(score, 3),
+            "grade": grade,
+        })
+    return matches
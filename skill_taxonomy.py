@@ -0,0 +1,177 @@
+# Local skill taxonomy index
+#
+# Canonicalizes skill names without a round trip to GPT. The index is an
+# alias hash map (normalized name -> canonical label) backed by a character
+# trigram index for fuzzy lookups of near-miss spellings ("postgress",
+# "kubernets"). Skills that miss the index are sent to GPT by the callers in
+# cv_gpt_4_parser, and the confirmed mappings are written back here so the CV
+# side and the job-ad side share the same canonical names.
+#
+# Configuration (environment variables):
+#   SKILL_TAXONOMY_PATH     taxonomy file: the bundled JSON format
+#                           ({"skills": [{"label": ..., "aliases": [...]}]})
+#                           or an ESCO skills CSV export (preferredLabel/altLabels)
+#   SKILL_TAXONOMY_LEARNED  JSON file holding mappings learned from GPT
+
+import csv
+import json
+import os
+import re
+import threading
+from collections import defaultdict
+
+from llm_cache import DEFAULT_CACHE_DIR
+
+BUNDLED_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skill_taxonomy.json")
+DEFAULT_LEARNED_PATH = os.path.join(DEFAULT_CACHE_DIR, "skill_taxonomy_learned.json")
+
+FUZZY_THRESHOLD = 0.75  # Minimum trigram Dice similarity for a fuzzy hit
+FUZZY_MIN_LENGTH = 5  # Short names (Go, R, C#) are only matched exactly
+
+
+def normalize_skill_key(skill: str) -> str:
+    key = skill.strip().lower()
+    key = re.sub(r"[\s_\-]+", " ", key)
+    return re.sub(r"[^\w\s+#./]", "", key).strip()
+
+
+def _trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SkillTaxonomy:
+    def __init__(self, entries: list[dict] = (), learned_path: str | None = None):
+        self.learned_path = learned_path
+        self._lock = threading.Lock()
+        self._labels: dict[str, str] = {}  # normalized label -> label
+        self._aliases: dict[str, str] = {}  # normalized alias -> label
+        self._trigram_index: dict[str, set[str]] = defaultdict(set)
+        self._trigram_counts: dict[str, int] = {}
+        self._learned: dict[str, str] = {}
+
+        for entry in entries:
+            self._add_label(entry["label"])
+            for alias in entry.get("aliases", []):
+                self._add_alias(alias, entry["label"])
+
+        if learned_path and os.path.exists(learned_path):
+            with open(learned_path, encoding="utf-8") as f:
+                for alias, label in json.load(f).items():
+                    self._learned[alias] = self._add_label(label)
+                    self._add_alias(alias, label)
+
+    @classmethod
+    def from_file(cls, path: str, learned_path: str | None = None) -> "SkillTaxonomy":
+        if path.lower().endswith(".csv"):
+            entries = []
+            with open(path, encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    label = (row.get("preferredLabel") or "").strip()
+                    if label:
+                        aliases = [a.strip() for a in (row.get("altLabels") or "").splitlines() if a.strip()]
+                        entries.append({"label": label, "aliases": aliases})
+        else:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)["skills"]
+        return cls(entries, learned_path=learned_path)
+
+    def _add_label(self, label: str) -> str:
+        key = normalize_skill_key(label)
+        label = self._labels.setdefault(key, label)
+        self._index_alias(key, label)
+        return label
+
+    def _add_alias(self, alias: str, label: str):
+        key = normalize_skill_key(alias)
+        if key:
+            self._index_alias(key, self._labels[normalize_skill_key(label)])
+
+    def _index_alias(self, key: str, label: str):
+        if key not in self._aliases:
+            grams = _trigrams(key)
+            for gram in grams:
+                self._trigram_index[gram].add(key)
+            self._trigram_counts[key] = len(grams)
+        self._aliases[key] = label
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    # Reads take the lock too: add_mappings grows the index sets from other threads
+    def lookup(self, skill: str, fuzzy: bool = True) -> str | None:
+        key = normalize_skill_key(skill)
+        with self._lock:
+            label = self._aliases.get(key)
+            if label is not None or not fuzzy or len(key) < FUZZY_MIN_LENGTH:
+                return label
+            return self._fuzzy_lookup(key)
+
+    def alias_keys(self) -> list[str]:
+        with self._lock:
+            return list(self._aliases)
+
+    # Caller holds self._lock
+    def _fuzzy_lookup(self, key: str) -> str | None:
+        grams = _trigrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self._trigram_index.get(gram, ()):
+                shared[candidate] += 1
+
+        best, best_score = None, FUZZY_THRESHOLD
+        for candidate, count in shared.items():
+            if len(candidate) < FUZZY_MIN_LENGTH:
+                continue
+            score = 2 * count / (len(grams) + self._trigram_counts[candidate])
+            if score >= best_score:
+                best, best_score = candidate, score
+        return self._aliases[best] if best else None
+
+    def split_known(self, skills: list[str]) -> tuple[dict[str, str], list[str]]:
+        known, unknown = {}, []
+        for skill in skills:
+            label = self.lookup(skill)
+            if label is None:
+                unknown.append(skill)
+            else:
+                known[skill] = label
+        return known, unknown
+
+    def add_mappings(self, mappings: dict[str, str], persist: bool = True):
+        if not mappings:
+            return
+        with self._lock:
+            changed = False
+            for alias, label in mappings.items():
+                if not isinstance(label, str) or not label.strip() or not normalize_skill_key(alias):
+                    continue
+                label = self._add_label(label.strip())
+                if self._aliases.get(normalize_skill_key(alias)) != label:
+                    self._add_alias(alias, label)
+                    self._learned[alias] = label
+                    changed = True
+            if changed and persist and self.learned_path:
+                self._save_learned()
+
+    def _save_learned(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.learned_path)), exist_ok=True)
+        tmp_path = f"{self.learned_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._learned, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.learned_path)
+
+
+_taxonomy = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    global _taxonomy
+    with _taxonomy_lock:
+        if _taxonomy is None:
+            _taxonomy = SkillTaxonomy.from_file(
+                os.getenv("SKILL_TAXONOMY_PATH", BUNDLED_TAXONOMY_PATH),
+                learned_path=os.getenv("SKILL_TAXONOMY_LEARNED", DEFAULT_LEARNED_PATH),
+            )
+        return _taxonomy
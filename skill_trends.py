@@ -0,0 +1,325 @@
+# Append-only time series of skill demand per job title
+#
+# Every market analysis is appended to a small columnar store, so questions
+# like "how has demand for Kubernetes among data engineers changed over six
+# months" are answered from disk instead of fetching and extracting the ads
+# again. Titles and skills are interned as integer ids (names.json), and each
+# column is a raw NumPy array file that only ever grows:
+#   skills/     one row per skill of an analysis: time, title, skill, mentions,
+#               ads mentioning it, core flag
+#   analyses/   one row per analysis: time, title, number of ads analyzed
+# Weekly and monthly rollups are kept sorted by (title, skill, period) and
+# updated incrementally: appends are buffered as a delta that is merged in
+# before the next query, the rollups are saved every ROLLUP_SAVE_EVERY appends
+# and on close, and on start-up only the rows after the saved rollup's
+# watermark are read. Range queries are binary searches over the rollup keys.
+# The store has a single writer process (the app, including its snapshot
+# refresher).
+#
+# Configuration (environment variables):
+#   SKILL_MATCHER_TREND_STORE   directory of the store
+#
+# Usage:
+#   get_trend_store().append(analysis)
+#   get_trend_store().trend("data engineer", ["Kubernetes"], MONTH, start=date(2026, 4, 1))
+#   get_trend_store().close()  # Also run at exit
+
+import atexit
+import json
+import os
+import threading
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from job_store import normalize_keyword
+from llm_cache import DEFAULT_CACHE_DIR
+from skill_taxonomy import normalize_skill_key
+
+DEFAULT_TREND_STORE_PATH = os.path.join(DEFAULT_CACHE_DIR, "skill_trends")
+
+WEEK, MONTH = "week", "month"
+ROLLUP_SAVE_EVERY = 50  # Appends between rollup saves; rows not yet saved are re-read on start-up
+
+SKILL_COLUMNS = {"t": np.float64, "title": np.uint32, "skill": np.uint32,
+                 "count": np.uint32, "ads": np.uint32, "core": np.uint8}
+ANALYSIS_COLUMNS = {"t": np.float64, "title": np.uint32, "ad_count": np.uint32}
+
+# Rollup keys pack (title, skill, period) into one int64: 19 + 24 + 20 bits
+TITLE_SHIFT, SKILL_SHIFT = 44, 20
+PERIOD_MASK = (1 << SKILL_SHIFT) - 1
+SKILL_MASK = (1 << (TITLE_SHIFT - SKILL_SHIFT)) - 1
+
+
+def period_index(timestamps: np.ndarray, granularity: str) -> np.ndarray:
+    days = np.floor(np.asarray(timestamps, dtype=np.float64) / 86400).astype(np.int64)
+    if granularity == WEEK:
+        return (days + 3) // 7  # 1970-01-01 was a Thursday; weeks start on Monday
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def period_start(index: int, granularity: str) -> date:
+    if granularity == WEEK:
+        return np.datetime64(int(index) * 7 - 3, "D").astype(date)
+    return np.datetime64(int(index), "M").astype("datetime64[D]").astype(date)
+
+
+def _timestamp(day: date) -> float:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+
+class _Table:
+    # One raw array file per column; all columns have the same number of rows
+    def __init__(self, directory: str, columns: dict):
+        self.directory = directory
+        self.columns = columns
+        os.makedirs(directory, exist_ok=True)
+        sizes = [os.path.getsize(self._path(c)) // np.dtype(t).itemsize if os.path.exists(self._path(c)) else 0
+                 for c, t in columns.items()]
+        self.rows = min(sizes)
+        # An append interrupted half-way leaves some columns longer; cut them back
+        for column, dtype in columns.items():
+            with open(self._path(column), "ab") as f:
+                f.truncate(self.rows * np.dtype(dtype).itemsize)
+
+    def _path(self, column: str) -> str:
+        return os.path.join(self.directory, f"{column}.bin")
+
+    def append(self, values: dict):
+        for column, dtype in self.columns.items():
+            with open(self._path(column), "ab") as f:
+                f.write(np.asarray(values[column], dtype=dtype).tobytes())
+        self.rows += len(values["t"])
+
+    def read(self, start: int = 0) -> dict:
+        return {column: np.fromfile(self._path(column), dtype=dtype, count=self.rows - start,
+                                    offset=start * np.dtype(dtype).itemsize)
+                for column, dtype in self.columns.items()}
+
+
+def _merge(keys: np.ndarray, values: dict, new_keys: np.ndarray, new_values: dict) -> tuple[np.ndarray, dict]:
+    merged, inverse = np.unique(np.concatenate([keys, new_keys]), return_inverse=True)
+    sums = {name: np.bincount(inverse, weights=np.concatenate([values[name], new_values[name]]),
+                              minlength=len(merged)).astype(np.int64)
+            for name in values}
+    return merged, sums
+
+
+class _Rollup:
+    SKILL_FIELDS = ("count", "ads", "core", "samples")
+    TITLE_FIELDS = ("ad_count", "analyses")
+
+    def __init__(self, granularity: str):
+        self.granularity = granularity
+        self.skill_rows = self.analysis_rows = 0  # Watermarks: rows already rolled in
+        self.skill_keys = np.zeros(0, dtype=np.int64)
+        self.skill_sums = {name: np.zeros(0, dtype=np.int64) for name in self.SKILL_FIELDS}
+        self.title_keys = np.zeros(0, dtype=np.int64)
+        self.title_sums = {name: np.zeros(0, dtype=np.int64) for name in self.TITLE_FIELDS}
+        self._pending = []  # (skills, analyses) added but not merged yet
+
+    def add(self, skills: dict, analyses: dict):
+        self._pending.append((skills, analyses))
+
+    # Merge the buffered rows into the sorted keys in one pass
+    def fold(self):
+        if not self._pending:
+            return
+        skills = {c: np.concatenate([s[c] for s, _ in self._pending]) for c in SKILL_COLUMNS}
+        analyses = {c: np.concatenate([a[c] for _, a in self._pending]) for c in ANALYSIS_COLUMNS}
+        self._pending = []
+        if len(skills["t"]):
+            periods = period_index(skills["t"], self.granularity)
+            keys = ((skills["title"].astype(np.int64) << TITLE_SHIFT)
+                    | (skills["skill"].astype(np.int64) << SKILL_SHIFT) | periods)
+            new = {"count": skills["count"], "ads": skills["ads"], "core": skills["core"],
+                   "samples": np.ones(len(keys))}
+            self.skill_keys, self.skill_sums = _merge(self.skill_keys, self.skill_sums, keys, new)
+        if len(analyses["t"]):
+            periods = period_index(analyses["t"], self.granularity)
+            keys = (analyses["title"].astype(np.int64) << TITLE_SHIFT) | periods
+            new = {"ad_count": analyses["ad_count"], "analyses": np.ones(len(keys))}
+            self.title_keys, self.title_sums = _merge(self.title_keys, self.title_sums, keys, new)
+        self.skill_rows += len(skills["t"])
+        self.analysis_rows += len(analyses["t"])
+
+    def save(self, path: str):
+        self.fold()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, watermark=np.array([self.skill_rows, self.analysis_rows]),
+                     skill_keys=self.skill_keys, title_keys=self.title_keys,
+                     **{f"skill_{k}": v for k, v in self.skill_sums.items()},
+                     **{f"title_{k}": v for k, v in self.title_sums.items()})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, granularity: str) -> "_Rollup":
+        rollup = cls(granularity)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                rollup.skill_rows, rollup.analysis_rows = (int(n) for n in data["watermark"])
+                rollup.skill_keys, rollup.title_keys = data["skill_keys"], data["title_keys"]
+                rollup.skill_sums = {k: data[f"skill_{k}"] for k in cls.SKILL_FIELDS}
+                rollup.title_sums = {k: data[f"title_{k}"] for k in cls.TITLE_FIELDS}
+        return rollup
+
+
+class SkillTrendStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._names_path = os.path.join(directory, "names.json")
+        names = {"titles": [], "skills": []}
+        if os.path.exists(self._names_path):
+            with open(self._names_path, encoding="utf-8") as f:
+                names = json.load(f)
+        self.titles: list[str] = names["titles"]  # Display names, by id
+        self.skills: list[str] = names["skills"]
+        self._title_ids = {normalize_keyword(t): i for i, t in enumerate(self.titles)}
+        self._skill_ids = {normalize_skill_key(s): i for i, s in enumerate(self.skills)}
+
+        self._skill_table = _Table(os.path.join(directory, "skills"), SKILL_COLUMNS)
+        self._analysis_table = _Table(os.path.join(directory, "analyses"), ANALYSIS_COLUMNS)
+        self._rollups = {g: self._load_rollup(g) for g in (WEEK, MONTH)}
+        self._unsaved = 0  # Appends since the rollups were last saved
+
+    def _rollup_path(self, granularity: str) -> str:
+        return os.path.join(self.directory, f"rollup_{granularity}.npz")
+
+    def _load_rollup(self, granularity: str) -> _Rollup:
+        rollup = _Rollup.load(self._rollup_path(granularity), granularity)
+        if rollup.skill_rows > self._skill_table.rows or rollup.analysis_rows > self._analysis_table.rows:
+            rollup = _Rollup(granularity)  # Rows were cut back after the rollup was saved: rebuild
+        if rollup.skill_rows < self._skill_table.rows or rollup.analysis_rows < self._analysis_table.rows:
+            rollup.add(self._skill_table.read(rollup.skill_rows), self._analysis_table.read(rollup.analysis_rows))
+            rollup.save(self._rollup_path(granularity))
+        return rollup
+
+    def _intern(self, ids: dict, names: list, key: str, name: str) -> int:
+        if key not in ids:
+            ids[key] = len(names)
+            names.append(name)
+        return ids[key]
+
+    def _save_names(self):
+        tmp_path = f"{self._names_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"titles": self.titles, "skills": self.skills}, f, ensure_ascii=False)
+        os.replace(tmp_path, self._names_path)
+
+    def append(self, analysis: dict):
+        rows = [(item, field == "core") for field in ("core", "optional") for item in analysis.get(field, [])
+                if isinstance(item, dict) and isinstance(item.get("skill"), str)]
+        t = float(analysis.get("generated_at") or 0)
+        with self._lock:
+            known = len(self.titles) + len(self.skills)
+            title = self._intern(self._title_ids, self.titles, normalize_keyword(analysis["job_title"]),
+                                 analysis["job_title"])
+            skill_ids = [self._intern(self._skill_ids, self.skills, normalize_skill_key(item["skill"]), item["skill"])
+                         for item, _ in rows]
+            if len(self.titles) + len(self.skills) > known:
+                self._save_names()  # Before the rows, so every stored id has a name
+
+            skills = {
+                "t": np.full(len(rows), t), "title": np.full(len(rows), title), "skill": skill_ids,
+                "count": [item.get("count", 0) for item, _ in rows],
+                "ads": [item.get("ads", 0) for item, _ in rows],
+                "core": [core for _, core in rows],
+            }
+            analyses = {"t": [t], "title": [title], "ad_count": [analysis.get("ad_count", 0)]}
+            self._skill_table.append(skills)
+            self._analysis_table.append(analyses)
+
+            skills = {column: np.asarray(values, dtype=SKILL_COLUMNS[column]) for column, values in skills.items()}
+            analyses = {column: np.asarray(values, dtype=ANALYSIS_COLUMNS[column]) for column, values in analyses.items()}
+            for rollup in self._rollups.values():
+                rollup.add(skills, analyses)
+            self._unsaved += 1
+            if self._unsaved >= ROLLUP_SAVE_EVERY:
+                self._save_rollups()
+
+    def _save_rollups(self):
+        for granularity, rollup in self._rollups.items():
+            rollup.save(self._rollup_path(granularity))
+        self._unsaved = 0
+
+    # Saves the rollups so the next start does not re-read the unsaved rows
+    def close(self):
+        with self._lock:
+            if self._unsaved:
+                self._save_rollups()
+
+    def title_id(self, title: str) -> int | None:
+        return self._title_ids.get(normalize_keyword(title))
+
+    def _range(self, keys: np.ndarray, low: int, high: int) -> slice:
+        return slice(int(np.searchsorted(keys, low)), int(np.searchsorted(keys, high)))
+
+    # Per period and skill: ads mentioning the skill, ads analyzed for the
+    # title in that period, their ratio (ad_pct), mentions, and how often the
+    # skill was classified as core
+    def trend(self, title: str, skills: list[str] | None = None, granularity: str = WEEK,
+              start: date | None = None, end: date | None = None) -> list[dict]:
+        title_id = self.title_id(title)
+        if title_id is None:
+            return []
+        first = int(period_index(_timestamp(start), granularity)) if start else 0
+        last = int(period_index(_timestamp(end), granularity)) if end else PERIOD_MASK
+
+        with self._lock:
+            rollup = self._rollups[granularity]
+            rollup.fold()
+            base = title_id << TITLE_SHIFT
+            rows = self._range(rollup.skill_keys, base, base + (1 << TITLE_SHIFT))
+            keys = rollup.skill_keys[rows]
+            sums = {name: values[rows] for name, values in rollup.skill_sums.items()}
+            title_rows = self._range(rollup.title_keys, base + first, base + last + 1)
+            ad_counts = dict(zip((rollup.title_keys[title_rows] & PERIOD_MASK).tolist(),
+                                 rollup.title_sums["ad_count"][title_rows].tolist()))
+
+        periods = keys & PERIOD_MASK
+        skill_ids = (keys >> SKILL_SHIFT) & SKILL_MASK
+        mask = (periods >= first) & (periods <= last)
+        if skills is not None:
+            wanted = [self._skill_ids[k] for k in map(normalize_skill_key, skills) if k in self._skill_ids]
+            mask &= np.isin(skill_ids, wanted)
+
+        result = []
+        for i in np.flatnonzero(mask):
+            period = int(periods[i])
+            ad_count = ad_counts.get(period, 0)
+            result.append({
+                "period": period_start(period, granularity).isoformat(),
+                "skill": self.skills[int(skill_ids[i])],
+                "ads": int(sums["ads"][i]),
+                "ad_count": ad_count,
+                "ad_pct": round(100 * int(sums["ads"][i]) / ad_count, 1) if ad_count else 0.0,
+                "mentions": int(sums["count"][i]),
+                "core_share": round(int(sums["core"][i]) / int(sums["samples"][i]), 2),
+            })
+        result.sort(key=lambda r: (r["period"], r["skill"]))
+        return result
+
+    # Skills mentioned in the most ads for a title within a time range
+    def top_skills(self, title: str, granularity: str = MONTH, start: date | None = None,
+                   end: date | None = None, k: int = 5) -> list[str]:
+        totals = {}
+        for row in self.trend(title, None, granularity, start, end):
+            totals[row["skill"]] = totals.get(row["skill"], 0) + row["ads"]
+        return sorted(totals, key=totals.get, reverse=True)[:k]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_trend_store() -> SkillTrendStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SkillTrendStore(os.getenv("SKILL_MATCHER_TREND_STORE", DEFAULT_TREND_STORE_PATH))
+            atexit.register(_store.close)
+        return _store
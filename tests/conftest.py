@@ -0,0 +1,22 @@
+# Shared test setup
+#
+# The modules under test live at the repository root, and several of them
+# default to stores under ~/.cache/skill_matcher. Point every store and the
+# response cache at a throwaway directory before any of them is imported.
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_workdir = tempfile.mkdtemp(prefix="skill_matcher_tests_")
+os.environ.update({
+    "SKILL_MATCHER_CACHE": "0",
+    "SKILL_MATCHER_CACHE_DIR": _workdir,
+    "SKILL_MATCHER_JOB_STORE": os.path.join(_workdir, "job_ads.sqlite3"),
+    "SKILL_MATCHER_SNAPSHOT_STORE": os.path.join(_workdir, "market_snapshots.sqlite3"),
+    "SKILL_MATCHER_TREND_STORE": os.path.join(_workdir, "skill_trends"),
+    "SKILL_TAXONOMY_LEARNED": os.path.join(_workdir, "learned_skills.json"),
+})
@@ -0,0 +1,122 @@
+import io
+import json
+import threading
+
+import pytest
+from PyPDF2 import PdfWriter
+
+import batch_cv
+from batch_cv import analyze_cv_text, load_checkpoint, process_cv_batch
+
+
+def write_pdf(path):
+    writer = PdfWriter()
+    writer.add_blank_page(200, 200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    path.write_bytes(buffer.getvalue())
+    return str(path)
+
+
+def read_records(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class FakeAnalysis:
+    # Stands in for the LLM stages, which run on the batch's thread pool
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text, api_key, fused=False):
+        with self._lock:
+            self.calls += 1
+        return {"status": "ok", "parsed": {}, "standardized_skills": ["Python"], "esco_skills": {"Python": "Python"}}
+
+
+@pytest.fixture
+def cvs(tmp_path):
+    folder = tmp_path / "cvs"
+    folder.mkdir()
+    for name in ("a", "b", "c"):
+        write_pdf(folder / f"{name}.pdf")
+    (folder / "broken.pdf").write_bytes(b"not a pdf")
+    return folder
+
+
+def run(folder, output, **kwargs):
+    return process_cv_batch([str(folder)], str(output), "key", pdf_workers=2, llm_workers=2, progress=False, **kwargs)
+
+
+def test_batch_writes_one_record_per_cv_and_resumes(cvs, tmp_path, monkeypatch):
+    analysis = FakeAnalysis()
+    monkeypatch.setattr(batch_cv, "analyze_cv_text", analysis)
+    output = tmp_path / "results.jsonl"
+
+    summary = run(cvs, output)
+    records = {r["file"].rsplit("/", 1)[-1]: r for r in read_records(output)}
+    assert summary["processed"] == 4 and summary["errors"] == 1 and summary["skipped"] == 0
+    assert records["a.pdf"]["status"] == "ok" and len(records["a.pdf"]["sha256"]) == 64
+    assert records["broken.pdf"]["status"] == "error"
+    assert records["broken.pdf"]["error"].startswith("PDF extraction failed")
+    assert analysis.calls == 3
+
+    # A second run over the same checkpoint has nothing left to do
+    summary = run(cvs, output)
+    assert (summary["processed"], summary["skipped"]) == (0, 4)
+    assert analysis.calls == 3
+    assert len(read_records(output)) == 4
+
+
+def test_interrupted_run_resumes_after_partial_line(cvs, tmp_path, monkeypatch):
+    analysis = FakeAnalysis()
+    monkeypatch.setattr(batch_cv, "analyze_cv_text", analysis)
+    output = tmp_path / "results.jsonl"
+    done = {"file": str(cvs / "a.pdf"), "sha256": "x", "status": "ok"}
+    output.write_text(json.dumps(done) + "\n" + '{"file": "' + str(cvs / "b.pdf"), encoding="utf-8")
+
+    summary = run(cvs, output)
+    assert (summary["processed"], summary["skipped"]) == (3, 1)
+    assert analysis.calls == 2
+
+
+def test_retry_errors_reprocesses_failed_cvs(cvs, tmp_path, monkeypatch):
+    output = tmp_path / "results.jsonl"
+    monkeypatch.setattr(batch_cv, "analyze_cv_text", lambda *args: (_ for _ in ()).throw(RuntimeError("rate limited")))
+    summary = run(cvs, output)
+    assert summary["errors"] == 4
+    assert {r["error"] for r in read_records(output) if not r["file"].endswith("broken.pdf")} == {"rate limited"}
+
+    analysis = FakeAnalysis()
+    monkeypatch.setattr(batch_cv, "analyze_cv_text", analysis)
+    assert run(cvs, output)["processed"] == 0  # Errors are kept without --retry-errors
+
+    summary = run(cvs, output, retry_errors=True)
+    assert (summary["processed"], summary["errors"]) == (4, 1)
+    assert load_checkpoint(str(output), retry_errors=True) == {str(cvs / f"{n}.pdf") for n in "abc"}
+
+
+def test_load_checkpoint(tmp_path):
+    output = tmp_path / "results.jsonl"
+    assert load_checkpoint(str(output)) == set()
+    lines = [
+        {"file": "/cv/a.pdf", "status": "error"},
+        {"file": "/cv/a.pdf", "status": "ok"},  # Newer record of a retried CV
+        {"file": "/cv/b.pdf", "status": "error"},
+    ]
+    output.write_text("".join(json.dumps(r) + "\n" for r in lines) + '{"file": "/cv/c', encoding="utf-8")
+    assert load_checkpoint(str(output)) == {"/cv/a.pdf", "/cv/b.pdf"}
+    assert load_checkpoint(str(output), retry_errors=True) == {"/cv/a.pdf"}
+
+
+def test_analysis_error_records(monkeypatch):
+    monkeypatch.setattr(batch_cv, "parse_cv_with_gpt", lambda text, key: "Error calling OpenAI API: timeout")
+    assert analyze_cv_text("cv", "key") == {"status": "error", "error": "Error calling OpenAI API: timeout"}
+
+    parsed = {"programming_languages_and_technical_skills": ["python"]}
+    monkeypatch.setattr(batch_cv, "parse_cv_with_gpt", lambda text, key: json.dumps(parsed))
+    monkeypatch.setattr(batch_cv, "standardize_skill_mapping", lambda skills, key: {"python": "python"})
+    monkeypatch.setattr(batch_cv, "match_skills_to_esco_specific", lambda skills, key: {"error": "bad gateway"})
+    record = analyze_cv_text("cv", "key")
+    assert record["status"] == "error" and record["error"] == "bad gateway"
+    assert record["standardized_skills"] == ["python"]
@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+import pytest
+
+import job_ads_gpt
+from job_store import JobAdStore, job_key
+
+
+def ad(i: int, days_ago: int = 0, **fields) -> dict:
+    return {
+        "id": i,
+        "job_title": "Data Engineer",
+        "date_posted": (date.today() - timedelta(days=days_ago)).isoformat(),
+        "description": f"Ad {i}: Python, SQL and Airflow.",
+        **fields,
+    }
+
+
+class FakeSearch:
+    # Stand-in for the TheirStack search endpoint: newest first, paged by page/limit
+    def __init__(self, ads):
+        self.ads = sorted(ads, key=lambda a: a["date_posted"], reverse=True)
+        self.calls = []
+
+    def __call__(self, url, json, headers):
+        self.calls.append(dict(json))
+        ads = [a for a in self.ads if a["date_posted"] >= json.get("posted_at_gte", "")]
+        page, limit = json["page"], json["limit"]
+        return FakeResponse(ads[page * limit:(page + 1) * limit])
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"data": self.data}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = JobAdStore(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(job_ads_gpt, "get_job_store", lambda: store)
+    return store
+
+
+@pytest.mark.parametrize("max_jobs", [1, 25, 30, 60, 200])
+def test_pagination_returns_unique_ads(monkeypatch, max_jobs):
+    search = FakeSearch([ad(i) for i in range(80)])
+    monkeypatch.setattr(job_ads_gpt, "http_post", search)
+
+    jobs = list(job_ads_gpt.iter_theirstack_jobs("data engineer", "key", page_size=25, max_jobs=max_jobs))
+    assert len(jobs) == min(max_jobs, 80)
+    assert len({job["id"] for job in jobs}) == len(jobs)
+    # The page size stays fixed so page offsets line up
+    assert {call["limit"] for call in search.calls} == {25}
+
+
+def test_pagination_stops_on_short_page(monkeypatch):
+    search = FakeSearch([ad(i) for i in range(30)])
+    monkeypatch.setattr(job_ads_gpt, "http_post", search)
+
+    assert len(list(job_ads_gpt.iter_theirstack_jobs("x", "key", page_size=25, max_jobs=100))) == 30
+    assert [call["page"] for call in search.calls] == [0, 1]
+
+
+def test_refresh_fetches_only_newer_ads(store, monkeypatch):
+    search = FakeSearch([ad(i, days_ago=5) for i in range(10)])
+    monkeypatch.setattr(job_ads_gpt, "http_post", search)
+    assert job_ads_gpt.refresh_job_store("Data Engineer", "key") == 10
+
+    search.ads = [ad(i, days_ago=0) for i in range(10, 13)] + search.ads
+    search.calls.clear()
+    assert job_ads_gpt.refresh_job_store("data  engineer", "key") == 3
+    assert search.calls[0]["posted_at_gte"] == (date.today() - timedelta(days=5)).isoformat()
+    assert store.count("Data Engineer") == 13
+
+
+def test_dedup_by_id_and_by_content(store):
+    assert store.add_jobs("python developer", [ad(1), ad(2), ad(1)]) == 2
+    # The same text reposted under a new id is linked to the stored ad
+    assert store.add_jobs("backend developer", [ad(99, description=ad(1)["description"])]) == 0
+    assert store.count() == 2
+    assert store.count("backend developer") == 1
+    assert store.add_jobs("x", [ad(3, description="   "), {"id": 4}]) == 0
+
+
+def test_job_key_falls_back_to_content_hash():
+    assert job_key({"id": 7}) == "id:7"
+    assert job_key({"description": " same "}) == job_key({"description": "same"})
+
+
+def test_descriptions_keep_newest_in_oldest_first_order(store):
+    store.add_jobs("dev", [ad(i, days_ago=i, description=f"ad {i}") for i in range(5)])
+    assert store.descriptions("dev", limit=3) == ["ad 2", "ad 1", "ad 0"]
+    assert store.descriptions("dev", limit=10, max_age_days=1) == ["ad 1", "ad 0"]
+    assert store.latest_date_posted("DEV") == date.today().isoformat()
+
+
+def test_fetch_falls_back_to_stored_ads_on_network_error(store, monkeypatch):
+    store.add_jobs("dev", [ad(1, description="stored ad")])
+    monkeypatch.setattr(job_ads_gpt, "http_post", lambda *a, **k: (_ for _ in ()).throw(
+        job_ads_gpt.ConnectionError("unreachable")))
+    assert job_ads_gpt.fetch_theirstack_jobs("dev", theirstack_key="key") == ["stored ad"]
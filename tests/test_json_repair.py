@@ -0,0 +1,86 @@
+import pytest
+
+from json_repair import (
+    CLEAN, CLEANED, PARTIAL, decode_classification, decode_cv, decode_json, decode_skill_lists,
+    decode_skill_mapping, require_complete,
+)
+
+
+def test_bare_json_is_clean():
+    assert decode_json('["Python", "Docker"]') == (["Python", "Docker"], CLEAN)
+
+
+def test_fences_and_prose_are_stripped():
+    text = 'Here you go:\n```json\n{"a": [1, 2]}\n```\nAnything else?'
+    assert decode_json(text) == ({"a": [1, 2]}, CLEANED)
+
+
+def test_bracket_in_leading_prose_is_skipped():
+    assert decode_json('Result [sic]: {"ok": true}') == ({"ok": True}, CLEANED)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('["Python", "Dock', ["Python"]),
+    ('["Python", "Docker", ', ["Python", "Docker"]),
+    ('[["Python", "SQL"], ["Java", "Spr', [["Python", "SQL"], ["Java"]]),
+    ('{"a": "x", "b": ["y", "z"', {"a": "x", "b": ["y", "z"]}),
+    ('{"a": "x", "b": "unterminated', {"a": "x"}),
+    ('{"a": "x", "b"', {"a": "x"}),
+    ('```json\n{"a": {"b": [1, 2', {"a": {"b": [1]}}),  # "2" may be the start of "25"
+])
+def test_truncated_value_recovers_largest_prefix(text, expected):
+    value, status = decode_json(text)
+    assert status == PARTIAL
+    assert value == expected
+
+
+def test_escaped_quotes_do_not_end_strings():
+    value, status = decode_json('["say \\"hi\\", then", "b')
+    assert (value, status) == (['say "hi", then'], PARTIAL)
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        decode_json("I could not find any skills.")
+
+
+def test_require_complete_rejects_truncation():
+    assert require_complete('```\n[1]\n```') == [1]
+    with pytest.raises(ValueError):
+        require_complete("[1, 2")
+
+
+def test_skill_lists_drop_possibly_cut_last_list():
+    lists, missing = decode_skill_lists('[["Python"], ["SQL", "Docker"], ["Ja', expected=4)
+    assert lists == [["Python"], None, None, None]
+    assert missing == [1, 2, 3]
+
+
+def test_skill_lists_complete_with_wrong_length_raises():
+    with pytest.raises(ValueError):
+        decode_skill_lists('[["Python"]]', expected=2)
+
+
+def test_skill_mapping_reports_missing_only_when_truncated():
+    skills = ["k8s", "postgres", "js"]
+    mapping, missing = decode_skill_mapping('{"k8s": "Kubernetes", "postgres": "Postg', skills, "test_mapping")
+    assert mapping == {"k8s": "Kubernetes"}
+    assert missing == ["postgres", "js"]
+
+    mapping, missing = decode_skill_mapping('{"k8s": "Kubernetes"}', skills, "test_mapping")
+    assert missing == []
+
+
+def test_classification_missing_is_case_insensitive():
+    result, missing = decode_classification('{"core": ["python"], "optional": ["Dock', ["Python", "Docker", "SQL"])
+    assert result == {"core": ["python"], "optional": []}
+    assert missing == ["Docker", "SQL"]
+
+
+def test_cv_requests_absent_and_last_present_sections():
+    text = '{"work_experience": [{"title": "Dev"}], "education": [{"degree": "BSc"'
+    data, missing = decode_cv(text)
+    assert data["work_experience"] == [{"title": "Dev"}]
+    assert missing == [
+        "programming_languages_and_technical_skills", "projects", "certifications_and_languages", "education",
+    ]
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from json_stream import IncrementalJSONParser
+
+CV = {
+    "work_experience": [{"title": "Developer", "company": "Acme"}],
+    "programming_languages_and_technical_skills": ["Python", "Docker", "C#"],
+    "projects": [],
+}
+
+
+def feed_all(parser, text, chunk_size):
+    events = []
+    for i in range(0, len(text), chunk_size):
+        events.extend(parser.feed(text[i:i + chunk_size]))
+    return events
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1000])
+def test_events_do_not_depend_on_chunking(chunk_size):
+    text = json.dumps(CV)
+    parser = IncrementalJSONParser(max_depth=2)
+    events = feed_all(parser, text, chunk_size)
+
+    skills = [value for path, value in events
+              if len(path) == 2 and path[0] == "programming_languages_and_technical_skills"]
+    assert skills == ["Python", "Docker", "C#"]
+    assert (("programming_languages_and_technical_skills",), CV["programming_languages_and_technical_skills"]) in events
+    assert events[-1] == ((), CV)
+    assert parser.done and parser.result == CV
+
+
+def test_values_are_emitted_as_soon_as_they_close():
+    parser = IncrementalJSONParser(max_depth=2)
+    assert parser.feed('[["Python", "SQ') == [((0, 0), "Python")]
+    assert parser.feed('L"], ["Java"') == [((0, 1), "SQL"), ((0,), ["Python", "SQL"]), ((1, 0), "Java")]
+    assert parser.feed(']]') == [((1,), ["Java"]), ((), [["Python", "SQL"], ["Java"]])]
+
+
+def test_max_depth_limits_events():
+    parser = IncrementalJSONParser(max_depth=1)
+    events = parser.feed('{"a": [1, 2], "b": {"c": true}}')
+    assert [path for path, _ in events] == [("a",), ("b",), ()]
+
+
+def test_primitives_and_escapes():
+    parser = IncrementalJSONParser(max_depth=1)
+    events = parser.feed('[12, -3.5, true, null, "a \\"quoted\\" ]"]')
+    assert [value for path, value in events if path] == [12, -3.5, True, None, 'a "quoted" ]']
+
+
+def test_leading_prose_and_fences_are_skipped():
+    parser = IncrementalJSONParser(max_depth=1)
+    events = parser.feed('Sure!\n```json\n["Python"]\n```')
+    assert events == [((0,), "Python"), ((), ["Python"])]
+
+
+def test_mismatched_closer_raises():
+    parser = IncrementalJSONParser()
+    with pytest.raises(ValueError):
+        parser.feed('[1, 2}')
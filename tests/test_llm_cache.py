@@ -0,0 +1,130 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+from llm_cache import PRIVATE_STAGES, ResponseCache, cached_chat_completion
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class FakeClient:
+    def __init__(self, content='["Python"]'):
+        self.content = content
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **params):
+        self.calls += 1
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache, "time", clock)
+    return clock
+
+
+def keys(cache) -> list[str]:
+    return sorted(row[0] for row in cache._conn.execute("SELECT key FROM responses"))
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(":memory:", ttl_seconds=60)
+    cache.set("a", {"content": "x"})
+    clock.now += 60
+    assert cache.get("a") == {"content": "x"}
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entries_are_evicted_on_write(clock):
+    cache = ResponseCache(":memory:", ttl_seconds=60)
+    cache.set("old", {"content": "x"})
+    clock.now += 61
+    cache.set("new", {"content": "y"})
+    assert keys(cache) == ["new"]
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(":memory:", max_entries=2)
+    cache.set("a", {"content": "a"})
+    clock.now += 1
+    cache.set("b", {"content": "b"})
+    clock.now += 1
+    assert cache.get("a") is not None  # a is now more recent than b
+    clock.now += 1
+    cache.set("c", {"content": "c"})
+    assert keys(cache) == ["a", "c"]
+
+
+def test_size_cap_evicts_and_skips_oversized_values(clock):
+    value = {"content": "x" * 100}
+    size = len(json.dumps(value).encode("utf-8"))
+    cache = ResponseCache(":memory:", max_bytes=2 * size)
+    for key in ("a", "b", "c"):
+        cache.set(key, value)
+        clock.now += 1
+    assert keys(cache) == ["b", "c"]
+    assert cache.stats()["bytes"] == 2 * size
+
+    cache.set("huge", {"content": "x" * 1000})
+    assert keys(cache) == ["b", "c"]
+
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKILL_MATCHER_CACHE", "1")
+    monkeypatch.delenv("SKILL_MATCHER_CACHE_DISABLE", raising=False)
+    monkeypatch.delenv("SKILL_MATCHER_CACHE_PRIVATE", raising=False)
+    cache = ResponseCache(str(tmp_path / "llm_responses.sqlite3"))
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    return cache
+
+
+def ask(client, stage, text="same prompt"):
+    return cached_chat_completion(client, stage, [{"role": "user", "content": text}], model="m")
+
+
+def test_shared_stages_are_served_from_disk(disk_cache):
+    client = FakeClient()
+    assert ask(client, "extract_skills") == '["Python"]'
+    assert ask(client, "extract_skills") == '["Python"]'
+    assert client.calls == 1
+    assert disk_cache.stats()["entries"] == 1
+
+
+@pytest.mark.parametrize("stage", PRIVATE_STAGES)
+def test_private_stages_are_never_written_to_disk(disk_cache, stage):
+    client = FakeClient()
+    assert ask(client, stage, text="CV of Jane Doe") == '["Python"]'
+    assert ask(client, stage, text="CV of Jane Doe") == '["Python"]'
+    assert client.calls == 2
+    assert disk_cache.stats()["entries"] == 0
+
+
+def test_private_stages_can_be_cached_on_request(disk_cache, monkeypatch):
+    monkeypatch.setenv("SKILL_MATCHER_CACHE_PRIVATE", "1")
+    client = FakeClient()
+    ask(client, "parse_cv_with_gpt")
+    ask(client, "parse_cv_with_gpt")
+    assert client.calls == 1
+    assert disk_cache.stats()["entries"] == 1
+
+
+def test_disabled_stages_and_invalid_completions_are_not_cached(disk_cache, monkeypatch):
+    monkeypatch.setenv("SKILL_MATCHER_CACHE_DISABLE", "standardize_skills")
+    ask(FakeClient(), "standardize_skills")
+    cached_chat_completion(FakeClient("not json"), "extract_skills", [{"role": "user", "content": "x"}],
+                           model="m", validate=json.loads)
+    assert disk_cache.stats()["entries"] == 0
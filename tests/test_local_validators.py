@@ -0,0 +1,56 @@
+import pytest
+
+from local_validators import JobTitleLexicon, classify_job_title, classify_skill, looks_like_gibberish
+
+
+@pytest.mark.parametrize("word", [
+    "Projektledningsstrategi", "Försäljningsstrategi", "Hälsovårdsstrategier", "pwsh",
+])
+def test_swedish_compounds_and_rare_words_are_not_rejected(word):
+    assert looks_like_gibberish(word) is None
+    assert classify_skill(word) is None
+
+
+@pytest.mark.parametrize("text", ["sdfsdf", "lolo", "baba", "asdf", "qwerty", "lkjh", "1234", "!!!"])
+def test_gibberish_is_rejected(text):
+    assert looks_like_gibberish(text) is True
+    assert classify_skill(text) is False
+    assert classify_job_title(text) is False
+
+
+@pytest.mark.parametrize("text", ["Kubernetes", "SQL", "HTML5", "machine learning"])
+def test_plain_words_are_not_gibberish(text):
+    assert looks_like_gibberish(text) is False
+
+
+@pytest.mark.parametrize("title", [
+    "Senior Backend Developer", "systemutvecklare", "drifttekniker", "butikschef", "Head of Sales",
+    "lead data engineer",
+])
+def test_known_titles_are_accepted(title):
+    assert classify_job_title(title) is True
+
+
+@pytest.mark.parametrize("title", ["Försäljningsstrateg", "banana developer", "xyzzy engineer"])
+def test_ambiguous_titles_go_to_gpt(title):
+    assert classify_job_title(title) is None
+
+
+def test_head_noun_needs_known_modifiers():
+    lexicon = JobTitleLexicon(["data engineer"], ["engineer", "utvecklare"])
+    assert lexicon.has_head_noun("data engineer")
+    assert not lexicon.has_head_noun("banana engineer")
+    assert lexicon.has_head_noun("banana engineer", known={"banana"})
+    assert lexicon.has_head_noun("senior engineer")
+    assert lexicon.has_head_noun("datautvecklare")
+    assert not lexicon.has_head_noun("xyzzyutvecklare")
+
+
+def test_fuzzy_title_match():
+    lexicon = JobTitleLexicon(["software developer"], [])
+    assert lexicon.fuzzy_match("sofware developer") == "software developer"
+    assert lexicon.fuzzy_match("gardener") is None
+
+
+def test_empty_skill_is_rejected():
+    assert classify_skill("   ") is False
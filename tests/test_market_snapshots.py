@@ -0,0 +1,41 @@
+import time
+
+from market_snapshots import MarketSnapshotService
+
+
+def analysis(title: str, generated_at: float | None = None) -> dict:
+    return {"job_title": title, "generated_at": generated_at or time.time(), "core": [{"skill": "Python"}],
+            "optional": []}
+
+
+def test_no_titles_means_no_background_work(tmp_path):
+    calls = []
+    service = MarketSnapshotService(str(tmp_path / "s.sqlite3"), [""], calls.append)
+    service.start(check_every=0.01)
+    time.sleep(0.05)
+    assert service._scheduler is None
+    assert calls == []
+    assert service.get("software developer") is None
+
+
+def test_configured_title_is_precomputed_and_served(tmp_path):
+    service = MarketSnapshotService(str(tmp_path / "s.sqlite3"), ["Data Engineer"], analysis)
+    assert service.get("data engineer") is None
+    service.refresh("data engineer")
+    assert service.get("Data  Engineer")["job_title"] == "Data Engineer"
+    assert service.get("nurse") is None
+
+
+def test_stale_snapshot_is_served_while_refreshing(tmp_path):
+    refreshed = []
+
+    def analyze(title):
+        refreshed.append(title)
+        return analysis(title)
+
+    service = MarketSnapshotService(str(tmp_path / "s.sqlite3"), ["Data Engineer"], analyze, refresh_interval=60)
+    service._save("data engineer", analysis("Data Engineer", generated_at=time.time() - 120))
+    assert service.get("data engineer") is not None
+    service._executor.shutdown(wait=True)
+    assert refreshed == ["Data Engineer"]
+    assert not service.is_stale(service.get("data engineer"))
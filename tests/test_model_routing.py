@@ -0,0 +1,38 @@
+import importlib
+
+import pytest
+
+import model_routing
+
+
+@pytest.fixture
+def reload_routing(monkeypatch):
+    for name in ("SKILL_MATCHER_MODEL", "SKILL_MATCHER_FAST_MODEL", "SKILL_MATCHER_MODEL_ROUTES"):
+        monkeypatch.delenv(name, raising=False)
+
+    def reload(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(model_routing)
+
+    yield reload
+    monkeypatch.undo()
+    importlib.reload(model_routing)
+
+
+def test_every_stage_uses_the_default_model_unless_configured(reload_routing):
+    routing = reload_routing()
+    assert routing.model_for("validate_job_title_with_gpt") == routing.DEFAULT_MODEL
+    assert routing.model_for("extract_skills") == routing.DEFAULT_MODEL
+
+
+def test_fast_model_is_opt_in(reload_routing):
+    routing = reload_routing(SKILL_MATCHER_MODEL="big", SKILL_MATCHER_FAST_MODEL="small")
+    assert routing.model_for("validate_skills_with_gpt") == "small"
+    assert routing.model_for("classify_skills") == "big"
+
+
+def test_route_overrides(reload_routing):
+    routing = reload_routing(SKILL_MATCHER_MODEL_ROUTES="classify_skills=x, bad, validate_skills_with_gpt = y")
+    assert routing.model_for("classify_skills") == "x"
+    assert routing.model_for("validate_skills_with_gpt") == "y"
@@ -0,0 +1,47 @@
+import io
+import time
+
+import pytest
+from PyPDF2 import PdfWriter
+from PyPDF2.errors import PdfReadError
+
+import cv_gpt_4_parser
+from cv_gpt_4_parser import extract_text_from_pdf
+
+
+def blank_pdf(pages: int) -> bytes:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(200, 200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def test_long_documents_use_worker_processes(monkeypatch):
+    calls = []
+    real = cv_gpt_4_parser._extract_pages_parallel
+    monkeypatch.setattr(cv_gpt_4_parser, "_extract_pages_parallel",
+                        lambda *args: calls.append(args[1]) or real(*args))
+    assert extract_text_from_pdf(io.BytesIO(blank_pdf(20)), parallel_min_pages=16) == ""
+    assert extract_text_from_pdf(io.BytesIO(blank_pdf(3)), parallel_min_pages=16) == ""
+    assert calls == [20]
+
+
+def stuck_page_range(data, start, stop):
+    time.sleep(30)
+
+
+def test_time_budget_terminates_stuck_workers(monkeypatch):
+    monkeypatch.setattr(cv_gpt_4_parser, "_extract_page_range", stuck_page_range)
+    start = time.monotonic()
+    with pytest.raises(ValueError, match="longer than the 0.5 s limit"):
+        extract_text_from_pdf(io.BytesIO(blank_pdf(4)), time_budget=0.5, parallel_min_pages=2)
+    assert time.monotonic() - start < 10
+
+
+def test_limits_and_malformed_files():
+    with pytest.raises(ValueError, match="MB limit"):
+        extract_text_from_pdf(io.BytesIO(blank_pdf(1)), max_bytes=10)
+    with pytest.raises(PdfReadError):
+        extract_text_from_pdf(io.BytesIO(b"not a pdf"))
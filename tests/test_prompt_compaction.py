@@ -0,0 +1,58 @@
+import zlib
+
+import numpy as np
+
+from prompt_compaction import (
+    _MERSENNE_PRIME, _PERM_A, _PERM_B, _drop_translation, compact_job_ads, minhash_signature,
+)
+
+SWEDISH = "Vi söker en utvecklare med erfarenhet av Java, Kubernetes, AWS och CI/CD. Du har minst 5 års erfarenhet."
+ENGLISH = "We are looking for a developer with experience in Java, Kubernetes, AWS and CI/CD. You have at least 5 years of experience."
+
+
+def test_translation_is_dropped():
+    assert _drop_translation([SWEDISH, ENGLISH]) == [ENGLISH]
+
+
+def test_swedish_only_requirements_are_kept():
+    paragraphs = [
+        "About the team: we are a friendly team in Gothenburg who love to build things together.",
+        "Du har erfarenhet av Java och Kubernetes och gillar att arbeta i team.",
+    ]
+    assert _drop_translation(paragraphs) == paragraphs
+
+
+def test_minhash_matches_exact_arithmetic():
+    words = "python java docker kubernetes aws terraform".split()
+    shingles = {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+    expected = [min((zlib.crc32(s.encode()) * int(a) + int(b)) % _MERSENNE_PRIME for s in shingles)
+                for a, b in zip(_PERM_A, _PERM_B)]
+    assert minhash_signature(" ".join(words)).tolist() == expected
+
+
+def test_reposted_ad_is_removed():
+    ad = "Backend developer. " + " ".join(f"Experience with tool{i}." for i in range(40))
+    result, report = compact_job_ads([ad, ad.replace("tool39", "tool39!"), "Nurse. Triage and care planning."])
+    assert len(result) == 2
+    assert report["duplicates_removed"] == 1
+    assert np.all(minhash_signature(result[0]) == minhash_signature(ad))
+
+
+def test_skipped_section_ends_at_next_heading():
+    ad = ("<p>We offer</p><ul><li>Competitive salary</li></ul>"
+          "<p>What you bring</p><ul><li>5+ years of Python and Kubernetes</li></ul>")
+    result, report = compact_job_ads([ad])
+    assert result == ["What you bring\n- 5+ years of Python and Kubernetes"]
+    assert report["ads_out"] == 1
+
+
+def test_swedish_skipped_section_ends_at_next_heading():
+    ad = "<p>Om oss</p><p>Vi är ett bolag i Göteborg.</p><p>Vad du gör</p><p>Du utvecklar i Java.</p>"
+    result, _ = compact_job_ads([ad])
+    assert result == ["Vad du gör\nDu utvecklar i Java."]
+
+
+def test_ad_is_never_compacted_to_nothing():
+    result, report = compact_job_ads(["<p>Om oss</p><p>Vi bygger system för sjukvården.</p>"])
+    assert result == ["Om oss\nVi bygger system för sjukvården."]
+    assert report["ads_out"] == 1
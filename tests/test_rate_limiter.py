@@ -0,0 +1,151 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limiter
+from rate_limiter import BATCH, INTERACTIVE, EndpointLimiter, call_with_backoff
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def flaky(*outcomes):
+    # Returns each outcome in turn, raising the exceptions among them
+    calls = []
+
+    def fn():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    fn.calls = calls
+    return fn
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = EndpointLimiter("test", rate=1000.0, burst=1000, max_concurrency=4)
+    monkeypatch.setitem(rate_limiter._limiters, "test", limiter)
+    return limiter
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=time.monotonic, sleep=sleeps.append))
+    return sleeps
+
+
+def wait_for_queue(limiter, depth):
+    deadline = time.monotonic() + 5
+    while limiter.metrics()["queue_depth"] < depth:
+        assert time.monotonic() < deadline, "waiter never queued"
+        time.sleep(0.001)
+
+
+def test_interactive_waiters_go_before_batch():
+    limiter = EndpointLimiter("test", rate=1000.0, burst=1000, max_concurrency=1)
+    limiter.acquire()
+    order = []
+
+    def wait(priority):
+        limiter.acquire(priority)
+        order.append(priority)
+        limiter.release()
+
+    threads = []
+    for depth, priority in enumerate((BATCH, BATCH, INTERACTIVE), start=1):
+        threads.append(threading.Thread(target=wait, args=(priority,)))
+        threads[-1].start()
+        wait_for_queue(limiter, depth)
+
+    limiter.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == [INTERACTIVE, BATCH, BATCH]
+
+
+def test_throttling_halves_concurrency_and_success_grows_it():
+    limiter = EndpointLimiter("test", rate=1000.0, burst=8, max_concurrency=8, min_concurrency=1)
+    assert limiter.concurrency_limit == 8
+
+    for expected in (4, 2, 1, 1):
+        limiter.acquire()
+        limiter.release(throttled=True)
+        assert limiter.concurrency_limit == expected
+    assert limiter.throttled == 4
+    assert limiter.metrics()["tokens"] <= 0
+
+    limiter._tokens = 8.0
+    limiter.acquire()
+    limiter.release()
+    assert limiter.concurrency_limit == 2
+    limiter.acquire()
+    limiter.release()
+    assert limiter.concurrency_limit == 2.5
+
+
+def test_retry_after_is_honoured(limiter, sleeps):
+    fn = flaky(FakeHTTPError(429, retry_after="2"), FakeHTTPError(503, retry_after="120"), "ok")
+    retries = []
+    assert call_with_backoff("test", fn, on_retry=lambda: retries.append(1)) == "ok"
+    assert sleeps == [2.0, rate_limiter.BACKOFF_CAP]
+    assert len(retries) == 2
+    assert (limiter.retries, limiter.failures, limiter.throttled) == (2, 0, 2)
+    assert limiter.concurrency_limit < 4
+
+
+def test_server_and_connection_errors_use_jittered_backoff(limiter, sleeps):
+    fn = flaky(FakeHTTPError(500), ConnectionError("reset"), "ok")
+    assert call_with_backoff("test", fn) == "ok"
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= rate_limiter.BACKOFF_BASE
+    assert 0 <= sleeps[1] <= rate_limiter.BACKOFF_BASE * 2
+    assert limiter.throttled == 0
+
+
+def test_payment_required_is_not_retried(limiter, sleeps):
+    fn = flaky(FakeHTTPError(402), "ok")
+    with pytest.raises(FakeHTTPError):
+        call_with_backoff("test", fn)
+    assert len(fn.calls) == 1
+    assert sleeps == []
+    assert (limiter.retries, limiter.failures) == (0, 1)
+    assert limiter.metrics()["in_flight"] == 0
+
+
+def test_gives_up_after_max_retries(limiter, sleeps):
+    fn = flaky(*[FakeHTTPError(502)] * 3)
+    with pytest.raises(FakeHTTPError):
+        call_with_backoff("test", fn, max_retries=2)
+    assert len(fn.calls) == 3
+    assert (limiter.retries, limiter.failures) == (2, 1)
+
+
+def test_retryable_responses_are_closed_and_last_is_returned(limiter, sleeps):
+    first, second, third = FakeResponse(429), FakeResponse(500), FakeResponse(200)
+    assert call_with_backoff("test", flaky(first, second, third)) is third
+    assert first.closed and second.closed and not third.closed
+
+    last = FakeResponse(503)
+    assert call_with_backoff("test", flaky(FakeResponse(503), last), max_retries=1) is last
+    assert not last.closed
+    assert call_with_backoff("test", flaky(FakeResponse(402))).status_code == 402
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def wait_for_followers(flights, count):
+    deadline = time.monotonic() + 5
+    while flights.metrics()["followers"] < count:
+        assert time.monotonic() < deadline, "follower never joined"
+        time.sleep(0.001)
+
+
+def run_followers(flights, key, count):
+    # Starts followers on key and returns what each of them got
+    outcomes = []
+
+    def follow():
+        try:
+            outcomes.append(flights.do_shared(key, lambda: "computed by a follower"))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=follow) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    wait_for_followers(flights, count)
+    return threads, outcomes
+
+
+def test_concurrent_callers_share_one_computation():
+    flights = SingleFlight("test")
+    release = threading.Event()
+    calls = []
+    leader = {}
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"skills": ["Python"]}
+
+    thread = threading.Thread(target=lambda: leader.update(outcome=flights.do_shared("title", compute)))
+    thread.start()
+    while not calls:
+        time.sleep(0.001)
+    threads, outcomes = run_followers(flights, "title", 2)
+
+    release.set()
+    for t in threads + [thread]:
+        t.join(5)
+    assert calls == [1]
+    assert leader["outcome"] == ({"skills": ["Python"]}, False)
+    assert outcomes == [({"skills": ["Python"]}, True)] * 2
+    assert outcomes[0][0] is leader["outcome"][0]
+    assert flights.metrics() == {"in_flight": 0, "leaders": 1, "followers": 2}
+
+
+def test_followers_receive_the_leaders_exception():
+    flights = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+    error = RuntimeError("rate limited")
+    leader = {}
+
+    def compute():
+        started.set()
+        release.wait(5)
+        raise error
+
+    def lead():
+        try:
+            flights.do("title", compute)
+        except RuntimeError as e:
+            leader["error"] = e
+
+    thread = threading.Thread(target=lead)
+    thread.start()
+    started.wait(5)
+    threads, outcomes = run_followers(flights, "title", 2)
+
+    release.set()
+    for t in threads + [thread]:
+        t.join(5)
+    assert leader["error"] is error
+    assert outcomes == [error, error]
+
+
+def test_nothing_is_kept_after_the_call():
+    flights = SingleFlight("test")
+    assert flights.do_shared("a", lambda: 1) == (1, False)
+    assert flights.do_shared("a", lambda: 2) == (2, False)
+    with pytest.raises(ValueError):
+        flights.do("a", lambda: int("x"))
+    assert flights.do("a", lambda: 3) == 3
+    assert flights.metrics() == {"in_flight": 0, "leaders": 4, "followers": 0}
@@ -0,0 +1,84 @@
+import os
+from datetime import date, datetime, timezone
+
+import pytest
+
+from skill_trends import MONTH, WEEK, SkillTrendStore
+
+
+def ts(day: date) -> float:
+    return datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc).timestamp()
+
+
+def analysis(day: date, title="Data Engineer", ad_count=10, core=(), optional=()) -> dict:
+    return {
+        "job_title": title,
+        "generated_at": ts(day),
+        "ad_count": ad_count,
+        "core": [{"skill": s, "count": c, "ads": a} for s, c, a in core],
+        "optional": [{"skill": s, "count": c, "ads": a} for s, c, a in optional],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SkillTrendStore(str(tmp_path / "trends"))
+    store.append(analysis(date(2026, 3, 2), core=[("Kubernetes", 6, 4)], optional=[("Go", 1, 1)]))
+    store.append(analysis(date(2026, 3, 4), core=[("Kubernetes", 3, 2)]))
+    store.append(analysis(date(2026, 4, 15), ad_count=20, optional=[("kubernetes", 5, 5)]))
+    store.append(analysis(date(2026, 4, 15), title="Nurse", core=[("Triage", 2, 2)]))
+    return store
+
+
+def test_monthly_rollup_sums_ads_and_core_share(store):
+    rows = store.trend("data engineer", ["Kubernetes"], MONTH)
+    assert rows == [
+        {"period": "2026-03-01", "skill": "Kubernetes", "ads": 6, "ad_count": 20, "ad_pct": 30.0,
+         "mentions": 9, "core_share": 1.0},
+        {"period": "2026-04-01", "skill": "Kubernetes", "ads": 5, "ad_count": 20, "ad_pct": 25.0,
+         "mentions": 5, "core_share": 0.0},
+    ]
+
+
+def test_weeks_start_on_monday(store):
+    rows = store.trend("Data Engineer", ["Go"], WEEK)
+    assert [(r["period"], r["ads"]) for r in rows] == [("2026-03-02", 1)]
+    assert date.fromisoformat(rows[0]["period"]).weekday() == 0
+
+
+def test_range_and_title_filters(store):
+    rows = store.trend("Data Engineer", None, MONTH, start=date(2026, 4, 1))
+    assert {r["period"] for r in rows} == {"2026-04-01"}
+    assert store.trend("Nurse", None, MONTH)[0]["skill"] == "Triage"
+    assert store.trend("Unknown title", None, MONTH) == []
+    assert store.top_skills("Data Engineer", k=1) == ["Kubernetes"]
+
+
+def test_reopen_replays_unsaved_rows(store, tmp_path):
+    expected = store.trend("Data Engineer", None, WEEK)
+    # Fewer appends than ROLLUP_SAVE_EVERY: nothing is saved until close
+    assert not os.path.exists(store._rollup_path(WEEK))
+    assert SkillTrendStore(store.directory).trend("Data Engineer", None, WEEK) == expected
+
+    store.close()
+    assert os.path.exists(store._rollup_path(WEEK))
+    reopened = SkillTrendStore(store.directory)
+    assert reopened._rollups[WEEK].skill_rows == 5
+    assert reopened.trend("Data Engineer", None, WEEK) == expected
+
+
+def test_rollup_rebuilds_after_columns_are_cut_back(store):
+    store.close()
+    # An interrupted append leaves one column longer than the others
+    with open(os.path.join(store.directory, "skills", "t.bin"), "ab") as f:
+        f.write(b"\0" * 8)
+    reopened = SkillTrendStore(store.directory)
+    assert reopened._skill_table.rows == 5
+    assert reopened.trend("Data Engineer", None, MONTH) == store.trend("Data Engineer", None, MONTH)
+
+
+def test_appends_after_query_are_merged(store):
+    store.trend("Data Engineer", None, MONTH)
+    store.append(analysis(date(2026, 4, 20), ad_count=5, core=[("Kubernetes", 1, 1)]))
+    april = store.trend("Data Engineer", ["Kubernetes"], MONTH, start=date(2026, 4, 1))[0]
+    assert (april["ads"], april["ad_count"], april["core_share"]) == (6, 25, 0.5)
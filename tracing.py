@@ -0,0 +1,246 @@
+# Lightweight timing, token and cache instrumentation for the pipeline
+#
+# Every traced stage (PDF extraction, the TheirStack fetch and each GPT
+# helper, recorded in llm_cache under its stage name) adds one span with its
+# wall time, prompt/completion tokens from response.usage, cache hit,
+# coalescing with an identical in-flight call and retries. Spans are aggregated per stage for the whole process and per
+# session (the Streamlit session id, set with set_session()).
+#
+#   with trace_span("fetch_theirstack_jobs") as span:
+#       ...
+#       span["retries"] += 1
+#
+# Metrics can be read with metrics_snapshot(), rendered as Prometheus text
+# with prometheus_text(), written to a file with export_metrics() or served
+# over HTTP with start_metrics_server().
+#
+# Configuration (environment variables):
+#   SKILL_MATCHER_METRICS_FILE   write metrics here on export_metrics()
+#                                (".prom" for Prometheus text, JSON otherwise)
+#   SKILL_MATCHER_METRICS_PORT   serve /metrics and /metrics.json on this port
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROCESS_SESSION = "process"
+MAX_SESSIONS = 200  # Oldest session aggregates are dropped beyond this
+DURATION_SAMPLES = 1000  # Recent durations kept per stage for percentiles
+
+_session = contextvars.ContextVar("trace_session", default=PROCESS_SESSION)
+_lock = threading.Lock()
+_process_stats: dict[str, dict] = {}
+_session_stats: dict[str, dict[str, dict]] = {}
+_durations: dict[str, deque] = {}
+_started_at = time.time()
+_sources: dict[str, object] = {}
+
+
+def set_session(session_id: str):
+    _session.set(session_id or PROCESS_SESSION)
+
+
+def current_session() -> str:
+    return _session.get()
+
+
+def _empty_stats() -> dict:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "cache_hits": 0,
+        "coalesced": 0,
+        "retries": 0,
+        "wall_s": 0.0,
+        "max_wall_s": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+    }
+
+
+def _add(stats: dict, wall_s: float, error: bool, cache_hit: bool, coalesced: bool, retries: int,
+         prompt_tokens: int, completion_tokens: int):
+    stats["calls"] += 1
+    stats["errors"] += int(error)
+    stats["cache_hits"] += int(cache_hit)
+    stats["coalesced"] += int(coalesced)
+    stats["retries"] += retries
+    stats["wall_s"] += wall_s
+    stats["max_wall_s"] = max(stats["max_wall_s"], wall_s)
+    stats["prompt_tokens"] += prompt_tokens or 0
+    stats["completion_tokens"] += completion_tokens or 0
+
+
+def record(stage: str, wall_s: float, error: bool = False, cache_hit: bool = False, coalesced: bool = False,
+           retries: int = 0, prompt_tokens: int = 0, completion_tokens: int = 0, session: str | None = None):
+    session = session or current_session()
+    with _lock:
+        _add(_process_stats.setdefault(stage, _empty_stats()),
+             wall_s, error, cache_hit, coalesced, retries, prompt_tokens, completion_tokens)
+        _durations.setdefault(stage, deque(maxlen=DURATION_SAMPLES)).append(wall_s)
+        if session != PROCESS_SESSION:
+            if session not in _session_stats and len(_session_stats) >= MAX_SESSIONS:
+                _session_stats.pop(next(iter(_session_stats)))
+            _add(_session_stats.setdefault(session, {}).setdefault(stage, _empty_stats()),
+                 wall_s, error, cache_hit, coalesced, retries, prompt_tokens, completion_tokens)
+
+
+# Retries that happen outside a single span (e.g. re-running failed chunks)
+def record_retries(stage: str, count: int = 1, session: str | None = None):
+    session = session or current_session()
+    with _lock:
+        _process_stats.setdefault(stage, _empty_stats())["retries"] += count
+        if session != PROCESS_SESSION and session in _session_stats:
+            _session_stats[session].setdefault(stage, _empty_stats())["retries"] += count
+
+
+@contextmanager
+def trace_span(stage: str):
+    span = {"cache_hit": False, "coalesced": False, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    start = time.perf_counter()
+    error = False
+    try:
+        yield span
+    except Exception:
+        error = True
+        raise
+    finally:
+        record(stage, time.perf_counter() - start, error=error, **span)
+
+
+def traced(stage: str | None = None):
+    def decorator(func):
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Other components (e.g. the rate limiter) expose gauges here: fn() returns
+# {label: {field: number}} and is included in snapshots and Prometheus text
+def register_metrics_source(name: str, fn):
+    _sources[name] = fn
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def _rounded(stats: dict) -> dict:
+    return {k: round(v, 4) if isinstance(v, float) else v for k, v in stats.items()}
+
+
+def metrics_snapshot(session: str | None = None) -> dict:
+    with _lock:
+        stages = {}
+        for stage, stats in _process_stats.items():
+            durations = list(_durations.get(stage, ()))
+            stages[stage] = _rounded({
+                **stats,
+                "p50_wall_s": _percentile(durations, 0.5),
+                "p95_wall_s": _percentile(durations, 0.95),
+            })
+        snapshot = {"uptime_s": round(time.time() - _started_at, 1), "stages": stages}
+        if session is not None:
+            snapshot["session"] = {
+                stage: _rounded(stats) for stage, stats in _session_stats.get(session, {}).items()
+            }
+    for name, fn in list(_sources.items()):
+        snapshot[name] = fn()
+    return snapshot
+
+
+def reset_metrics():
+    with _lock:
+        _process_stats.clear()
+        _session_stats.clear()
+        _durations.clear()
+
+
+def prometheus_text() -> str:
+    snapshot = metrics_snapshot()
+    stages = snapshot["stages"]
+    metrics = [
+        ("calls", "skill_matcher_stage_calls_total", "counter", "Traced calls per stage"),
+        ("errors", "skill_matcher_stage_errors_total", "counter", "Traced calls that raised"),
+        ("cache_hits", "skill_matcher_stage_cache_hits_total", "counter", "Calls answered from the response cache"),
+        ("coalesced", "skill_matcher_stage_coalesced_total", "counter", "Calls that shared an identical in-flight call"),
+        ("retries", "skill_matcher_stage_retries_total", "counter", "Retried attempts per stage"),
+        ("wall_s", "skill_matcher_stage_wall_seconds_total", "counter", "Wall time spent per stage"),
+        ("prompt_tokens", "skill_matcher_stage_prompt_tokens_total", "counter", "Prompt tokens reported by the API"),
+        ("completion_tokens", "skill_matcher_stage_completion_tokens_total", "counter", "Completion tokens reported by the API"),
+        ("p50_wall_s", "skill_matcher_stage_wall_seconds_p50", "gauge", "Median wall time of recent calls"),
+        ("p95_wall_s", "skill_matcher_stage_wall_seconds_p95", "gauge", "95th percentile wall time of recent calls"),
+    ]
+    lines = []
+    for field, name, kind, help_text in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for stage, stats in sorted(stages.items()):
+            if stats[field] is not None:
+                lines.append(f'{name}{{stage="{stage}"}} {stats[field]}')
+    for source in _sources:
+        for label, values in sorted(snapshot[source].items()):
+            for field, value in values.items():
+                if isinstance(value, (int, float)):
+                    lines.append(f'skill_matcher_{source}_{field}{{name="{label}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def export_metrics(path: str | None = None) -> str | None:
+    path = path or os.getenv("SKILL_MATCHER_METRICS_FILE")
+    if not path:
+        return None
+    if path.endswith(".prom"):
+        text = prometheus_text()
+    else:
+        text = json.dumps(metrics_snapshot(), indent=2)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = prometheus_text(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(metrics_snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int | None = None) -> ThreadingHTTPServer | None:
+    port = port if port is not None else int(os.getenv("SKILL_MATCHER_METRICS_PORT", 0))
+    if not port:
+        return None
+    server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server